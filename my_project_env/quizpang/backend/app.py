@@ -1,71 +1,238 @@
 # app.py
+#
+# 개발: python app.py  (APP_ENV=development, 디버그 모드, 임포트 시 DB 연결)
+# 운영: gunicorn -c gunicorn.conf.py  (APP_ENV=production, --preload, DB 는 워커별로 fork 이후 연결)
+import time
+_IMPORT_START = time.perf_counter()   # 아래 임포트 비용도 부팅 시간에 포함
 
 import os
-import json
+import hmac
 import logging
-from flask import Flask, jsonify, request
+import atexit
+from flask import Flask, Blueprint, jsonify, request, Response
 from flask_cors import CORS
-# from google import genai
-# from google.genai import types
-import google.generativeai as genai
-# from google.generativeai import types
-# from google.genai.errors import APIError
-from db import get_db_manager, db_manager # db_manager 전역 변수 임포트
+import db as db_module
+from db import get_db_manager, configure_db_manager, close_db_manager, db_available, db_breaker, CircuitOpenError
 from auth import auth_bp
-from quiz import quiz_bp # 퀴즈 블루프린트 임포트
-import atexit   
-from flask_cors import CORS
+from quiz import quiz_bp, db_unavailable_response # 퀴즈 블루프린트 임포트
+from cache import all_cache_stats
+import attempt_writer
+import quiz_gen
+from search_index import get_search_index
+from recommender import get_recommender
+import metrics
+import compression
+import replicas
+from json_provider import FastJSONProvider
+from config import load_config
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# --- 환경 설정 ---
-# 1. Gemini API 키 (quiz.py에서 필요할 경우 사용)
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# 워커 부팅 시간 (/health 의 boot). 임포트 → create_app → init_worker 순서로 채워집니다.
+BOOT_STATS = {
+    "import_ms": round((time.perf_counter() - _IMPORT_START) * 1000, 1),
+    "create_app_ms": None,
+    "worker_init_ms": None,
+    "worker_boot_ms": None,
+    "budget_ms": None,
+    "within_budget": None,
+}
 
-if not GEMINI_API_KEY:
-    logger.error("GEMINI_API_KEY 환경 변수가 설정되지 않았습니다. API 키를 설정해주세요.")
+# --- 상태 확인 / 관리 라우트 (create_app 에서 등록) ---
+# cli_group=None: 명령 이름이 'flask --app app rebuild-leaderboards' 그대로 유지됩니다.
+ops_bp = Blueprint('ops', __name__, cli_group=None)
 
-# 2. Flask 애플리케이션 초기화 및 CORS 설정
-app = Flask(__name__)
-# 프론트엔드(Vite 개발 서버)의 요청을 허용합니다.
-CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# 3. Gemini 클라이언트 초기화
-try:
-    if GEMINI_API_KEY:
-        # client = genai.Client(api_key=GEMINI_API_KEY)
-        genai.configure(api_key=GEMINI_API_KEY)
-    else:
-        client = None 
-except Exception as e:
-    logger.error(f"Gemini 클라이언트 초기화 실패: {e}")
-    client = None
-
-# 4. 데이터베이스 연결 관리자 초기화 (수정된 부분)
-# NOTE: Flask 2.3+에서 'before_first_request'는 제거되었습니다.
-# 앱 시작 시 DB 연결 및 테이블 생성을 보장하기 위해, 앱 컨텍스트를 사용하여 수동으로 호출합니다.
-with app.app_context():
+def _pool_gauge(field):
+    def read():
+        # 스크랩이 DB 연결을 만들지 않도록, 이미 만들어진 경우에만 값을 보고합니다.
+        db = db_module.db_manager
+        return {(): db.pool_stats()[field]} if db else {}
+    return read
+
+metrics.register_gauge("quizpang_db_pool_in_use", "DB connections currently checked out.", (), _pool_gauge("in_use"))
+metrics.register_gauge("quizpang_db_pool_size", "DB connections currently open.", (), _pool_gauge("size"))
+metrics.register_gauge("quizpang_db_pool_wait_max_ms", "Longest pool checkout wait so far (ms).", (), _pool_gauge("wait_time_max_ms"))
+
+
+def create_app(config=None) -> Flask:
+    """
+    Flask 앱을 만듭니다. config 는 프로필 이름('development' / 'production'), 설정 클래스, dict 중 하나.
+
+    DB_EAGER_INIT 이 꺼져 있으면(운영) 이 함수는 소켓/스레드를 만들지 않으므로
+    gunicorn --preload 로 master 에서 한 번 임포트한 뒤 fork 해도 안전합니다.
+    """
+    start = time.perf_counter()
+    app = Flask(__name__)
+    app.config.update(load_config(config))
+
+    if not os.environ.get("GEMINI_API_KEY"):
+        logger.error("GEMINI_API_KEY 환경 변수가 설정되지 않았습니다. API 키를 설정해주세요.")
+
+    # jsonify / request.get_json 을 orjson 기반 인코더로 (없으면 표준 json, 한글은 UTF-8 그대로)
+    app.json = FastJSONProvider(app)
+    # 프론트엔드(Vite 개발 서버)의 요청을 허용합니다.
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", replicas.LAST_WRITE_HEADER])
+
+    # 요청 지연 시간 / DB 사용량 측정 (/metrics), 응답 압축 (Accept-Encoding 에 따라 gzip/brotli)
+    metrics.init_app(app)
+    compression.init_app(app)
+    # 복제본을 쓰면 쓰기 직후의 읽기를 워커와 관계없이 primary 로 (마지막 쓰기 시각 쿠키/헤더)
+    replicas.init_app(app)
+
+    # 블루프린트 등록
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(quiz_bp)
+    app.register_blueprint(ops_bp)
+    # 라우트에서 따로 처리하지 않은 브레이커 거절도 500 이 아니라 503 + Retry-After 로
+    app.register_error_handler(CircuitOpenError, db_unavailable_response)
+
+    # DB 연결 관리자: 처음 get_db_manager() 가 불릴 때 이 옵션으로 만들어집니다.
+    configure_db_manager(migrate=app.config['DB_MIGRATE_ON_CONNECT'])
+    if app.config['DB_EAGER_INIT']:
+        get_db_manager()
+
+    BOOT_STATS["create_app_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    BOOT_STATS["budget_ms"] = app.config['COLD_START_BUDGET_MS']
+    return app
+
+
+def init_worker(app: Flask, forked_at: float = None) -> dict:
+    """
+    워커가 요청을 받기 전에 한 번 호출합니다. (gunicorn.conf.py 의 post_worker_init)
+    DB 풀을 미리 채워 첫 요청이 연결 비용을 치르지 않게 하고, fork 부터 여기까지의 시간을 예산과 비교합니다.
+    """
+    start = time.perf_counter()
     get_db_manager()
+    now = time.perf_counter()
+    BOOT_STATS["worker_init_ms"] = round((now - start) * 1000, 1)
+    if forked_at is not None:
+        BOOT_STATS["worker_boot_ms"] = round((now - forked_at) * 1000, 1)
+    total = BOOT_STATS["worker_boot_ms"] or BOOT_STATS["worker_init_ms"]
+    budget = app.config['COLD_START_BUDGET_MS']
+    BOOT_STATS["within_budget"] = total <= budget
+    if total > budget:
+        logger.warning(f"워커 {os.getpid()} 부팅 {total:.0f}ms 가 예산 {budget:.0f}ms 를 넘었습니다. ({BOOT_STATS})")
+    else:
+        logger.info(f"워커 {os.getpid()} 준비 완료: {total:.0f}ms")
+    return BOOT_STATS
 
-# 5. 블루프린트 등록
-app.register_blueprint(auth_bp, url_prefix='/api/auth') 
-app.register_blueprint(quiz_bp) 
 
-# 6. 앱 종료 시 DB 연결 해제
+# 앱/워커 종료 시 정리 (atexit 와 gunicorn worker_exit 에서 호출, 여러 번 불려도 안전)
 @atexit.register
 def shutdown():
-    if db_manager:
-        db_manager.close()
-        logger.info("Application shutting down: DB connection closed.")
+    # write-behind 큐에 남은 풀이 기록을 먼저 저장
+    attempt_writer.shutdown_attempt_writer()
+    # AI 퀴즈 생성 워커 스레드 종료
+    quiz_gen.shutdown_generation_queue()
+    # DB 풀 연결 해제 (임포트 시점의 값이 아니라 현재 싱글톤을 닫음)
+    close_db_manager()
+
+# --- 관리 명령 ---
+@ops_bp.cli.command('rebuild-leaderboards')
+def rebuild_leaderboards_command():
+    """랭킹 집계 테이블을 원본 데이터로부터 다시 계산합니다. (flask --app app rebuild-leaderboards)"""
+    db = get_db_manager()
+    if not db:
+        raise SystemExit("Database connection is not available.")
+    result = db.rebuild_leaderboards()
+    print(f"Leaderboards rebuilt: {result['solvers']} solvers, {result['authors']} authors")
+
+
+@ops_bp.cli.command('compact-ranking-buckets')
+def compact_ranking_buckets_command():
+    """오래된 일 단위 랭킹 버킷을 월 버킷으로 접습니다. (flask --app app compact-ranking-buckets, 하루 한 번)"""
+    db = get_db_manager()
+    if not db:
+        raise SystemExit("Database connection is not available.")
+    result = db.compact_ranking_buckets()
+    print(f"Ranking buckets compacted: {result['day_buckets']} day buckets before day {result['cutoff']}")
+
+
+@ops_bp.cli.command('replay-attempts')
+def replay_attempts_command():
+    """write-behind 에서 저장하지 못해 dead letter 파일에 남은 풀이 기록을 다시 저장합니다. (flask --app app replay-attempts)"""
+    db = get_db_manager()
+    if not db:
+        raise SystemExit("Database connection is not available.")
+    result = attempt_writer.replay_dead_letters(db)
+    print(f"Attempts replayed: {result['saved']} saved, {result['failed']} still failing "
+          f"({attempt_writer.ATTEMPT_DEAD_LETTER_PATH})")
+
+
+@ops_bp.cli.command('db-upgrade')
+def db_upgrade_command():
+    """스키마 마이그레이션만 실행합니다. (배포 단계에서 한 번, flask --app app db-upgrade)"""
+    print(f"Schema version: {db_module.migrate_database()}")
+
 
 # --- 상태 확인 라우트 ---
-@app.route('/health', methods=['GET'])
+@ops_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ok", "db_connected": db_manager is not None}), 200
+    # 브레이커가 열려 있으면 연결을 시도하지 않고 바로 None (상태 확인이 DB 장애 때 워커를 붙잡지 않음)
+    db = get_db_manager()
+    return jsonify({
+        "status": "ok" if db_available() else "degraded",
+        "db_connected": db_available(),
+        # DB 서킷 브레이커 (closed/open/half_open, 연속 실패 수, 마지막 probe 결과와 지연 시간)
+        "db_breaker": db_breaker.stats(),
+        # 커넥션 풀 상태 (사용 중 연결 수, checkout 대기 시간 등)
+        "db_pool": db.pool_stats() if db else None,
+        # 응답 캐시 적중률
+        "caches": all_cache_stats(),
+        # 풀이 기록 write-behind 큐 (ATTEMPT_WRITE_BEHIND=1 일 때)
+        "attempt_writer": attempt_writer.attempt_writer.stats() if attempt_writer.attempt_writer else None,
+        # AI 퀴즈 생성 작업 큐 (첫 생성 요청 이후)
+        "generation": quiz_gen.generation_queue.stats() if quiz_gen.generation_queue else None,
+        # 검색 색인 (문서/단어 수, 대략적인 메모리 사용량)
+        "search_index": get_search_index().stats(),
+        # 관련 퀴즈 추천 (마지막 계산 시간, 배열 저장소 크기)
+        "related": get_recommender().stats(),
+        # 워커 부팅 시간과 예산
+        "boot": BOOT_STATS,
+    }), 200
+
+
+def _is_admin() -> bool:
+    """X-Admin-Token 헤더가 ADMIN_TOKEN 환경 변수와 일치하는지 확인합니다."""
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    return bool(admin_token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token)
+
+
+@ops_bp.route('/api/admin/slow-queries', methods=['GET'])
+def slow_queries():
+    """느린 쿼리 링 버퍼 조회 (X-Admin-Token 헤더가 ADMIN_TOKEN 과 일치해야 함)"""
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
+    return jsonify(db.slow_queries()), 200
+
+
+@ops_bp.route('/api/admin/search/rebuild', methods=['POST'])
+def rebuild_search_index():
+    """검색 색인을 DB 에서 다시 만듭니다. (이 요청을 받은 워커만 해당, 관리자 전용)"""
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
+    return jsonify(get_search_index().rebuild(db.iter_search_documents)), 200
+
+
+@ops_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 수집용 메트릭 (워커 프로세스별 값)"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+# flask --app app ... / gunicorn -c gunicorn.conf.py 용 모듈 수준 앱 (프로필은 APP_ENV)
+app = create_app()
 
 
 if __name__ == '__main__':
     # 프론트엔드 연동을 위해 5001 포트에서 실행
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    app.run(host='0.0.0.0', port=5001, debug=app.config['DEBUG'])
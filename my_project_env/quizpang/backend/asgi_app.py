@@ -0,0 +1,79 @@
+# asgi_app.py (비동기 서빙 모드)
+#
+# 실행: hypercorn asgi_app:app --bind 0.0.0.0:5001
+#       (워커 프로세스 하나로 실행합니다. --workers 를 늘리면 프로세스마다 ID_NODE_ID 를 다르게 줄 방법이 없어
+#        사용자 ID 노드 번호가 겹칠 수 있습니다. 여러 프로세스가 필요하면 프로세스별로 따로 띄우고 ID_NODE_ID 지정)
+#
+# app.py(Flask/gunicorn) 와 같은 /api 경로를 aiomysql 기반 AsyncDBManager 로 처리합니다.
+# 요청이 DB 응답을 기다리는 동안 워커 스레드를 붙잡지 않으므로, 한 프로세스가 느린 클라이언트 수천 개를 동시에 유지할 수 있습니다.
+import asyncio
+import logging
+from quart import Quart, jsonify
+from quart_cors import cors
+
+from async_db import get_async_db_manager
+from async_routes import async_quiz_bp, async_auth_bp
+from live_routes import live_bp
+from live_rooms import get_room_registry
+from cache import all_cache_stats
+from db import DBManager, close_db_manager
+from json_provider import FastJSONProvider
+import compression
+import quiz_gen
+from search_index import get_search_index
+from recommender import get_recommender
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+app.json = FastJSONProvider(app)
+compression.init_quart_app(app)
+app = cors(app, allow_origin="*", expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"])
+
+app.register_blueprint(async_auth_bp)
+app.register_blueprint(async_quiz_bp)
+# 실시간 퀴즈 방 (WebSocket / SSE)
+app.register_blueprint(live_bp)
+
+
+def _apply_migrations():
+    """스키마 마이그레이션은 동기 DBManager(migrations.py)로 한 번 실행하고 바로 연결을 닫습니다."""
+    DBManager().close()
+
+
+@app.before_serving
+async def startup():
+    await asyncio.to_thread(_apply_migrations)
+    await get_async_db_manager().open()
+
+
+@app.after_serving
+async def shutdown():
+    # 진행 중이던 실시간 방의 풀이 기록을 먼저 저장 (DB 풀을 닫기 전에)
+    await get_room_registry().close()
+    await get_async_db_manager().close()
+    await asyncio.to_thread(quiz_gen.shutdown_generation_queue)
+    # 색인/관련 퀴즈 계산 스레드와 생성 작업 저장소가 쓰던 동기 풀
+    await asyncio.to_thread(close_db_manager)
+    logger.info("Application shutting down: async DB pool closed.")
+
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    db = get_async_db_manager()
+    return jsonify({
+        "status": "ok",
+        "mode": "asgi",
+        "db_connected": db.pool is not None,
+        "db_pool": db.pool_stats(),
+        "caches": all_cache_stats(),
+        "generation": quiz_gen.generation_queue.stats() if quiz_gen.generation_queue else None,
+        "search_index": get_search_index().stats(),
+        "related": get_recommender().stats(),
+        "live": get_room_registry().stats(),
+    }), 200
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5001)
@@ -0,0 +1,295 @@
+# async_db.py (MariaDB / aiomysql 기반 비동기 DB 계층 — ASGI 모드 전용)
+import os
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Tuple
+
+import aiomysql
+import pymysql
+
+from db import (
+    SQL_USER_BY_ID, SQL_USER_BY_EMAIL, SQL_INSERT_USER,
+    SQL_INSERT_QUIZ, SQL_INSERT_QUESTION, SQL_AUTHOR_QUIZ_COUNT,
+    SQL_CREATED_QUIZZES, SQL_ALL_QUIZZES, SQL_QUIZ_BY_ID, SQL_QUESTIONS_BY_QUIZ,
+    SQL_SET_QUESTION_VOTES, SQL_SET_QUIZ_VOTES, SQL_AUTHOR_VOTES, lock_questions_query, lock_quizzes_query,
+    SQL_INSERT_ATTEMPT, SQL_SOLVE_STATS, SQL_USER_ATTEMPTS, SQL_MY_SUMMARY,
+    SQL_SOLVER_RANKING, SQL_AUTHOR_RANKING,
+    SQL_ATTEMPT_WATERMARK, quizzes_by_ids_query,
+    SQL_SOLVE_BUCKET, SQL_SOLVER_RANKING_WINDOW, bucket_rows, ranking_window_bounds,
+    user_conflict_error, question_row, quizzes_page_query,
+    aggregate_ratings, aggregate_quiz_ratings, vote_updates, attempt_rows, my_summary_params, parse_my_summary,
+    history_page_query,
+)
+from search_index import get_search_index
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDBManager:
+    """
+    DBManager 와 같은 메서드 이름/반환 형태를 가진 비동기 버전. (모든 메서드는 코루틴)
+
+    - aiomysql 풀을 이벤트 루프마다 하나씩 사용합니다. open() 은 서버 시작 시(before_serving),
+      close() 는 종료 시(after_serving) 호출합니다.
+    - SQL 과 집계 로직은 db.py 의 것을 그대로 공유하므로 두 계층의 결과가 같습니다.
+    - 스키마 마이그레이션은 동기 계층(db.DBManager / migrations.py)에서만 실행합니다.
+    """
+
+    # ------------------
+    # 1. 초기화 및 연결
+    # ------------------
+    def __init__(self):
+        self.DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
+        self.DB_USER = os.getenv("DB_USER", "root")
+        self.DB_PASSWORD = os.getenv("DB_PASSWORD", "1234")
+        self.DB_NAME = os.getenv("DB_NAME", "quizpang")
+        self.DB_PORT = int(os.getenv("DB_PORT", 3306))
+
+        self.min_size = int(os.getenv("DB_ASYNC_POOL_MIN", 1))
+        self.max_size = int(os.getenv("DB_ASYNC_POOL_MAX", 20))
+        # 유휴 커넥션을 이 시간(초)보다 오래 두지 않음 (MariaDB wait_timeout 대비)
+        self.pool_recycle = int(os.getenv("DB_ASYNC_POOL_RECYCLE", 300))
+        self.pool: Optional[aiomysql.Pool] = None
+
+    async def open(self):
+        """aiomysql 풀을 만듭니다. 이미 열려 있으면 아무것도 하지 않습니다."""
+        if self.pool is not None:
+            return
+        self.pool = await aiomysql.create_pool(
+            host=self.DB_HOST,
+            user=self.DB_USER,
+            password=self.DB_PASSWORD,
+            db=self.DB_NAME,
+            port=self.DB_PORT,
+            minsize=self.min_size,
+            maxsize=self.max_size,
+            pool_recycle=self.pool_recycle,
+            cursorclass=aiomysql.DictCursor,
+            autocommit=True,              # 트랜잭션은 transaction()에서 명시적으로 시작
+            charset="utf8mb4",
+        )
+        logger.info(f"aiomysql 풀 생성 (min={self.min_size}, max={self.max_size}).")
+
+    async def close(self):
+        """풀의 모든 커넥션을 닫습니다. (서버 종료 시 호출)"""
+        if self.pool is None:
+            return
+        self.pool.close()
+        await self.pool.wait_closed()
+        self.pool = None
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        풀에서 커넥션을 빌려주는 비동기 컨텍스트 매니저.
+            async with db.connection() as conn: ...
+        """
+        async with self.pool.acquire() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def transaction(self):
+        """블록이 정상 종료되면 COMMIT, 예외가 발생하면 ROLLBACK 합니다."""
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                yield conn
+                await conn.commit()
+            except BaseException:
+                # 취소(CancelledError)된 경우에도 열린 트랜잭션을 풀로 돌려보내지 않도록 롤백
+                try:
+                    await conn.rollback()
+                except pymysql.Error:
+                    pass
+                raise
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """aiomysql 풀 상태 (DBManager.pool_stats 와 같은 키 일부)"""
+        if self.pool is None:
+            return {"size": 0, "idle": 0, "in_use": 0, "max_size": self.max_size}
+        return {
+            "size": self.pool.size,
+            "idle": self.pool.freesize,
+            "in_use": self.pool.size - self.pool.freesize,
+            "max_size": self.pool.maxsize,
+        }
+
+    # ------------------
+    # 2. 공통 DB 메서드
+    # ------------------
+    async def execute_query(self, sql: str, params=None, fetchone=False):
+        """SELECT 쿼리를 실행하고 결과를 반환합니다."""
+        try:
+            async with self.connection() as conn, conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                if fetchone:
+                    return await cursor.fetchone()
+                return await cursor.fetchall()
+        except pymysql.Error as e:
+            logger.error(f"쿼리 실행 실패: {sql}, 오류: {e}")
+            raise
+
+    async def execute_non_query(self, sql: str, params=None) -> int:
+        """INSERT, UPDATE, DELETE 쿼리를 실행하고 영향을 받은 행 수를 반환합니다."""
+        try:
+            async with self.connection() as conn, conn.cursor() as cursor:
+                return await cursor.execute(sql, params)
+        except pymysql.Error as e:
+            logger.error(f"Non-Query 실행 실패: {sql}, 오류: {e}")
+            raise
+
+    # ------------------
+    # 3. 사용자
+    # ------------------
+    async def get_user_by_id(self, user_id: str):
+        return await self.execute_query(SQL_USER_BY_ID, (user_id,), fetchone=True)
+
+    async def get_user_by_email(self, email: str):
+        return await self.execute_query(SQL_USER_BY_EMAIL, (email,), fetchone=True)
+
+    async def create_user(self, new_user_id: str, username: str, email: str, password_hash: str) -> str:
+        """DBManager.create_user 와 같음: INSERT 한 번, 중복은 ValueError."""
+        try:
+            await self.execute_non_query(SQL_INSERT_USER, (new_user_id, username, email, password_hash))
+            return new_user_id
+        except pymysql.err.IntegrityError as e:
+            conflict = user_conflict_error(e, username, email)
+            if conflict:
+                raise conflict
+            raise
+
+    # ------------------
+    # 4. 퀴즈 / 문제
+    # ------------------
+    QUESTION_INSERT_CHUNK = int(os.getenv("QUESTION_INSERT_CHUNK", 500))
+
+    async def add_quiz_and_questions(self, quiz_data) -> int:
+        """퀴즈와 문제들을 한 트랜잭션으로 저장하고 quiz_id 를 반환합니다. (questions 는 리스트)"""
+        questions = list(quiz_data['questions'])
+        if not questions:
+            raise ValueError(f"Quiz '{quiz_data['title']}' has no questions.")
+        try:
+            async with self.transaction() as conn, conn.cursor() as cursor:
+                await cursor.execute(
+                    SQL_INSERT_QUIZ,
+                    (quiz_data['title'], quiz_data['category'], quiz_data['creator_id'], len(questions))
+                )
+                quiz_id = cursor.lastrowid
+                rows = [question_row(quiz_id, q) for q in questions]
+                for i in range(0, len(rows), self.QUESTION_INSERT_CHUNK):
+                    await cursor.executemany(SQL_INSERT_QUESTION, rows[i:i + self.QUESTION_INSERT_CHUNK])
+                # 출제 랭킹 집계 (같은 트랜잭션)
+                await cursor.execute(SQL_AUTHOR_QUIZ_COUNT, (quiz_data['creator_id'],))
+            get_search_index().add_quiz(
+                quiz_id, quiz_data['title'], quiz_data['category'], quiz_data['creator_id'],
+                [q['text'] for q in questions])
+            return quiz_id
+        except pymysql.Error as e:
+            logger.error(f"퀴즈 및 문제 저장 트랜잭션 실패: {e}")
+            raise
+
+    async def get_created_quizzes_by_user(self, user_id: str):
+        return await self.execute_query(SQL_CREATED_QUIZZES, (user_id,))
+
+    async def get_all_quizzes(self):
+        return await self.execute_query(SQL_ALL_QUIZZES)
+
+    async def get_quizzes_page(self, limit: int, sort: str = 'latest', category: Optional[str] = None,
+                               after: Optional[Tuple] = None) -> List[Dict[str, Any]]:
+        sql, params = quizzes_page_query(limit, sort=sort, category=category, after=after)
+        return await self.execute_query(sql, params)
+
+    async def get_quiz_by_id(self, quiz_id):
+        return await self.execute_query(SQL_QUIZ_BY_ID, (quiz_id,), fetchone=True)
+
+    async def get_quizzes_by_ids(self, quiz_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not quiz_ids:
+            return {}
+        rows = await self.execute_query(quizzes_by_ids_query(len(quiz_ids)), tuple(quiz_ids))
+        return {r['quiz_id']: r for r in rows}
+
+    async def get_questions_by_quiz_id(self, quiz_id):
+        return await self.execute_query(SQL_QUESTIONS_BY_QUIZ, (quiz_id,))
+
+    async def update_question_rating(self, question_id: int, rating: int):
+        new_avgs, _, _ = await self.rate_questions([(question_id, rating)])
+        return new_avgs[question_id]
+
+    async def rate_questions(self, ratings: List[Tuple[int, int]]) -> Tuple[Dict[int, float], List[int], List[str]]:
+        """DBManager.rate_questions 와 같음: ({question_id: 새 평균}, [quiz_id 목록], [출제자 user_id 목록])"""
+        per_question = aggregate_ratings(ratings)
+        question_ids = sorted(per_question)
+
+        async with self.transaction() as conn, conn.cursor() as cursor:
+            await cursor.execute(lock_questions_query(len(question_ids)), tuple(question_ids))
+            rows = await cursor.fetchall()
+            missing = set(question_ids) - {r['id'] for r in rows}
+            if missing:
+                raise ValueError(f"Question {min(missing)} not found")
+            updates = vote_updates(rows, 'id', per_question)
+            await cursor.executemany(SQL_SET_QUESTION_VOTES, updates)
+            new_avgs = {question_id: avg for avg, _, question_id in updates}
+
+            per_quiz = aggregate_quiz_ratings(rows, per_question)
+            quiz_ids = sorted(per_quiz)
+            await cursor.execute(lock_quizzes_query(len(quiz_ids)), tuple(quiz_ids))
+            quiz_rows = await cursor.fetchall()
+            await cursor.executemany(SQL_SET_QUIZ_VOTES, vote_updates(quiz_rows, 'quiz_id', per_quiz))
+            await cursor.executemany(SQL_AUTHOR_VOTES, [(per_quiz[q][1], per_quiz[q][0], q) for q in quiz_ids])
+
+        creator_ids = sorted({r['creator_id'] for r in quiz_rows})
+        return new_avgs, sorted(per_quiz), creator_ids
+
+    # ------------------
+    # 5. 풀이 기록 / 랭킹
+    # ------------------
+    async def add_quiz_attempt(self, attempt_data):
+        attempt_data['date'] = int(time.time() * 1000)
+        return await self.add_quiz_attempts([attempt_data]) > 0
+
+    async def add_quiz_attempts(self, attempts: List[Dict[str, Any]]) -> int:
+        rows, stats_rows = attempt_rows(attempts)
+        async with self.transaction() as conn, conn.cursor() as cursor:
+            row_count = await cursor.executemany(SQL_INSERT_ATTEMPT, rows)
+            await cursor.executemany(SQL_SOLVE_STATS, stats_rows)
+            await cursor.executemany(SQL_SOLVE_BUCKET, bucket_rows(attempts))
+        return row_count
+
+    async def get_user_attempts(self, user_id):
+        return await self.execute_query(SQL_USER_ATTEMPTS, (user_id,))
+
+    async def get_user_attempts_page(self, user_id: str, limit: int, after: Optional[Tuple[int, int]] = None,
+                                     since: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql, params = history_page_query(user_id, limit, after=after, since=since)
+        return await self.execute_query(sql, params)
+
+    async def get_my_summary(self, user_id: str, recent_limit: int, created_limit: int) -> Dict[str, Any]:
+        rows = await self.execute_query(SQL_MY_SUMMARY, my_summary_params(user_id, recent_limit, created_limit))
+        return parse_my_summary(rows)
+
+    async def get_solver_ranking(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.execute_query(SQL_SOLVER_RANKING, (limit,))
+
+    async def get_solver_ranking_window(self, window: str, limit: int = 100,
+                                        now_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        day_from, month_from = ranking_window_bounds(window, now_ms)
+        return await self.execute_query(SQL_SOLVER_RANKING_WINDOW, (day_from, month_from, limit))
+
+    async def get_attempt_watermark(self) -> int:
+        row = await self.execute_query(SQL_ATTEMPT_WATERMARK, fetchone=True)
+        return (row or {}).get('watermark') or 0
+
+    async def get_author_ranking(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.execute_query(SQL_AUTHOR_RANKING, (limit,))
+
+
+# 싱글톤 (ASGI 서버 프로세스당 하나, asgi_app.py 의 before_serving 에서 open)
+async_db_manager: Optional[AsyncDBManager] = None
+
+def get_async_db_manager() -> AsyncDBManager:
+    """AsyncDBManager 싱글톤을 반환합니다. (풀은 open() 후에 사용 가능)"""
+    global async_db_manager
+    if async_db_manager is None:
+        async_db_manager = AsyncDBManager()
+    return async_db_manager
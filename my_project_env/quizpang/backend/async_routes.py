@@ -0,0 +1,567 @@
+# async_routes.py (ASGI 모드용 비동기 라우트 — quiz.py / auth.py 와 같은 URL/응답 형식)
+import os
+import time
+import asyncio
+import logging
+from quart import Blueprint, jsonify, request, Response
+
+from async_db import get_async_db_manager
+from db import RANKING_WINDOWS, get_db_manager
+from auth import hash_password
+from cache import ResponseCache, ByteLRUCache
+from compression import EncodedBody
+from json_provider import dumps_bytes
+from idgen import new_user_id
+from quiz_gen import get_generation_queue, normalize_request, GenerationQueueFull
+from search_index import get_search_index
+from recommender import get_recommender, is_available as recommender_available
+from grading import AnswerKey, AnswerSheetError, parse_answer_sheet
+from serializers import (
+    quiz_list_item, quiz_payload, attempt_item,
+    solver_rank_item, author_rank_item, parse_quiz_list_args, split_quiz_page,
+    my_summary_payload, parse_summary_recent, MY_SUMMARY_RECENT, MY_SUMMARY_CREATED,
+    parse_history_args, split_history_page, parse_search_args, search_next_cursor,
+    related_quiz_item, parse_related_limit, parse_rating, parse_rating_batch, parse_attempt,
+)
+
+logger = logging.getLogger(__name__)
+
+async_quiz_bp = Blueprint('async_quiz', __name__, url_prefix='/api')
+async_auth_bp = Blueprint('async_auth', __name__, url_prefix='/api/auth')
+
+# quiz.py 와 같은 캐시 (ASGI 프로세스에서는 quiz.py 를 불러오지 않으므로 이름이 겹치지 않음)
+quiz_list_cache = ResponseCache("quiz_list", ttl=float(os.getenv("QUIZ_LIST_CACHE_TTL", 30)))
+quiz_payload_cache = ByteLRUCache(
+    "quiz_payload", max_bytes=int(os.getenv("QUIZ_PAYLOAD_CACHE_BYTES", 32 * 1024 * 1024)))
+my_summary_cache = ByteLRUCache(
+    "my_summary", max_bytes=int(os.getenv("MY_SUMMARY_CACHE_BYTES", 8 * 1024 * 1024)),
+    ttl=float(os.getenv("MY_SUMMARY_CACHE_TTL", 10)))
+answer_key_cache = ByteLRUCache(
+    "answer_key", max_bytes=int(os.getenv("ANSWER_KEY_CACHE_BYTES", 16 * 1024 * 1024)))
+# 관련 퀴즈 응답 캐시. 키에 추천 결과 버전이 들어가므로 재계산되면 자연히 새 키를 쓰고,
+# 목록에 포함된 평점 정보는 TTL 동안만 재사용합니다.
+related_cache = ByteLRUCache(
+    "related", max_bytes=int(os.getenv("RELATED_CACHE_BYTES", 8 * 1024 * 1024)),
+    ttl=float(os.getenv("RELATED_CACHE_TTL", 60)))
+ranking_cache = ByteLRUCache(
+    "ranking", max_bytes=int(os.getenv("RANKING_CACHE_BYTES", 2 * 1024 * 1024)),
+    ttl=float(os.getenv("RANKING_CACHE_TTL", 30)))
+GENERATE_STREAM_TIMEOUT = float(os.getenv("QUIZ_GENERATE_STREAM_TIMEOUT", 120))
+
+
+def _invalidate_summaries(user_ids):
+    for user_id in user_ids:
+        my_summary_cache.invalidate(user_id)
+
+
+def _dumps(payload) -> bytes:
+    return dumps_bytes(payload)
+
+
+def _cached_json_response(etag: str, body: EncodedBody):
+    """
+    캐시된 JSON 바디로 응답을 만들고, If-None-Match 가 일치하면 304 를 반환합니다.
+    Accept-Encoding 에 맞춰 미리 압축해 둔 변형을 보내며, ETag 에도 인코딩을 붙여 구분합니다.
+    """
+    encoding, data = body.select(request.headers.get('Accept-Encoding'))
+    if encoding:
+        etag = f"{etag}-{encoding}"
+    if request.if_none_match.contains(etag):
+        resp = Response(b"", status=304)
+    else:
+        resp = Response(data, status=200, mimetype='application/json')
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+def _invalidate_quiz_caches(quiz_ids):
+    quiz_list_cache.invalidate()
+    for quiz_id in quiz_ids:
+        quiz_payload_cache.invalidate(quiz_id)
+        quiz_payload_cache.invalidate(f"{quiz_id}:public")
+
+
+async def _answer_key(db, quiz_id: int):
+    async def build():
+        questions = await db.get_questions_by_quiz_id(quiz_id)
+        return AnswerKey(quiz_id, questions) if questions else None
+
+    cached = await answer_key_cache.get_or_build_async(quiz_id, build)
+    return cached[1] if cached else None
+
+
+# ------------------------------------
+# 1. 퀴즈 생성 / 목록 / 문제
+# ------------------------------------
+@async_quiz_bp.route('/quiz/create', methods=['POST'])
+async def create_quiz():
+    db = get_async_db_manager()
+    data = await request.get_json() or {}
+    if not all(k in data for k in ('title', 'category', 'questions')):
+        return jsonify({"error": "Missing required fields for quiz creation."}), 400
+
+    creator_id = (request.headers.get('X-User-Id') or data.get('creator_id') or "").strip()
+    if not creator_id:
+        return jsonify({"error": "creator_id is required (use logged-in user id)."}), 401
+    if not await db.get_user_by_id(creator_id):
+        return jsonify({"error": f"creator_id '{creator_id}' does not exist."}), 400
+    data['creator_id'] = creator_id
+
+    try:
+        quiz_id = await db.add_quiz_and_questions(data)
+        quiz_list_cache.invalidate()
+        _invalidate_summaries([creator_id])
+        return jsonify({"message": "Quiz created successfully.", "quiz_id": quiz_id}), 201
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.error(f"Quiz creation failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/quiz/list', methods=['GET'])
+async def get_quiz_list():
+    db = get_async_db_manager()
+    args = request.args
+    paged = any(k in args for k in ('limit', 'cursor', 'category', 'sort'))
+
+    try:
+        if not paged:
+            async def build_all():
+                return EncodedBody(_dumps([quiz_list_item(q) for q in await db.get_all_quizzes()]))
+            etag, body = await quiz_list_cache.get_or_build_async('all', build_all)
+            return _cached_json_response(etag, body)
+
+        try:
+            sort, limit, category, after = parse_quiz_list_args(args)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        async def build():
+            rows = await db.get_quizzes_page(limit, sort=sort, category=category, after=after)
+            items, next_cursor = split_quiz_page(rows, sort, limit)
+            return _dumps(items), next_cursor
+
+        if after is None:
+            async def build_cached():
+                body, next_cursor = await build()
+                return EncodedBody(body), next_cursor
+            etag, (body, next_cursor) = await quiz_list_cache.get_or_build_async(('page', sort, category, limit), build_cached)
+            resp = _cached_json_response(etag, body)
+        else:
+            body, next_cursor = await build()
+            resp = Response(body, status=200, mimetype='application/json')
+        if next_cursor:
+            resp.headers['X-Next-Cursor'] = next_cursor
+        return resp
+    except Exception as e:
+        logger.error(f"Quiz list fetch failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/quiz/<int:quiz_id>/questions', methods=['GET'])
+async def get_quiz_with_questions(quiz_id):
+    db = get_async_db_manager()
+    include_answers = request.args.get('answers') != '0'
+
+    async def build():
+        quiz = await db.get_quiz_by_id(quiz_id)
+        if not quiz:
+            return None
+        questions = await db.get_questions_by_quiz_id(quiz_id)
+        return EncodedBody(_dumps(quiz_payload(quiz, questions, include_answers=include_answers)))
+
+    try:
+        cache_key = quiz_id if include_answers else f"{quiz_id}:public"
+        cached = await quiz_payload_cache.get_or_build_async(cache_key, build)
+        if cached is None:
+            return jsonify({"error": "Quiz not found."}), 404
+        return _cached_json_response(*cached)
+    except Exception as e:
+        logger.error(f"Quiz and questions fetch failed for ID {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+# ------------------------------------
+# 2. 평점
+# ------------------------------------
+@async_quiz_bp.route('/question/rate', methods=['POST'])
+async def rate_question():
+    db = get_async_db_manager()
+    try:
+        question_id, rating = parse_rating(await request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        new_avgs, quiz_ids, creator_ids = await db.rate_questions([(question_id, rating)])
+        _invalidate_quiz_caches(quiz_ids)
+        _invalidate_summaries(creator_ids)
+        return jsonify({"message": "Rating updated successfully.", "new_avg": new_avgs[question_id]}), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 404
+    except Exception as e:
+        logger.error(f"Question rating failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/question/rate/batch', methods=['POST'])
+async def rate_questions_batch():
+    db = get_async_db_manager()
+    try:
+        ratings = parse_rating_batch(await request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        new_avgs, quiz_ids, creator_ids = await db.rate_questions(ratings)
+        _invalidate_quiz_caches(quiz_ids)
+        _invalidate_summaries(creator_ids)
+        return jsonify({
+            "message": "Ratings updated successfully.",
+            "new_avgs": {str(qid): avg for qid, avg in new_avgs.items()},
+        }), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 404
+    except Exception as e:
+        logger.error(f"Batch question rating failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+# ------------------------------------
+# 3. 풀이 기록 / 랭킹 / 요약
+# ------------------------------------
+@async_quiz_bp.route('/attempt/save', methods=['POST'])
+async def save_quiz_attempt():
+    db = get_async_db_manager()
+    try:
+        data = parse_attempt(await request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        if await db.add_quiz_attempt(data):
+            _invalidate_summaries([data['userId']])
+            return jsonify({"message": "Quiz attempt saved successfully."}), 201
+        raise Exception("No rows affected during save.")
+    except Exception as e:
+        logger.error(f"Quiz attempt save failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/quiz/<int:quiz_id>/submit', methods=['POST'])
+async def submit_quiz(quiz_id):
+    db = get_async_db_manager()
+    data = await request.get_json(silent=True) or {}
+    user_id = data.get('userId')
+    if user_id and not data.get('mode'):
+        return jsonify({"error": "mode is required when userId is given."}), 400
+
+    try:
+        sheet = parse_answer_sheet(data)
+        key = await _answer_key(db, quiz_id)
+        if key is None:
+            return jsonify({"error": "Quiz not found."}), 404
+        result = key.grade(sheet)
+    except AnswerSheetError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Grading failed for quiz {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    if not user_id:
+        return jsonify(result), 200
+
+    attempt = {
+        'userId': user_id,
+        'quiz_id': quiz_id,
+        'score': result['score'],
+        'totalQuestions': result['totalQuestions'],
+        'mode': data['mode'],
+    }
+    try:
+        if not await db.add_quiz_attempt(attempt):
+            raise Exception("No rows affected during save.")
+        _invalidate_summaries([user_id])
+    except Exception as e:
+        logger.error(f"Graded attempt save failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    result["saved"] = "saved"
+    return jsonify(result), 201
+
+
+@async_quiz_bp.route('/history/<string:user_id>', methods=['GET'])
+async def get_user_history(user_id):
+    db = get_async_db_manager()
+    paged = any(k in request.args for k in ('limit', 'cursor', 'since'))
+    try:
+        if not paged:
+            attempts = await db.get_user_attempts(user_id)
+            return jsonify([attempt_item(a) for a in attempts]), 200
+
+        try:
+            limit, after, since = parse_history_args(request.args)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        rows = await db.get_user_attempts_page(user_id, limit, after=after, since=since)
+        items, next_cursor = split_history_page(rows, limit)
+        resp = jsonify(items)
+        if next_cursor:
+            resp.headers['X-Next-Cursor'] = next_cursor
+        return resp, 200
+    except Exception as e:
+        logger.error(f"User history fetch failed for ID {user_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/ranking', methods=['GET'])
+async def get_ranking():
+    db = get_async_db_manager()
+    rtype = (request.args.get('type') or 'author').lower()
+    window = (request.args.get('window') or 'all').lower()
+    if window != 'all':
+        if rtype != 'solver':
+            return jsonify({"error": "window is only supported for type=solver."}), 400
+        if window not in RANKING_WINDOWS:
+            return jsonify({"error": f"window must be one of {', '.join(RANKING_WINDOWS)}."}), 400
+    try:
+        if rtype == 'solver' and window != 'all':
+            async def build():
+                return EncodedBody(_dumps([solver_rank_item(r)
+                                           for r in await db.get_solver_ranking_window(window, 100)]))
+            return _cached_json_response(*await ranking_cache.get_or_build_async(f"solver:{window}", build))
+        if rtype == 'solver':
+            return jsonify([solver_rank_item(r) for r in await db.get_solver_ranking(100)]), 200
+        return jsonify([author_rank_item(r) for r in await db.get_author_ranking(100)]), 200
+    except Exception as e:
+        logger.error(f"Ranking fetch failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+@async_quiz_bp.route('/my/summary/<string:user_id>', methods=['GET'])
+async def get_my_summary(user_id):
+    db = get_async_db_manager()
+    try:
+        recent = parse_summary_recent(request.args)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    async def build():
+        summary = await db.get_my_summary(user_id, recent, MY_SUMMARY_CREATED)
+        return _dumps(my_summary_payload(summary))
+
+    try:
+        if recent == MY_SUMMARY_RECENT:
+            async def build_cached():
+                return EncodedBody(await build())
+            return _cached_json_response(*await my_summary_cache.get_or_build_async(user_id, build_cached))
+        return Response(await build(), status=200, mimetype='application/json')
+    except Exception as e:
+        logger.exception(f"/my/summary failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+# ------------------------------------
+# 3-1. AI 퀴즈 생성 작업 (quiz_gen.py 의 스레드 작업 큐를 공유)
+# ------------------------------------
+@async_quiz_bp.route('/quiz/generate', methods=['POST'])
+async def generate_quiz():
+    data = await request.get_json(silent=True) or {}
+    try:
+        req = normalize_request(data.get('topic'), data.get('difficulty'), data.get('count'))
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    try:
+        # submit 은 GenerationJob 테이블을 읽고 쓰므로(처음이면 DB 연결/마이그레이션까지) 이벤트 루프 밖에서
+        job = await asyncio.to_thread(get_generation_queue().submit, req)
+    except GenerationQueueFull as e:
+        logger.warning(f"Generation queue rejected job: {e}")
+        return jsonify({"error": "Too many generation requests, please retry shortly."}), 503
+    return jsonify(job.to_dict()), (200 if job.finished else 202)
+
+
+@async_quiz_bp.route('/quiz/generate/<string:job_id>', methods=['GET'])
+async def get_generation_job(job_id):
+    # 이 워커에 없는 작업은 GenerationJob 테이블에서 읽으므로 스레드에서 조회
+    job = await asyncio.to_thread(get_generation_queue().get, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@async_quiz_bp.route('/quiz/generate/<string:job_id>/stream', methods=['GET'])
+async def stream_generation_job(job_id):
+    """
+    SSE 스트림. 이벤트 루프를 막지 않도록 Condition 대기 대신 짧은 간격으로 버전을 확인합니다.
+    (연결마다 스레드를 잡아 두지 않으므로 동시 스트림 수에 제한이 없음)
+    다른 워커가 맡은 작업은 저장소(DB)에서 poll_interval 간격으로 확인합니다.
+    """
+    jobs = get_generation_queue()
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    remote = job.remote
+
+    async def events():
+        seen = None
+        deadline = time.monotonic() + GENERATE_STREAM_TIMEOUT
+        last_sent = time.monotonic()
+        while True:
+            job = await asyncio.to_thread(jobs.get, job_id) if remote else jobs.get(job_id)
+            if job is None:
+                return
+            if job.version != seen:
+                seen = job.version
+                last_sent = time.monotonic()
+                yield f"event: {job.status}\ndata: {_dumps(job.to_dict()).decode('utf-8')}\n\n".encode('utf-8')
+            if job.finished or time.monotonic() >= deadline:
+                return
+            if time.monotonic() - last_sent >= 15.0:
+                last_sent = time.monotonic()
+                yield b": keep-alive\n\n"
+            await asyncio.sleep(jobs.poll_interval if remote else 0.25)
+
+    resp = Response(events(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+def _streaming_db():
+    """
+    색인/관련 퀴즈 계산 스레드에서 쓰는 동기 DBManager. 전체 테이블을 읽는 작업은 aiomysql 로 이벤트 루프에서
+    디코딩하면 실시간 방/다른 요청이 멈추므로, 스레드에서 서버 측 커서(iter_*)로 한 행씩 읽습니다.
+    """
+    db = get_db_manager()
+    if db is None:
+        raise RuntimeError("database unavailable")
+    return db
+
+
+# ------------------------------------
+# 3-2. 검색 (search_index.py 의 메모리 역색인, 색인 구성은 스레드에서)
+# ------------------------------------
+@async_quiz_bp.route('/search', methods=['GET'])
+async def search_quizzes():
+    try:
+        query, limit, offset = parse_search_args(request.args)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    def load_documents(after_quiz_id):
+        # 색인 스레드에서 동기 DBManager 의 서버 측 커서로 스트리밍 (이벤트 루프에서 행을 디코딩하지 않음)
+        return _streaming_db().iter_search_documents(after_quiz_id)
+
+    try:
+        index = get_search_index()
+        await asyncio.to_thread(index.ensure_fresh, load_documents)
+        total, results = index.search(query, limit, offset)
+    except Exception as e:
+        logger.exception(f"Search failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    resp = Response(_dumps(results), status=200, mimetype='application/json')
+    resp.headers['X-Total-Count'] = str(total)
+    next_cursor = search_next_cursor(total, limit, offset)
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+    return resp
+
+
+# ------------------------------------
+# 3-3. 관련 퀴즈 (recommender.py, 계산은 백그라운드 스레드에서)
+# ------------------------------------
+@async_quiz_bp.route('/quiz/<int:quiz_id>/related', methods=['GET'])
+async def get_related_quizzes(quiz_id):
+    if not recommender_available():
+        return jsonify({"error": "Recommendations are not available on this server."}), 503
+    rec = get_recommender()
+    try:
+        limit = parse_related_limit(request.args, rec.k)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    db = get_async_db_manager()
+    loop = asyncio.get_running_loop()
+
+    def load_watermark():
+        return asyncio.run_coroutine_threadsafe(db.get_attempt_watermark(), loop).result()
+
+    def load_pairs():
+        # 풀이 기록 전체(100만 건 이상)를 리스트로 모으지 않고 계산 스레드에서 서버 측 커서로 바로 배열에 담습니다.
+        return _streaming_db().iter_attempt_pairs()
+
+    async def build():
+        related = rec.related(quiz_id, limit)
+        if related is None:
+            return None
+        rows = await db.get_quizzes_by_ids([related_id for related_id, _ in related])
+        return EncodedBody(_dumps([related_quiz_item(rows[related_id], sim)
+                                   for related_id, sim in related if related_id in rows]))
+
+    try:
+        rec.ensure_fresh(load_watermark, load_pairs)
+        cached = await related_cache.get_or_build_async((rec.version, quiz_id, limit), build)
+    except Exception as e:
+        logger.error(f"Related quizzes fetch failed for ID {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+    if cached is None:
+        resp = jsonify({"error": "Recommendations are being prepared, please retry shortly."})
+        resp.headers['Retry-After'] = '5'
+        return resp, 503
+    return _cached_json_response(*cached)
+
+
+# ------------------------------------
+# 4. 인증 (POST /api/auth/signup, /api/auth/login)
+# ------------------------------------
+@async_auth_bp.route('/signup', methods=['POST'])
+async def signup():
+    db = get_async_db_manager()
+    try:
+        data = await request.get_json() or {}
+        username = data.get('username')
+        email = data.get('email')
+        password = data.get('password')
+        if not all([username, email, password]):
+            return jsonify({"error": "Missing required fields (username, email, password)"}), 400
+
+        user_id = await db.create_user(new_user_id(), username, email, hash_password(password))
+        return jsonify({
+            "message": "User created successfully",
+            "user_id": user_id,
+            "username": username
+        }), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"사용자 회원가입 실패: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to sign up user: {e.__class__.__name__}"}), 500
+
+
+@async_auth_bp.route('/login', methods=['POST'])
+async def login():
+    db = get_async_db_manager()
+    try:
+        data = await request.get_json() or {}
+        email = data.get('email')
+        password = data.get('password')
+        if not all([email, password]):
+            return jsonify({"error": "Missing required fields (email, password)"}), 400
+
+        user = await db.get_user_by_email(email)
+        if not user or hash_password(password) != user['password_hash']:
+            return jsonify({"error": "Invalid email or password"}), 401
+        return jsonify({
+            "message": "Login successful",
+            "user_id": user['id'],
+            "username": user['username']
+        }), 200
+    except Exception as e:
+        logger.error(f"사용자 로그인 실패: {e}", exc_info=True)
+        return jsonify({"error": f"Failed to log in user: {e.__class__.__name__}: {str(e)}"}), 500
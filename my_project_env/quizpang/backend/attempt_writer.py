@@ -0,0 +1,346 @@
+# attempt_writer.py (풀이 기록 write-behind 배치 저장)
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+import pymysql
+
+from breaker import CircuitOpenError
+from replicas import is_connection_error
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AttemptQueueFull(Exception):
+    """큐가 가득 차서 backpressure 대기 시간 안에 기록을 넣지 못했을 때 발생합니다."""
+
+
+# 특정 행 때문에 배치 전체가 실패하는 오류 (FK 위반, 잘못된 값). 재시도해도 같으므로 배치를 나눠 그 행만 걸러냅니다.
+_ROW_ERRORS = (pymysql.err.IntegrityError, pymysql.err.DataError)
+
+
+class DeadLetterFile:
+    """
+    저장하지 못한 풀이 기록을 JSON Lines 파일에 덧붙여 둡니다. (한 줄: {"attempt", "error", "at"})
+    응답(202)은 이미 나갔으므로 로그만 남기고 버리지 않고, replay_dead_letters() 로 다시 저장할 수 있습니다.
+    여러 워커가 같은 파일에 append 모드로 한 번에 씁니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, attempts: List[Dict[str, Any]], error: Exception):
+        now = int(time.time() * 1000)
+        data = "".join(json.dumps({"attempt": a, "error": str(error), "at": now}, ensure_ascii=False) + "\n"
+                       for a in attempts)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # 파일에도 못 쓰면 마지막 수단으로 기록 전체를 로그에 남깁니다.
+            logger.error(f"dead letter 파일 {self.path} 쓰기 실패: {e}, 기록: {data}")
+
+
+class AttemptWriteBehind:
+    """
+    풀이 기록을 메모리 큐에 모았다가 백그라운드 스레드가 다중 행 INSERT 로 저장합니다.
+
+    - batch_size 개가 모이거나 flush_interval 초가 지나면 한 번에 저장합니다.
+    - 큐가 max_queue 개로 가득 차면 submit() 이 put_timeout 초 동안 기다린 뒤 AttemptQueueFull 을 발생시킵니다.
+    - close() 는 남은 기록을 모두 저장한 뒤 스레드를 종료합니다. (app.py 의 atexit 훅에서 호출)
+    - 저장 실패 시 max_retries 번 재시도합니다. FK 위반처럼 특정 행 때문인 오류는 재시도하지 않고
+      배치를 반으로 나눠 가며 그 행만 골라내고, 나머지는 저장합니다.
+    - DB 장애(연결 오류, 브레이커 open)는 횟수 제한 없이 DB 가 돌아올 때까지 기다렸다가 다시 저장합니다.
+      그동안 큐가 차면 submit() 이 AttemptQueueFull(503) 로 거절하므로 큐 크기가 곧 상한입니다.
+      기다리는 중에 close() 되면 남은 기록은 dead letter 로 보냅니다.
+    - 끝내 저장하지 못한 행은 dead letter 파일(ATTEMPT_DEAD_LETTER_PATH)에 남깁니다.
+    - on_flush(batch) 는 배치가 저장된 직후 호출됩니다. (예: 사용자별 요약 캐시 무효화)
+    """
+
+    def __init__(self, db, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5, put_timeout: float = 1.0, max_retries: int = 3,
+                 on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 dead_letter: Optional[DeadLetterFile] = None):
+        self.db = db
+        self.on_flush = on_flush
+        self.dead_letter = dead_letter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "rejected": 0,
+            "flushed": 0,
+            "failed": 0,
+            "rejected_rows": 0,
+            "outage_retries": 0,
+            "batches": 0,
+            "flush_time_total": 0.0,
+            "flush_time_max": 0.0,
+        }
+        self._closed = False
+        self._closing = threading.Event()   # close() 시 DB 장애 대기를 깨움
+        self._thread = threading.Thread(target=self._run, name="attempt-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------
+    # 1. 적재
+    # ------------------
+    def submit(self, attempt_data: Dict[str, Any]):
+        """풀이 기록을 큐에 넣습니다. 저장 시각(date)은 지금 시점으로 기록합니다."""
+        if self._closed:
+            raise AttemptQueueFull("attempt writer is shut down")
+        attempt_data['date'] = int(time.time() * 1000)
+        try:
+            self._queue.put(attempt_data, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise AttemptQueueFull(f"attempt queue is full ({self._queue.maxsize})")
+        with self._lock:
+            self._stats["enqueued"] += 1
+
+    # ------------------
+    # 2. 백그라운드 저장
+    # ------------------
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        start = time.monotonic()
+        saved: List[Dict[str, Any]] = []
+        # 아직 저장하지 않은 조각들. 행 오류가 나면 그 조각을 반으로 나눠 다시 넣습니다.
+        # (이미 저장한 조각은 다시 보내지 않으므로 재시도로 중복 저장되지 않음)
+        pending = [batch]
+        while pending:
+            chunk = pending.pop()
+            try:
+                self._save(chunk)
+            except _ROW_ERRORS as e:
+                if len(chunk) == 1:
+                    logger.error(f"풀이 기록 저장 거부 (dead letter 로 보냄): {chunk[0]}, 오류: {e}")
+                    self._reject(chunk, e, "rejected_rows")
+                else:
+                    mid = len(chunk) // 2
+                    pending.append(chunk[mid:])
+                    pending.append(chunk[:mid])
+                continue
+            except Exception as e:
+                rest = [a for c in pending for a in c] + chunk
+                logger.error(f"풀이 기록 {len(rest)}건 저장 실패 (dead letter 로 보냄): {e}")
+                self._reject(rest, e, "failed")
+                break
+            saved.extend(chunk)
+        if not saved:
+            return
+        elapsed = time.monotonic() - start
+        if self.on_flush:
+            try:
+                self.on_flush(saved)
+            except Exception as e:
+                logger.warning(f"on_flush 콜백 실패: {e}")
+        with self._lock:
+            self._stats["flushed"] += len(saved)
+            self._stats["batches"] += 1
+            self._stats["flush_time_total"] += elapsed
+            self._stats["flush_time_max"] = max(self._stats["flush_time_max"], elapsed)
+
+    def _save(self, chunk: List[Dict[str, Any]]):
+        """
+        chunk 를 저장합니다. 행 오류는 바로 올리고, 그 밖의 일시적인 오류는 max_retries 번까지 재시도합니다.
+        DB 장애(연결 오류, 브레이커 open)는 재시도 횟수를 쓰지 않고 복구될 때까지 기다립니다. (close() 되면 포기)
+        """
+        attempt = 0
+        outage_wait = 0.0
+        while True:
+            try:
+                self.db.add_quiz_attempts(chunk)
+                if outage_wait:
+                    logger.info(f"DB 복구, 대기 중이던 풀이 기록 {len(chunk)}건 저장 (대기 {outage_wait:.1f}s)")
+                return
+            except _ROW_ERRORS:
+                raise
+            except Exception as e:
+                if isinstance(e, CircuitOpenError) or is_connection_error(e):
+                    if self._closing.is_set():
+                        raise
+                    # 브레이커가 열려 있으면 다음 probe 시각까지, 아직 안 열렸으면 짧게 기다림
+                    delay = max(e.retry_after, 0.1) if isinstance(e, CircuitOpenError) else 0.5
+                    if not outage_wait:
+                        logger.warning(f"DB 장애로 풀이 기록 저장 대기 (큐 {self._queue.qsize()}건): {e}")
+                    with self._lock:
+                        self._stats["outage_retries"] += 1
+                    outage_wait += delay
+                    self._closing.wait(delay)
+                    continue
+                attempt += 1
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"풀이 기록 배치 저장 실패, 재시도 {attempt}/{self.max_retries}: {e}")
+                time.sleep(0.1 * attempt)
+
+    def _reject(self, attempts: List[Dict[str, Any]], error: Exception, stat: str):
+        with self._lock:
+            self._stats[stat] += len(attempts)
+        if self.dead_letter:
+            self.dead_letter.append(attempts, error)
+
+    # ------------------
+    # 3. 종료 및 통계
+    # ------------------
+    def close(self, timeout: Optional[float] = 10.0):
+        """새 기록을 막고, 큐에 남은 기록을 저장한 뒤 스레드를 종료합니다."""
+        if self._closed:
+            return
+        self._closed = True
+        self._closing.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"풀이 기록 큐를 {timeout}s 안에 비우지 못했습니다. (남은 {self._queue.qsize()}건)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = self._stats["batches"]
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "enqueued": self._stats["enqueued"],
+                "rejected": self._stats["rejected"],
+                "flushed": self._stats["flushed"],
+                "failed": self._stats["failed"],
+                "rejected_rows": self._stats["rejected_rows"],
+                "outage_retries": self._stats["outage_retries"],
+                "dead_letter_path": self.dead_letter.path if self.dead_letter else None,
+                "batches": batches,
+                "flush_latency_avg_ms": round(self._stats["flush_time_total"] / batches * 1000, 3) if batches else 0.0,
+                "flush_latency_max_ms": round(self._stats["flush_time_max"] * 1000, 3),
+            }
+
+
+# 저장하지 못한 풀이 기록을 남길 파일 (모든 워커 공용, flask --app app replay-attempts 로 다시 저장)
+ATTEMPT_DEAD_LETTER_PATH = os.getenv("ATTEMPT_DEAD_LETTER_PATH", "attempt_dead_letter.jsonl")
+
+
+def _read_offset(path: str) -> int:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _write_offset(path: str, offset: int):
+    # 임시 파일에 쓰고 fsync 후 rename 하므로 중간에 죽어도 이전 값이나 새 값 중 하나가 남습니다.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def replay_dead_letters(db, path: str = ATTEMPT_DEAD_LETTER_PATH) -> Dict[str, int]:
+    """
+    dead letter 파일의 기록을 한 건씩 다시 저장합니다.
+    파일을 먼저 옆으로 옮긴 뒤 읽으므로 그동안 워커가 새로 쓰는 기록은 새 파일에 쌓이고,
+    이번에도 저장하지 못한 기록은 새 파일에 다시 남깁니다.
+
+    QuizAttempt 에는 멱등 키가 없으므로, 한 줄을 처리할 때마다 다음 줄의 바이트 위치를 .offset 파일에 남깁니다.
+    중간에 죽어도 다시 실행하면 그 위치부터 이어서 처리하므로 이미 저장했거나 다시 남긴 기록을 또 저장하지 않습니다.
+    (저장 직후 위치를 남기기 전에 죽은 경우의 마지막 한 건만 중복될 수 있음)
+    """
+    replaying = f"{path}.replaying"
+    offset_path = f"{replaying}.offset"
+    if not os.path.exists(replaying):
+        if not os.path.exists(path):
+            return {"saved": 0, "failed": 0}
+        os.replace(path, replaying)
+        _write_offset(offset_path, 0)
+    dead_letter = DeadLetterFile(path)
+    saved = failed = 0
+    with open(replaying, "rb") as f:
+        f.seek(_read_offset(offset_path))
+        for raw in iter(f.readline, b""):
+            line = raw.decode("utf-8").strip()
+            if line:
+                try:
+                    attempt = json.loads(line)["attempt"]
+                except (ValueError, KeyError) as e:
+                    # 쓰는 중에 죽어 잘린 줄 등. 다시 읽어도 같으므로 로그에 원문을 남기고 넘어갑니다.
+                    logger.error(f"dead letter 줄을 읽지 못해 건너뜁니다: {line!r}, 오류: {e}")
+                    attempt = None
+                if attempt is not None:
+                    try:
+                        db.add_quiz_attempts([attempt])
+                        saved += 1
+                    except Exception as e:
+                        dead_letter.append([attempt], e)
+                        failed += 1
+            _write_offset(offset_path, f.tell())
+    os.remove(replaying)
+    os.remove(offset_path)
+    return {"saved": saved, "failed": failed}
+
+
+# 싱글톤 (ATTEMPT_WRITE_BEHIND=1 일 때만 생성)
+attempt_writer = None
+_writer_lock = threading.Lock()
+
+def get_attempt_writer(db, on_flush=None) -> Optional[AttemptWriteBehind]:
+    """write-behind 모드가 켜져 있으면 워커 프로세스당 하나의 AttemptWriteBehind 를 반환합니다."""
+    global attempt_writer
+    if os.getenv("ATTEMPT_WRITE_BEHIND", "0") not in ("1", "true", "True"):
+        return None
+    if attempt_writer is None:
+        with _writer_lock:
+            if attempt_writer is None:
+                attempt_writer = AttemptWriteBehind(
+                    db,
+                    max_queue=int(os.getenv("ATTEMPT_QUEUE_MAX", 10000)),
+                    batch_size=int(os.getenv("ATTEMPT_BATCH_SIZE", 200)),
+                    flush_interval=float(os.getenv("ATTEMPT_FLUSH_INTERVAL", 0.5)),
+                    put_timeout=float(os.getenv("ATTEMPT_PUT_TIMEOUT", 1.0)),
+                    on_flush=on_flush,
+                    dead_letter=DeadLetterFile(ATTEMPT_DEAD_LETTER_PATH),
+                )
+    return attempt_writer
+
+
+def shutdown_attempt_writer():
+    """남은 풀이 기록을 저장하고 writer 를 종료합니다. (atexit 에서 호출)"""
+    if attempt_writer is not None:
+        attempt_writer.close()
@@ -1,8 +1,9 @@
 import logging
 import hashlib
-import random
 from flask import Blueprint, request, jsonify
-from db import get_db_manager
+from db import get_db_manager, CircuitOpenError
+from quiz import db_unavailable_response
+from idgen import new_user_id
 from flask_cors import CORS 
 
 # 블루프린트 생성
@@ -26,7 +27,7 @@ def signup():
     """사용자 회원가입 API (POST /api/auth/signup)"""
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
     
     try:
         data = request.get_json()
@@ -34,17 +35,14 @@ def signup():
         email = data.get('email')
         password = data.get('password')
         
-        # 7자리 랜덤 숫자 문자열 ID 생성
-        new_user_id = str(random.randint(1000000, 9999999))
-        
         if not all([username, email, password]):
             return jsonify({"error": "Missing required fields (username, email, password)"}), 400
         
         # 비밀번호 해싱
         password_hash = hash_password(password)
         
-        # 사용자 생성 및 ID 반환
-        user_id = db_manager.create_user(new_user_id,username, email, password_hash)
+        # 사용자 생성 및 ID 반환 (Snowflake 방식 시간순 ID — 워커마다 다른 노드 번호라 충돌 없음, idgen.py)
+        user_id = db_manager.create_user(new_user_id(), username, email, password_hash)
         
         # 성공 응답
         return jsonify({
@@ -56,6 +54,8 @@ def signup():
     except ValueError as e:
         # 데이터베이스 제약 조건 오류 (예: 이메일 중복)
         return jsonify({"error": str(e)}), 400
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         # 수정된 부분: 예외 정보 로깅 및 디버깅 메시지 포함
         logger.error(f"사용자 회원가입 실패: {e}", exc_info=True) 
@@ -66,7 +66,7 @@ def login():
     """사용자 로그인 API (POST /api/auth/login)"""
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
 
     try:
         data = request.get_json()
@@ -98,6 +98,8 @@ def login():
             # 비밀번호 불일치
             return jsonify({"error": "Invalid email or password"}), 401
 
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         # 수정된 부분: 예외 정보 로깅 및 디버깅 메시지 포함
         logger.error(f"사용자 로그인 실패: {e}", exc_info=True) 
@@ -0,0 +1,76 @@
+# bench_related.py (관련 퀴즈 계산 벤치마크 — 합성 풀이 기록, DB 불필요)
+#
+# 실행: python bench_related.py --attempts 1000000 --users 100000 --quizzes 5000
+#
+# 사용자마다 선호 카테고리를 하나 정하고, 풀이의 80% 는 그 카테고리 안에서 인기(zipf) 순으로,
+# 나머지는 전체에서 무작위로 고릅니다. 같은 카테고리의 퀴즈끼리 이웃으로 나오는지도 확인합니다.
+import time
+import argparse
+import resource
+
+import numpy as np
+
+from recommender import pairs_to_arrays, compute_related, RELATED_TOP_K
+
+
+def synthetic_pairs(n_attempts: int, n_users: int, n_quizzes: int, n_categories: int, seed: int):
+    rng = np.random.default_rng(seed)
+    quiz_category = rng.integers(0, n_categories, n_quizzes)
+    by_category = [np.flatnonzero(quiz_category == c) for c in range(n_categories)]
+    user_category = rng.integers(0, n_categories, n_users)
+
+    users = rng.integers(0, n_users, n_attempts)
+    in_category = rng.random(n_attempts) < 0.8
+    quizzes = rng.integers(0, n_quizzes, n_attempts)
+    for c, members in enumerate(by_category):
+        mask = in_category & (user_category[users] == c)
+        if len(members) and mask.any():
+            rank = np.minimum(rng.zipf(1.3, mask.sum()) - 1, len(members) - 1)
+            quizzes[mask] = members[rank]
+    # DB 에서 읽는 것과 같은 (user_id 문자열, quiz_id) 튜플
+    pairs = [(f"user-{u}", int(q) + 1) for u, q in zip(users.tolist(), quizzes.tolist())]
+    return pairs, quiz_category
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--attempts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--quizzes', type=int, default=5_000)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--k', type=int, default=RELATED_TOP_K)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    pairs, quiz_category = synthetic_pairs(args.attempts, args.users, args.quizzes, args.categories, args.seed)
+    print(f"synthetic: {len(pairs):,} attempts, {args.users:,} users, {args.quizzes:,} quizzes")
+
+    start = time.perf_counter()
+    user_idx, quiz_ids, n_users = pairs_to_arrays(pairs)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = compute_related(user_idx, quiz_ids, n_users, k=args.k)
+    compute_s = time.perf_counter() - start
+
+    lookups = np.random.default_rng(args.seed).choice(store.quiz_ids, 10_000)
+    start = time.perf_counter()
+    for quiz_id in lookups:
+        store.related(int(quiz_id), 10)
+    lookup_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    # 이웃이 같은 카테고리인 비율 (합성 데이터에서 추천이 의미 있는지)
+    rows, cols = np.nonzero(store.neighbors >= 0)
+    same = quiz_category[store.quiz_ids[rows] - 1] == quiz_category[store.neighbors[rows, cols] - 1]
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"pairs → arrays : {load_s * 1000:8.1f} ms")
+    print(f"similarity+topK: {compute_s * 1000:8.1f} ms  ({len(store.quiz_ids):,} quizzes, k={args.k})")
+    print(f"lookup (k=10)  : {lookup_us:8.1f} µs")
+    print(f"store size     : {store.nbytes / 1024:8.1f} KiB")
+    print(f"same-category  : {same.mean() * 100 if len(same) else 0:8.1f} % of {len(same):,} neighbours")
+    print(f"peak RSS       : {peak_mb:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
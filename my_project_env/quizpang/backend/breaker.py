@@ -0,0 +1,167 @@
+# breaker.py (서킷 브레이커 — DB 장애 시 요청마다 연결 타임아웃을 기다리지 않고 바로 실패)
+#
+# closed    : 정상. 연속 실패가 failure_threshold 번 쌓이면 open
+# open      : 모든 호출을 CircuitOpenError 로 즉시 거절. retry_at 이 지나면 다음 호출 하나가 probe 실행
+# half_open : probe 실행 중. 다른 호출은 계속 거절하고, probe 가 성공하면 closed, 실패하면 다시 open
+#
+# open 유지 시간은 trip 할 때마다 두 배 (max_delay 상한) 로 늘리고 jitter 를 섞어,
+# 여러 워커가 같은 순간에 probe 를 보내지 않게 합니다.
+import time
+import random
+import logging
+import threading
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있어 호출을 보내지 않았을 때 발생합니다. retry_after 초 뒤에 다시 시도할 수 있습니다."""
+
+    def __init__(self, name: str, retry_after: float, last_error: Optional[str] = None):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} circuit is open (retry in {retry_after:.1f}s, last error: {last_error})")
+
+
+class CircuitBreaker:
+    """
+    스레드 안전한 서킷 브레이커 (프로세스 단위).
+
+    - check(probe): 호출 전에 부릅니다. closed 이면 통과, open 이면 CircuitOpenError.
+      재시도 시각이 지났으면 이 호출이 probe 를 실행하고, 성공해야 통과합니다. (그동안 다른 호출은 거절)
+    - record_success() / record_failure(e): 실제 호출의 결과를 알려줍니다.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 30.0, rng: Optional[random.Random] = None):
+        if failure_threshold < 1 or base_delay <= 0 or max_delay < base_delay:
+            raise ValueError("invalid breaker settings (failure_threshold >= 1, 0 < base_delay <= max_delay)")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0            # closed 상태의 연속 실패 횟수
+        self._trips = 0               # 연속 trip 횟수 (probe 실패 포함, 성공하면 0) — 대기 시간 계산용
+        self._retry_at = 0.0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._last_probe: Optional[Dict[str, Any]] = None
+        self._stats = {"trips": 0, "rejected": 0, "probes": 0, "probe_failures": 0}
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    # ------------------
+    # 1. 상태 확인 / probe
+    # ------------------
+    def check(self, probe: Callable[[], Any]):
+        """closed 이면 바로 반환. open 이면 CircuitOpenError, 재시도 시각이 지났으면 probe 를 실행해 성공해야 통과합니다."""
+        if self._state == CLOSED:
+            return
+        if self._acquire_probe():
+            self._run_probe(probe)
+
+    def _acquire_probe(self) -> bool:
+        """False: closed (그대로 호출). True: 이 호출이 probe 를 맡음. 그 밖에는 CircuitOpenError"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN and now >= self._retry_at:
+                self._state = HALF_OPEN
+                self._stats["probes"] += 1
+                return True
+            self._stats["rejected"] += 1
+            retry_after = max(self._retry_at - now, 0.0)
+            last_error = self._last_error
+        raise CircuitOpenError(self.name, retry_after, last_error)
+
+    def _run_probe(self, probe: Callable[[], Any]):
+        start = time.perf_counter()
+        try:
+            probe()
+        except Exception as e:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self._stats["probe_failures"] += 1
+                self._last_probe = {"ok": False, "latency_ms": round(latency * 1000, 1), "at": time.time()}
+                delay = self._open_locked(e)
+            logger.warning(f"{self.name} probe 실패 ({latency * 1000:.0f}ms), {delay:.1f}s 뒤 다시 시도: {e}")
+            raise CircuitOpenError(self.name, delay, str(e)) from e
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._last_probe = {"ok": True, "latency_ms": round(latency * 1000, 1), "at": time.time()}
+            self._state = CLOSED
+            self._failures = 0
+            self._trips = 0
+            self._opened_at = None
+        logger.info(f"{self.name} 복구됨 (probe {latency * 1000:.0f}ms)")
+
+    # ------------------
+    # 2. 결과 기록
+    # ------------------
+    def record_success(self):
+        # 대부분의 호출은 실패 기록이 없으므로 락 없이 확인만 하고 넘어갑니다.
+        if self._failures:
+            with self._lock:
+                if self._state == CLOSED:
+                    self._failures = 0
+
+    def record_failure(self, error: Exception) -> bool:
+        """실패를 기록합니다. 이번 실패로 브레이커가 열렸으면 True"""
+        with self._lock:
+            self._last_error = str(error)
+            if self._state != CLOSED:
+                return False
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return False
+            failures = self._failures
+            delay = self._open_locked(error)
+        logger.error(f"{self.name} 연속 {failures}회 실패, {delay:.1f}s 동안 요청을 바로 거절합니다: {error}")
+        return True
+
+    def _open_locked(self, error: Exception) -> float:
+        # 대기 시간: base * 2^(trip-1) (상한 max_delay) 의 절반 + 0~절반 무작위 (equal jitter)
+        self._trips += 1
+        ceiling = min(self.base_delay * 2 ** (self._trips - 1), self.max_delay)
+        delay = ceiling / 2 + self._rng.uniform(0, ceiling / 2)
+        now = time.monotonic()
+        if self._state == CLOSED:
+            self._stats["trips"] += 1
+            self._opened_at = now
+        self._state = OPEN
+        self._retry_at = now + delay
+        self._last_error = str(error)
+        return delay
+
+    # ------------------
+    # 3. 상태
+    # ------------------
+    def retry_after(self) -> float:
+        """다음 probe 까지 남은 시간(초). closed 이면 0"""
+        if self._state == CLOSED:
+            return 0.0
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "open_for_s": round(now - self._opened_at, 1) if self._opened_at is not None else None,
+                "retry_in_s": round(max(self._retry_at - now, 0.0), 1) if self._state == OPEN else None,
+                "last_error": self._last_error,
+                "last_probe": self._last_probe,
+                **self._stats,
+            }
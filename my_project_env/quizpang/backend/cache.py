@@ -0,0 +1,208 @@
+# cache.py (프로세스 로컬 응답 캐시)
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any, Tuple, Hashable, Awaitable
+
+# 이름 -> 캐시 인스턴스 (/health 에서 통계를 한 번에 보여주기 위함)
+_registry: Dict[str, Any] = {}
+
+
+class ResponseCache:
+    """
+    직렬화가 끝난 응답 바디(bytes, 또는 바디와 부가 헤더 값의 튜플)를 보관하는 프로세스 로컬 캐시.
+
+    - invalidate() 가 호출될 때마다 version 이 1씩 증가하고 모든 항목이 비워집니다.
+    - ETag 는 "<프로세스 토큰>-<version>" 형태의 strong ETag 입니다.
+      (gunicorn 워커마다 version 이 따로 증가하므로, 다른 워커의 ETag 와 섞이지 않도록
+       프로세스별 토큰을 붙입니다.)
+    - ttl 초가 지나면 무효화 누락에 대비해 항목을 다시 만듭니다.
+    """
+
+    def __init__(self, name: str, ttl: float = 30.0):
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._token = os.urandom(4).hex()
+        self._version = 0
+        self._entries: Dict[Hashable, Tuple[str, Any, float]] = {}   # key -> (etag, value, 만료 시각)
+        self._hits = 0
+        self._misses = 0
+        _registry[name] = self
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _etag(self, version: int) -> str:
+        return f"{self._token}-{version}"
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, Any]]:
+        """캐시된 (etag, value) 를 반환합니다. 없거나 만료되었으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] > time.monotonic():
+                self._hits += 1
+                return entry[0], entry[1]
+            self._misses += 1
+            return None
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Tuple[str, Any]:
+        """
+        캐시에 있으면 그대로, 없으면 build() 로 값을 만들어 저장한 뒤 반환합니다.
+        build() 도중에 invalidate() 가 일어났다면 오래된 결과이므로 저장하지 않습니다.
+        """
+        cached = self.get(key)
+        if cached:
+            return cached
+        version = self._version
+        return self._store(key, version, build())
+
+    async def get_or_build_async(self, key: Hashable, build: Callable[[], Awaitable[Any]]) -> Tuple[str, Any]:
+        """get_or_build 의 비동기 버전. build 는 코루틴 함수입니다. (ASGI 라우트용)"""
+        cached = self.get(key)
+        if cached:
+            return cached
+        version = self._version
+        return self._store(key, version, await build())
+
+    def _store(self, key: Hashable, version: int, value: Any) -> Tuple[str, Any]:
+        etag = self._etag(version)
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (etag, value, time.monotonic() + self.ttl)
+        return etag, value
+
+    def invalidate(self):
+        """데이터가 바뀌었을 때 호출합니다. version 을 올리고 모든 항목을 비웁니다."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+                "ttl": self.ttl,
+            }
+
+
+class ByteLRUCache:
+    """
+    키별로 인코딩된 JSON 바디(bytes, 또는 압축 변형을 함께 가진 compression.EncodedBody)를 보관하는 LRU 캐시.
+    항목 수가 아니라 바이트 합계(len)로 제한합니다.
+
+    - 키마다 콘텐츠 version 을 따로 관리하고, invalidate(key) 는 그 키의 version 만 올립니다.
+      (예: 한 퀴즈의 문항 평점이 바뀌면 그 퀴즈만 다시 만듦)
+    - ETag 는 "<프로세스 토큰>-<key 해시>-<version>" 입니다. key 는 경로의 사용자 id 나 튜플일 수 있어
+      ETag 에 쓸 수 없는 문자(", 공백, 쉼표 등)가 들어가므로 repr(key) 의 짧은 해시만 씁니다.
+    - max_bytes 를 넘으면 가장 오래 사용되지 않은 항목부터 버립니다.
+    - ttl 을 주면 그 시간이 지난 항목은 다시 만듭니다. (다른 워커에서 일어난 변경을 놓치지 않도록)
+    """
+
+    def __init__(self, name: str, max_bytes: int = 32 * 1024 * 1024, ttl: Optional[float] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self._token = os.urandom(4).hex()
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._versions: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        _registry[name] = self
+
+    def _etag(self, key: Hashable, version: int) -> str:
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).hexdigest()
+        return f"{self._token}-{digest}-{version}"
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Optional[bytes]]) -> Optional[Tuple[str, bytes]]:
+        """
+        캐시된 (etag, body) 를 반환하고, 없으면 build() 결과를 저장 후 반환합니다.
+        build() 가 None 을 반환하면 (예: 존재하지 않는 퀴즈) 저장하지 않고 None 을 반환합니다.
+        """
+        entry, version = self._lookup(key)
+        if entry:
+            return entry
+        return self._store(key, version, build())
+
+    async def get_or_build_async(self, key: Hashable,
+                                 build: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[Tuple[str, bytes]]:
+        """get_or_build 의 비동기 버전. build 는 코루틴 함수입니다. (ASGI 라우트용)"""
+        entry, version = self._lookup(key)
+        if entry:
+            return entry
+        return self._store(key, version, await build())
+
+    def _lookup(self, key: Hashable) -> Tuple[Optional[Tuple[str, bytes]], int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self.ttl is not None and self._expires.get(key, 0) <= time.monotonic():
+                self._drop_locked(key)
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry, 0
+            self._misses += 1
+            return None, self._versions.get(key, 0)
+
+    def _store(self, key: Hashable, version: int, body: Optional[bytes]) -> Optional[Tuple[str, bytes]]:
+        if body is None:
+            return None
+        etag = self._etag(key, version)
+        size = len(body)
+        with self._lock:
+            # build 중에 무효화되었거나 한도보다 큰 항목은 저장하지 않음
+            if self._versions.get(key, 0) == version and size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (etag, body)
+                if self.ttl is not None:
+                    self._expires[key] = time.monotonic() + self.ttl
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    old_key, (_, old) = self._entries.popitem(last=False)
+                    self._expires.pop(old_key, None)
+                    self._bytes -= len(old)
+                    self._evictions += 1
+        return etag, body
+
+    def _drop_locked(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        self._expires.pop(key, None)
+        if entry:
+            self._bytes -= len(entry[1])
+
+    def invalidate(self, key: Hashable):
+        """해당 키의 version 을 올리고 캐시된 바디를 버립니다."""
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._drop_locked(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+            }
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """등록된 모든 캐시의 통계를 반환합니다."""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,203 @@
+# check_replicas.py (읽기 복제본 라우팅 점검 — 프로세스 안의 가짜 MariaDB 호스트, DB 불필요)
+#
+# 실행: python check_replicas.py
+#
+# pymysql.connect 를 호스트별 가짜 서버로 바꿔 DBManager 의 읽기 라우팅을 확인합니다.
+# round-robin, primary 전용 쿼리, read-your-writes(키 / 워커 간 쿠키·헤더), 장애·지연 복제본 제외와 복귀,
+# 모든 복제본 장애 시 primary 폴백. 하나라도 틀리면 종료 코드 1.
+import os
+import sys
+import time
+
+os.environ.setdefault("DB_REPLICAS", "replica-1,replica-2:3307")
+os.environ.setdefault("DB_HOST", "primary")
+
+import pymysql
+from flask import Flask, jsonify
+
+import db as db_module
+import replicas
+
+
+class StandInServer:
+    """호스트별 상태(장애, 복제 지연)를 가진 가짜 서버 모음. 읽기 쿼리는 {"host": 이름} 한 행을 돌려줍니다."""
+
+    def __init__(self):
+        self.down = set()
+        self.lag = {}          # host → Seconds_Behind_Master (None 이면 복제 멈춤, 없으면 복제 설정 없음)
+
+    def connect(self, **kwargs):
+        if kwargs["host"] in self.down:
+            raise pymysql.err.OperationalError(2003, f"Can't connect to MySQL server on '{kwargs['host']}'")
+        return _Connection(self, kwargs["host"])
+
+
+class _Connection:
+    def __init__(self, server: StandInServer, host: str):
+        self.server = server
+        self.host = host
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        return _Cursor(self)
+
+    def ping(self, reconnect=False):
+        if self.host in self.server.down:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.open = False
+
+
+class _Cursor:
+    def __init__(self, conn: _Connection):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        server, host = self.conn.server, self.conn.host
+        if host in server.down:
+            self.conn.open = False
+            raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        if sql.startswith("SHOW SLAVE STATUS"):
+            self.rows = [{"Seconds_Behind_Master": server.lag[host]}] if host in server.lag else []
+        else:
+            self.rows = [{"host": host}]
+        return len(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+# ------------------
+# 점검 항목
+# ------------------
+def read(db, **kwargs) -> str:
+    return db.execute_query("SELECT 1", fetchone=True, replica=True, **kwargs)["host"]
+
+
+def reset_lag_checks(db):
+    for replica in db.replicas.replicas:
+        replica.next_lag_check = 0.0
+
+
+def run_checks(server: StandInServer, db) -> list:
+    results = []
+
+    def check(name, actual, expected):
+        results.append((name, actual == expected, actual, expected))
+
+    check("round-robin", [read(db) for _ in range(4)], ["replica-1", "replica-2"] * 2)
+    check("replica=False 는 primary", db.execute_query("SELECT 1", fetchone=True)["host"], "primary")
+
+    db.mark_write("user:u1")
+    check("같은 워커: 쓰기한 키는 primary", read(db, affinity="user:u1"), "primary")
+    check("같은 워커: 다른 키는 복제본", read(db, affinity="user:u2").startswith("replica"), True)
+
+    # 다른 워커에서 쓰기한 클라이언트 (요청에 마지막 쓰기 시각이 실려 옴)
+    token = replicas.set_client_last_write(time.time() - 1.0)
+    try:
+        check("다른 워커: 최근 쓰기 클라이언트는 primary", read(db, affinity="user:u3"), "primary")
+    finally:
+        replicas.reset_client_last_write(token)
+    token = replicas.set_client_last_write(time.time() - replicas.READ_YOUR_WRITES_SECONDS - 1.0)
+    try:
+        check("다른 워커: 창이 지난 쓰기는 복제본", read(db, affinity="user:u3").startswith("replica"), True)
+    finally:
+        replicas.reset_client_last_write(token)
+
+    server.down.add("replica-1")
+    check("장애 복제본 제외 + primary 폴백", sorted(set(read(db) for _ in range(4))), ["primary", "replica-2"])
+    r1 = db.replicas.replicas[0]
+    check("장애 복제본 ejected", r1.ejected_until > time.monotonic(), True)
+    check("제외 중에는 나머지 복제본만", [read(db) for _ in range(3)], ["replica-2"] * 3)
+
+    server.down.clear()
+    r1.ejected_until = 0.0
+    check("제외 시간이 지나면 복귀", sorted(set(read(db) for _ in range(4))), ["replica-1", "replica-2"])
+    check("성공하면 연속 실패 초기화", r1.failures, 0)
+
+    server.lag["replica-2"] = replicas.REPLICA_MAX_LAG + 10
+    reset_lag_checks(db)
+    check("지연 초과 복제본 제외", "replica-2" in [read(db) for _ in range(4)], False)
+    server.lag.clear()
+    db.replicas.replicas[1].ejected_until = 0.0
+
+    server.lag["replica-1"] = None
+    reset_lag_checks(db)
+    check("복제가 멈춘 복제본 제외", "replica-1" in [read(db) for _ in range(4)], False)
+    server.lag.clear()
+
+    server.down.update({"replica-1", "replica-2"})
+    for replica in db.replicas.replicas:
+        replica.ejected_until = 0.0
+    check("모든 복제본 장애 시 primary", [read(db) for _ in range(3)], ["primary"] * 3)
+    server.down.clear()
+    return results
+
+
+def run_http_checks(db) -> list:
+    """replicas.init_app 훅: 쓰기 응답에 시각을 붙이고, 돌려받은 값으로 읽기를 primary 로 보내는지"""
+    for replica in db.replicas.replicas:
+        replica.ejected_until = 0.0
+    app = Flask(__name__)
+    replicas.init_app(app)
+
+    @app.route("/write", methods=["POST"])
+    def write():
+        return jsonify({"ok": True}), 201
+
+    @app.route("/read")
+    def read_route():
+        return jsonify({"host": read(db)})
+
+    results = []
+    client = app.test_client()
+    resp = client.post("/write")
+    stamp = resp.headers.get(replicas.LAST_WRITE_HEADER)
+    results.append(("쓰기 응답에 X-Last-Write", stamp is not None, stamp, "<ms>"))
+    results.append(("쓰기 응답에 쿠키", replicas.LAST_WRITE_COOKIE in (resp.headers.get("Set-Cookie") or ""),
+                    resp.headers.get("Set-Cookie"), replicas.LAST_WRITE_COOKIE))
+
+    other = app.test_client()      # 쿠키 없는 클라이언트 = 헤더로만 전달 (교차 출처 프론트)
+    host = other.get("/read", headers={replicas.LAST_WRITE_HEADER: stamp}).get_json()["host"]
+    results.append(("헤더로 돌려보내면 primary", host, host, "primary"))
+    host = client.get("/read").get_json()["host"]
+    results.append(("쿠키로 돌려보내면 primary", host, host, "primary"))
+    host = other.get("/read").get_json()["host"]
+    results.append(("표시 없는 요청은 복제본", host.startswith("replica"), host, "replica-*"))
+    host = other.get("/read", headers={replicas.LAST_WRITE_HEADER: "not-a-number"}).get_json()["host"]
+    results.append(("잘못된 값은 무시", host.startswith("replica"), host, "replica-*"))
+    return [(name, ok if isinstance(ok, bool) else ok == expected, actual, expected)
+            for name, ok, actual, expected in results]
+
+
+def main():
+    server = StandInServer()
+    db_module.pymysql.connect = server.connect
+    replicas.REPLICA_EJECT_SECONDS = 0.2
+    db = db_module.DBManager(migrate=False, warm=False)
+
+    results = run_checks(server, db) + run_http_checks(db)
+    for name, ok, actual, expected in results:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}" + ("" if ok else f" (got {actual!r}, expected {expected!r})"))
+    stats = db.replicas.stats()
+    print(f"replica_reads={stats['replica_reads']} primary_reads={stats['primary_reads']} "
+          f"read_your_writes={stats['read_your_writes']} client_read_your_writes={stats['client_read_your_writes']} "
+          f"fallbacks={stats['fallbacks']}")
+    failed = sum(1 for _, ok, _, _ in results if not ok)
+    print(f"{len(results) - failed}/{len(results)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# compression.py (Accept-Encoding 협상 + gzip/brotli 응답 압축)
+import os
+import gzip
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:   # brotli 가 없으면 gzip 만 사용
+    brotli = None
+
+# 이 크기(바이트)보다 작은 응답은 압축하지 않습니다. (헤더/CPU 비용이 더 큼)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+# 서버 선호 순서 (같은 q 값이면 앞쪽)
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0: 같은 바디는 항상 같은 압축 결과 (ETag 와 함께 캐시하기 좋음)
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Accept-Encoding 헤더에서 지원하는 인코딩 중 q 값이 가장 높은 것을 고릅니다.
+    받아들일 수 있는 인코딩이 없으면 None (원본 그대로).
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(mimetype: Optional[str], size: int) -> bool:
+    return size >= COMPRESS_MIN_BYTES and bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+class EncodedBody:
+    """
+    캐시에 보관하는 응답 바디. 원본과 함께 지원하는 모든 인코딩으로 미리 압축한 결과를 가지고 있어
+    캐시 적중 시에는 요청마다 다시 압축하지 않습니다.
+    len() 은 모든 변형의 바이트 합계이므로 ByteLRUCache 의 크기 한도에 그대로 반영됩니다.
+    """
+
+    __slots__ = ('identity', 'variants')
+
+    def __init__(self, body: bytes, mimetype: str = 'application/json'):
+        self.identity = body
+        self.variants: Dict[str, bytes] = {}
+        if is_compressible(mimetype, len(body)):
+            for encoding in SUPPORTED_ENCODINGS:
+                self.variants[encoding] = compress(body, encoding)
+
+    def __len__(self) -> int:
+        return len(self.identity) + sum(len(v) for v in self.variants.values())
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """(Content-Encoding 또는 None, 보낼 바이트)"""
+        encoding = negotiate_encoding(accept_encoding) if self.variants else None
+        if encoding:
+            return encoding, self.variants[encoding]
+        return None, self.identity
+
+
+def compress_response_data(data: bytes, mimetype: Optional[str],
+                           accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+    """캐시되지 않은 응답을 그 자리에서 압축합니다. 압축하지 않으면 (None, data)."""
+    if not is_compressible(mimetype, len(data)):
+        return None, data
+    encoding = negotiate_encoding(accept_encoding)
+    if not encoding:
+        return None, data
+    return encoding, compress(data, encoding)
+
+
+def should_compress(response) -> bool:
+    """이미 인코딩되었거나 스트리밍/부분 응답이면 건드리지 않습니다."""
+    return (
+        response.status_code == 200
+        and 'Content-Encoding' not in response.headers
+        and not getattr(response, 'direct_passthrough', False)
+        and not getattr(response, 'is_streamed', False)
+        and is_compressible(response.mimetype, response.content_length or COMPRESS_MIN_BYTES)
+    )
+
+
+def init_app(app):
+    """Flask 앱에 동적 압축 after_request 훅을 등록합니다. (캐시된 응답은 EncodedBody 로 이미 압축됨)"""
+    from flask import request
+
+    @app.after_request
+    def _compress(response):
+        response.vary.add('Accept-Encoding')
+        if not should_compress(response):
+            return response
+        encoding, data = compress_response_data(
+            response.get_data(), response.mimetype, request.headers.get('Accept-Encoding'))
+        if encoding:
+            response.set_data(data)
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def init_quart_app(app):
+    """asgi_app.py(Quart) 용 동적 압축 훅. 응답 바디를 읽는 API 가 비동기라는 점만 다릅니다."""
+    from quart import request
+
+    @app.after_request
+    async def _compress(response):
+        response.vary.add('Accept-Encoding')
+        if not should_compress(response):
+            return response
+        encoding, data = compress_response_data(
+            await response.get_data(), response.mimetype, request.headers.get('Accept-Encoding'))
+        if encoding:
+            response.set_data(data)
+            response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,59 @@
+# config.py (create_app 설정 프로필)
+#
+# APP_ENV=development (기본) | production
+# 개별 값은 환경 변수로 덮어쓸 수 있고, create_app(config) 에 dict 로 넘겨도 됩니다.
+import os
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value in ("1", "true", "True")
+
+
+class Config:
+    DEBUG = False
+    # True 이면 create_app 안에서 바로 DB 를 연결합니다. False 이면 워커가 뜬 뒤(init_worker) 또는 첫 요청에서 연결
+    DB_EAGER_INIT = False
+    # DB 연결을 만들 때 스키마 마이그레이션(버전 확인)도 할지.
+    # 운영에서는 gunicorn master 가 fork 전에 한 번만 실행하므로 워커는 건너뜁니다. (gunicorn.conf.py)
+    DB_MIGRATE_ON_CONNECT = _env_flag("DB_MIGRATE_ON_CONNECT", True)
+    # 워커 부팅(fork → 첫 요청을 받을 준비) 시간 목표. 넘으면 경고 로그
+    COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", 300))
+
+
+class DevelopmentConfig(Config):
+    """python app.py / flask run: 디버그 모드, 임포트 시 바로 DB 연결 + 마이그레이션"""
+    DEBUG = True
+    DB_EAGER_INIT = True
+
+
+class ProductionConfig(Config):
+    """gunicorn -c gunicorn.conf.py: 디버그 끔, DB 는 워커별로 fork 이후에 연결"""
+    DEBUG = False
+    DB_EAGER_INIT = False
+    DB_MIGRATE_ON_CONNECT = _env_flag("DB_MIGRATE_ON_CONNECT", False)
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
+
+
+def load_config(config=None) -> dict:
+    """프로필 이름 / 설정 클래스 / dict 를 받아 app.config 에 넣을 dict 로 바꿉니다."""
+    if isinstance(config, dict):
+        base = CONFIGS[config.get('APP_ENV') or os.getenv("APP_ENV", "development")]
+        return {**_as_dict(base), **config}
+    if config is None or isinstance(config, str):
+        name = config or os.getenv("APP_ENV", "development")
+        if name not in CONFIGS:
+            raise ValueError(f"Unknown APP_ENV '{name}' (expected one of {', '.join(CONFIGS)})")
+        config = CONFIGS[name]
+    return _as_dict(config)
+
+
+def _as_dict(cls) -> dict:
+    return {key: getattr(cls, key) for key in dir(cls) if key.isupper()}
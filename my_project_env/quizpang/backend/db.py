@@ -5,9 +5,17 @@ import logging
 import json
 from dotenv import load_dotenv
 import pymysql
-from pymysql.cursors import DictCursor
-from datetime import datetime
+from pymysql.cursors import DictCursor, SSCursor, SSDictCursor
+from datetime import datetime, timedelta
+from contextlib import contextmanager
 from typing import Optional, List, Dict, Any, Tuple
+from pool import ConnectionPool, PoolTimeoutError
+from replicas import ReplicaRouter, Replica, ReplicaUnavailable, parse_hosts, is_connection_error
+from breaker import CircuitBreaker, CircuitOpenError
+from migrations import run_migrations
+import metrics
+from slowlog import slow_query_log
+from search_index import get_search_index
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -15,6 +23,577 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 새 연결을 만들 때 기다리는 최대 시간(초). DB 가 응답하지 않을 때 요청 하나가 붙잡히는 시간의 상한
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", 5))
+
+# primary DB 서킷 브레이커 (워커 프로세스 단위). 연결 오류가 DB_BREAKER_FAILURES 번 연속되면 열리고,
+# 열려 있는 동안 요청은 연결을 시도하지 않고 CircuitOpenError(→ 503) 로 바로 실패합니다.
+# DB_BREAKER_BASE_DELAY 초(jitter 포함, 실패할 때마다 두 배, DB_BREAKER_MAX_DELAY 상한) 뒤 probe 한 번으로 복구를 확인
+db_breaker = CircuitBreaker(
+    "db",
+    failure_threshold=int(os.getenv("DB_BREAKER_FAILURES", 3)),
+    base_delay=float(os.getenv("DB_BREAKER_BASE_DELAY", 1)),
+    max_delay=float(os.getenv("DB_BREAKER_MAX_DELAY", 30)),
+)
+
+class InstrumentedCursor(DictCursor):
+    """
+    모든 SQL 실행 시간과 행 수를 metrics 에 기록하는 DictCursor.
+    (executemany 도 내부적으로 execute 를 호출하므로 여기서 한 번에 측정됩니다.)
+    """
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.record_query(query, duration, self.rowcount)
+            if slow_query_log.is_slow(duration):
+                slow_query_log.record(self.connection, query, args, duration, self.rowcount)
+
+
+# MySQL/MariaDB 중복 키 오류 코드 (ER_DUP_ENTRY)
+ER_DUP_ENTRY = 1062
+
+def _duplicate_key_name(e: pymysql.err.IntegrityError) -> Optional[str]:
+    """
+    "Duplicate entry 'x' for key 'email'" (MySQL 8 은 'User.email') 메시지에서 키 이름을 꺼냅니다.
+    중복 키 오류가 아니면 None.
+    """
+    if not e.args or e.args[0] != ER_DUP_ENTRY:
+        return None
+    message = str(e.args[1]) if len(e.args) > 1 else ""
+    marker = "for key '"
+    if marker not in message:
+        return None
+    key = message.rsplit(marker, 1)[1].rstrip("'")
+    return key.rsplit('.', 1)[-1]
+
+
+# ------------------
+# 동기(DBManager) / 비동기(async_db.AsyncDBManager) 계층이 함께 쓰는 SQL 과 순수 도우미
+# ------------------
+SQL_USER_BY_ID = "SELECT id, username, email FROM `User` WHERE id = %s"
+SQL_USER_BY_EMAIL = "SELECT id, username, email, password_hash FROM `User` WHERE email = %s"
+SQL_INSERT_USER = "INSERT INTO `User` (id, username, email, password_hash) VALUES (%s, %s, %s, %s)"
+
+SQL_INSERT_QUIZ = """
+    INSERT INTO `Quiz` (title, category, creator_id, questions_count)
+    VALUES (%s, %s, %s, %s)
+"""
+SQL_INSERT_QUESTION = """
+    INSERT INTO `Question`
+    (quiz_id, type, text, options, correct_answer, explanation)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+SQL_SET_QUESTIONS_COUNT = "UPDATE `Quiz` SET questions_count = %s WHERE quiz_id = %s"
+SQL_AUTHOR_QUIZ_COUNT = """
+    INSERT INTO UserAuthorStats (user_id, quiz_count) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE quiz_count = quiz_count + 1
+"""
+
+SQL_CREATED_QUIZZES = """
+    SELECT
+        q.quiz_id,
+        q.title,
+        -- 문제 수는 Question 개수로 계산
+        COUNT(qq.id) AS questions_count,
+        -- 총 투표 수
+        IFNULL(SUM(qq.votes_count), 0) AS votes_count,
+        -- 가중 평균(투표 수 기준)
+        IFNULL(
+            CASE WHEN SUM(qq.votes_count) > 0
+                THEN SUM(qq.votes_avg * qq.votes_count) / SUM(qq.votes_count)
+                ELSE 0
+            END, 0
+        ) AS votes_avg,
+        q.created_at
+    FROM Quiz q
+    LEFT JOIN Question qq ON qq.quiz_id = q.quiz_id
+    WHERE q.creator_id = %s
+    GROUP BY q.quiz_id, q.title, q.created_at
+    ORDER BY q.created_at DESC
+"""
+SQL_ALL_QUIZZES = """
+    SELECT
+        q.quiz_id,
+        q.title,
+        q.category,
+        q.creator_id,
+        COUNT(qq.id) AS questions_count,
+        IFNULL(SUM(qq.votes_count), 0) AS votes_count,
+        IFNULL(
+            CASE WHEN SUM(qq.votes_count) > 0
+                THEN SUM(qq.votes_avg * qq.votes_count) / SUM(qq.votes_count)
+                ELSE 0
+            END, 0
+        ) AS votes_avg
+    FROM Quiz q
+    LEFT JOIN Question qq ON qq.quiz_id = q.quiz_id
+    GROUP BY q.quiz_id, q.title, q.category, q.creator_id
+    ORDER BY q.quiz_id DESC
+"""
+SQL_QUIZ_BY_ID = ("SELECT quiz_id, title, category, creator_id, votes_avg, votes_count, questions_count "
+                  "FROM Quiz WHERE quiz_id = %s")
+
+
+def quizzes_by_ids_query(n: int) -> str:
+    return ("SELECT quiz_id, title, category, creator_id, votes_avg, votes_count, questions_count "
+            f"FROM Quiz WHERE quiz_id IN ({', '.join(['%s'] * n)})")
+
+
+SQL_QUESTIONS_BY_QUIZ = """
+    SELECT id, quiz_id, type, text, options, correct_answer, explanation, votes_avg, votes_count
+    FROM Question
+    WHERE quiz_id = %s
+"""
+
+# 평점 반영: 행을 FOR UPDATE 로 잠가 현재 평균/개수를 읽고, 새 값을 계산해 그대로 씁니다.
+# SET 절이 다른 컬럼을 참조하지 않으므로 대입 순서(SIMULTANEOUS_ASSIGNMENT sql_mode 등)와 무관합니다.
+# 잠금은 항상 문항 → 퀴즈, 각각 id 순서 (동시 요청 간 교착 방지)
+def lock_questions_query(n: int) -> str:
+    """평점을 반영할 문항 n 개를 잠그고 현재 평균/개수와 소속 퀴즈를 읽는 SELECT"""
+    placeholders = ", ".join(["%s"] * n)
+    return f"""
+        SELECT id, quiz_id, votes_avg, votes_count
+        FROM Question
+        WHERE id IN ({placeholders})
+        ORDER BY id
+        FOR UPDATE
+    """
+
+def lock_quizzes_query(n: int) -> str:
+    """퀴즈 n 개를 잠그고 현재 평균/개수와 출제자를 읽는 SELECT"""
+    placeholders = ", ".join(["%s"] * n)
+    return f"""
+        SELECT quiz_id, votes_avg, votes_count, creator_id
+        FROM Quiz
+        WHERE quiz_id IN ({placeholders})
+        ORDER BY quiz_id
+        FOR UPDATE
+    """
+
+SQL_SET_QUESTION_VOTES = "UPDATE Question SET votes_avg = %s, votes_count = %s WHERE id = %s"
+SQL_SET_QUIZ_VOTES = "UPDATE Quiz SET votes_avg = %s, votes_count = %s WHERE quiz_id = %s"
+
+SQL_AUTHOR_VOTES = """
+    INSERT INTO UserAuthorStats (user_id, question_votes, author_points)
+    SELECT creator_id, %s, %s FROM Quiz WHERE quiz_id = %s
+    ON DUPLICATE KEY UPDATE
+        question_votes = question_votes + VALUES(question_votes),
+        author_points = author_points + VALUES(author_points)
+"""
+
+SQL_INSERT_ATTEMPT = """
+    INSERT INTO QuizAttempt (user_id, quiz_id, score, total_questions, mode, date)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+SQL_SOLVE_STATS = """
+    INSERT INTO UserSolveStats (user_id, attempts, total_correct, total_questions)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        attempts = attempts + VALUES(attempts),
+        total_correct = total_correct + VALUES(total_correct),
+        total_questions = total_questions + VALUES(total_questions)
+"""
+# 기간 랭킹용 일 버킷 (SQL_SOLVE_STATS 와 같은 트랜잭션에서 갱신)
+SQL_SOLVE_BUCKET = """
+    INSERT INTO UserSolveBucket (period, bucket, user_id, attempts, total_correct, total_questions)
+    VALUES ('D', %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        attempts = attempts + VALUES(attempts),
+        total_correct = total_correct + VALUES(total_correct),
+        total_questions = total_questions + VALUES(total_questions)
+"""
+SQL_USER_ATTEMPTS = """
+    SELECT attempt_id, user_id, quiz_id, score, total_questions, mode, date
+    FROM QuizAttempt
+    WHERE user_id = %s
+    ORDER BY date DESC, attempt_id DESC
+"""
+
+# /my/summary: 집계 테이블의 합계 + 최근 풀이 N건 + 내가 만든 퀴즈 M건을 한 번의 왕복으로 읽습니다.
+# 각 부분의 모양이 달라 행마다 (kind, JSON 문자열) 로 맞춥니다. 최근 풀이는 idx_attempt_user_date_cover,
+# 만든 퀴즈는 idx_quiz_creator_created 역순 스캔 + LIMIT 이므로 기록이 수만 건이어도 읽는 행 수가 일정합니다.
+SQL_MY_SUMMARY = """
+    (SELECT 'solve' AS kind,
+            JSON_OBJECT('attempts', attempts, 'total_correct', total_correct,
+                        'total_questions', total_questions) AS data
+     FROM UserSolveStats WHERE user_id = %s)
+    UNION ALL
+    (SELECT 'author',
+            JSON_OBJECT('quiz_count', quiz_count, 'question_votes', question_votes,
+                        'author_points', author_points)
+     FROM UserAuthorStats WHERE user_id = %s)
+    UNION ALL
+    (SELECT 'attempt',
+            JSON_OBJECT('attempt_id', attempt_id, 'user_id', user_id, 'quiz_id', quiz_id, 'score', score,
+                        'total_questions', total_questions, 'mode', mode, 'date', date)
+     FROM QuizAttempt WHERE user_id = %s
+     ORDER BY date DESC, attempt_id DESC LIMIT %s)
+    UNION ALL
+    (SELECT 'created',
+            JSON_OBJECT('quiz_id', quiz_id, 'title', title, 'questions_count', questions_count,
+                        'votes_avg', votes_avg, 'votes_count', votes_count,
+                        'created_at', DATE_FORMAT(created_at, '%%Y-%%m-%%dT%%H:%%i:%%s'))
+     FROM Quiz WHERE creator_id = %s
+     ORDER BY created_at DESC LIMIT %s)
+"""
+
+# 관련 퀴즈 추천용 (user_id, quiz_id) 쌍. idx_attempt_user_date_cover 만 읽음
+SQL_ATTEMPT_PAIRS = "SELECT user_id, quiz_id FROM QuizAttempt"
+SQL_ATTEMPT_WATERMARK = "SELECT MAX(attempt_id) AS watermark FROM QuizAttempt"
+
+# 검색 색인용 문서 (퀴즈 + 문제 본문, quiz_id 순으로 스트리밍)
+SQL_SEARCH_DOCUMENTS = """
+    SELECT q.quiz_id, q.title, q.category, q.creator_id, qq.text
+    FROM `Quiz` q
+    LEFT JOIN `Question` qq ON qq.quiz_id = q.quiz_id
+    WHERE q.quiz_id > %s
+    ORDER BY q.quiz_id
+"""
+# 풀이 랭킹: 맞힌 문제 수 내림차순 (idx_solve_rank 역순 스캔 + LIMIT)
+SQL_SOLVER_RANKING = """
+    SELECT u.id AS userId, u.username,
+           s.attempts,
+           s.total_correct AS solverPoints,
+           s.total_questions,
+           IFNULL(s.total_correct / NULLIF(s.total_questions, 0), 0) AS accuracy
+    FROM UserSolveStats s
+    JOIN User u ON u.id = s.user_id
+    ORDER BY s.total_correct DESC, s.user_id DESC
+    LIMIT %s
+"""
+# 기간 풀이 랭킹: 기간에 속한 일 버킷(bucket >= 시작 일)과 월 버킷(bucket >= 시작 월)만 PK 범위로 읽어
+# 사용자별로 합산합니다. 읽는 행 수 = 기간 내 활동 사용자 수 × 버킷 수 (풀이 기록 총량과 무관)
+SQL_SOLVER_RANKING_WINDOW = """
+    SELECT u.id AS userId, u.username,
+           w.attempts,
+           w.solverPoints,
+           w.total_questions,
+           IFNULL(w.solverPoints / NULLIF(w.total_questions, 0), 0) AS accuracy
+    FROM (
+        SELECT user_id,
+               SUM(attempts) AS attempts,
+               SUM(total_correct) AS solverPoints,
+               SUM(total_questions) AS total_questions
+        FROM UserSolveBucket
+        WHERE (period = 'D' AND bucket >= %s) OR (period = 'M' AND bucket >= %s)
+        GROUP BY user_id
+        ORDER BY solverPoints DESC, user_id DESC
+        LIMIT %s
+    ) w
+    JOIN User u ON u.id = w.user_id
+    ORDER BY w.solverPoints DESC, w.user_id DESC
+"""
+# 일 버킷 압축: cutoff 일 이전의 일 버킷을 월 버킷에 더한 뒤 삭제 (같은 트랜잭션)
+SQL_COMPACT_DAY_BUCKETS = """
+    INSERT INTO UserSolveBucket (period, bucket, user_id, attempts, total_correct, total_questions)
+    SELECT 'M', YEAR(d) * 12 + MONTH(d) - 1, user_id, SUM(attempts), SUM(total_correct), SUM(total_questions)
+    FROM (SELECT DATE_ADD('1970-01-01', INTERVAL bucket DAY) AS d, user_id, attempts, total_correct, total_questions
+          FROM UserSolveBucket WHERE period = 'D' AND bucket < %s) old
+    GROUP BY YEAR(d) * 12 + MONTH(d) - 1, user_id
+    ON DUPLICATE KEY UPDATE
+        attempts = UserSolveBucket.attempts + VALUES(attempts),
+        total_correct = UserSolveBucket.total_correct + VALUES(total_correct),
+        total_questions = UserSolveBucket.total_questions + VALUES(total_questions)
+"""
+SQL_DELETE_DAY_BUCKETS = "DELETE FROM UserSolveBucket WHERE period = 'D' AND bucket < %s"
+# 출제 랭킹: 받은 평점 합계(author_points) 내림차순 (idx_author_rank 역순 스캔 + LIMIT)
+SQL_AUTHOR_RANKING = """
+    SELECT u.id AS userId, u.username,
+           a.quiz_count,
+           a.question_votes,
+           IFNULL(a.author_points / NULLIF(a.question_votes, 0), 0) AS avg_question_rating,
+           a.author_points AS authorPoints
+    FROM UserAuthorStats a
+    JOIN User u ON u.id = a.user_id
+    ORDER BY a.author_points DESC, a.user_id DESC
+    LIMIT %s
+"""
+
+
+# AI 퀴즈 생성 작업 (GenerationJob, quiz_gen.DBJobStore 가 사용)
+SQL_GENERATION_JOB_COLUMNS = "job_id, prompt_key, request, status, result, error, created_at, started_at, finished_at"
+SQL_INSERT_GENERATION_JOB = """
+    INSERT INTO GenerationJob (job_id, prompt_key, request, status, created_at)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+SQL_UPDATE_GENERATION_JOB = """
+    UPDATE GenerationJob SET status = %s, result = %s, error = %s, started_at = %s, finished_at = %s
+    WHERE job_id = %s
+"""
+SQL_GENERATION_JOB_BY_ID = f"SELECT {SQL_GENERATION_JOB_COLUMNS} FROM GenerationJob WHERE job_id = %s"
+# 같은 요청의 가장 최근 작업: result_ttl 안에 끝난 결과, 또는 아직 살아 있는(stale 기준 안의) 대기/진행 작업
+SQL_REUSABLE_GENERATION_JOB = f"""
+    SELECT {SQL_GENERATION_JOB_COLUMNS} FROM GenerationJob
+    WHERE prompt_key = %s
+      AND ((status = 'done' AND finished_at >= %s) OR (status IN ('queued', 'running') AND created_at >= %s))
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+SQL_DELETE_GENERATION_JOBS = "DELETE FROM GenerationJob WHERE created_at < %s LIMIT 1000"
+
+
+def user_conflict_error(e: pymysql.err.IntegrityError, username: str, email: str) -> Optional[ValueError]:
+    """회원가입 INSERT 의 중복 키 오류를 사용자에게 보여줄 ValueError 로 바꿉니다. 해당 없으면 None."""
+    key = _duplicate_key_name(e)
+    if key == 'email':
+        return ValueError(f"Email '{email}' already exists.")
+    if key == 'username':
+        return ValueError(f"Username '{username}' already exists.")
+    return None
+
+
+def question_row(quiz_id: int, q: Dict[str, Any]) -> Tuple:
+    """SQL_INSERT_QUESTION 에 넣을 한 행을 만듭니다."""
+    # ✅ options 처리: 프론트가 문자열로 주면 그대로, 파이썬 list/dict면 dumps
+    opts = q.get('options', None)
+    if opts is None:
+        options_json = None
+    elif isinstance(opts, str):
+        options_json = opts.strip()  # 이미 JSON 문자열
+    else:
+        options_json = json.dumps(opts, ensure_ascii=False)
+    return (
+        quiz_id,
+        q['type'],
+        q['text'],
+        options_json,
+        q['correct_answer'],
+        q.get('explanation', '')
+    )
+
+
+def quizzes_page_query(limit: int, sort: str = 'latest', category: Optional[str] = None,
+                       after: Optional[Tuple] = None) -> Tuple[str, Tuple]:
+    """
+    퀴즈 목록 한 페이지를 keyset(커서) 방식으로 읽는 (SQL, 파라미터) 를 만듭니다.
+    Quiz 테이블에 유지되는 집계 컬럼을 그대로 읽으므로 Question JOIN 없이 인덱스 범위 스캔만 합니다.
+
+    - sort='latest': ORDER BY quiz_id DESC, after = (quiz_id,)
+    - sort='rating': ORDER BY votes_avg DESC, quiz_id DESC, after = (votes_avg, quiz_id)
+    다음 페이지 존재 여부를 알 수 있도록 limit + 1 행까지 읽습니다.
+    """
+    where, params = [], []
+    if category:
+        where.append("category = %s")
+        params.append(category)
+
+    if sort == 'rating':
+        if after:
+            where.append("(votes_avg < %s OR (votes_avg = %s AND quiz_id < %s))")
+            params.extend([after[0], after[0], after[1]])
+        order_by = "votes_avg DESC, quiz_id DESC"
+    else:
+        if after:
+            where.append("quiz_id < %s")
+            params.append(after[0])
+        order_by = "quiz_id DESC"
+
+    sql = f"""
+        SELECT quiz_id, title, category, creator_id, votes_avg, votes_count, questions_count
+        FROM Quiz
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order_by}
+        LIMIT %s
+    """
+    params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def history_page_query(user_id: str, limit: int, after: Optional[Tuple[int, int]] = None,
+                       since: Optional[int] = None) -> Tuple[str, Tuple]:
+    """
+    사용자 풀이 기록 한 페이지를 (date, attempt_id) 내림차순 keyset 으로 읽는 (SQL, 파라미터) 를 만듭니다.
+    idx_attempt_user_date_cover 의 범위 스캔만으로 끝나며, 다음 페이지 확인용으로 limit + 1 행까지 읽습니다.
+
+    - after = (date, attempt_id): 이전 페이지 마지막 행 (그보다 오래된 기록부터)
+    - since = date(ms): 이 시각보다 새로운 기록만 (클라이언트의 마지막 동기화 이후분)
+    """
+    where, params = ["user_id = %s"], [user_id]
+    if since is not None:
+        where.append("date > %s")
+        params.append(since)
+    if after:
+        where.append("(date < %s OR (date = %s AND attempt_id < %s))")
+        params.extend([after[0], after[0], after[1]])
+    sql = f"""
+        SELECT attempt_id, user_id, quiz_id, score, total_questions, mode, date
+        FROM QuizAttempt
+        WHERE {" AND ".join(where)}
+        ORDER BY date DESC, attempt_id DESC
+        LIMIT %s
+    """
+    params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def aggregate_ratings(ratings: List[Tuple[int, int]]) -> Dict[int, List[int]]:
+    """같은 문항에 대한 여러 평점을 {question_id: [합계, 개수]} 로 합칩니다."""
+    per_question: Dict[int, List[int]] = {}
+    for question_id, rating in ratings:
+        acc = per_question.setdefault(int(question_id), [0, 0])
+        acc[0] += rating
+        acc[1] += 1
+    return per_question
+
+
+def vote_updates(rows, key: str, per_key: Dict[int, List[int]]) -> List[Tuple[float, int, int]]:
+    """
+    잠근 행들의 (평균, 개수) 에 per_key 의 [합계, 개수] 를 더한 UPDATE 파라미터 (새 평균, 새 개수, id).
+    새 값은 모두 기존 값만으로 계산합니다.
+    """
+    updates = []
+    for r in rows:
+        total, n = per_key[r[key]]
+        count = r['votes_count'] or 0
+        avg = ((r['votes_avg'] or 0) * count + total) / (count + n)
+        updates.append((avg, count + n, r[key]))
+    return updates
+
+
+def aggregate_quiz_ratings(rows, per_question: Dict[int, List[int]]) -> Dict[int, List[int]]:
+    """(id, quiz_id) 행들로 문항별 [합계, 개수] 를 퀴즈별로 다시 합칩니다."""
+    per_quiz: Dict[int, List[int]] = {}
+    for r in rows:
+        acc = per_quiz.setdefault(r['quiz_id'], [0, 0])
+        acc[0] += per_question[r['id']][0]
+        acc[1] += per_question[r['id']][1]
+    return per_quiz
+
+
+def my_summary_params(user_id: str, recent_limit: int, created_limit: int) -> Tuple:
+    return (user_id, user_id, user_id, recent_limit, user_id, created_limit)
+
+
+def parse_my_summary(rows) -> Dict[str, Any]:
+    """
+    SQL_MY_SUMMARY 결과를 {"solve", "author", "attempts", "created"} 로 나눕니다.
+    UNION ALL 결과의 순서는 보장되지 않으므로 최신순 정렬은 여기서 다시 합니다.
+    """
+    summary: Dict[str, Any] = {"solve": None, "author": None, "attempts": [], "created": []}
+    for r in rows:
+        data = r['data']
+        if isinstance(data, (str, bytes)):
+            data = json.loads(data)
+        kind = r['kind']
+        if kind == 'attempt':
+            summary["attempts"].append(data)
+        elif kind == 'created':
+            if data.get('created_at'):
+                data['created_at'] = datetime.fromisoformat(data['created_at'])
+            summary["created"].append(data)
+        else:
+            summary[kind] = data
+    summary["attempts"].sort(key=lambda a: (a['date'], a['attempt_id']), reverse=True)
+    summary["created"].sort(key=lambda c: (c['created_at'] or datetime.min, c['quiz_id']), reverse=True)
+    return summary
+
+
+def group_search_rows(rows):
+    """
+    SQL_SEARCH_DOCUMENTS 결과(퀴즈당 문제 수만큼의 행)를
+    퀴즈마다 (quiz_id, title, category, creator_id, [문제 본문...]) 하나로 묶습니다.
+    """
+    current, texts = None, []
+    for row in rows:
+        if current is None or row['quiz_id'] != current['quiz_id']:
+            if current is not None:
+                yield current['quiz_id'], current['title'], current['category'], current['creator_id'], texts
+            current, texts = row, []
+        if row['text'] is not None:
+            texts.append(row['text'])
+    if current is not None:
+        yield current['quiz_id'], current['title'], current['category'], current['creator_id'], texts
+
+
+# ------------------
+# 기간 랭킹 버킷
+# ------------------
+# 하루의 경계를 정하는 시간대 (기본 KST)
+RANKING_TZ_OFFSET_HOURS = float(os.getenv("RANKING_TZ_OFFSET_HOURS", 9))
+# 이 일 수보다 오래된 일 버킷은 월 버킷으로 접습니다. month(30일) 창이 일 단위로 정확하도록 31 이상
+RANKING_DAY_BUCKET_RETENTION = max(31, int(os.getenv("RANKING_DAY_BUCKET_RETENTION", 35)))
+RANKING_WINDOWS = ('all', 'day', 'week', 'month', 'year')
+_NO_BUCKET = 2 ** 31 - 1   # 해당 종류의 버킷을 읽지 않을 때의 시작 값
+
+
+def day_bucket(date_ms: int) -> int:
+    """풀이 시각(ms) → 일 버킷 (RANKING_TZ_OFFSET_HOURS 기준 1970-01-01 부터의 일 수)"""
+    return int((date_ms // 1000 + RANKING_TZ_OFFSET_HOURS * 3600) // 86400)
+
+
+def month_bucket(day: int) -> int:
+    """일 버킷 → 월 버킷 (연*12 + 월-1). SQL_COMPACT_DAY_BUCKETS 의 계산과 같아야 합니다."""
+    d = datetime(1970, 1, 1) + timedelta(days=day)
+    return d.year * 12 + d.month - 1
+
+
+def _month_first_day(month: int) -> int:
+    return (datetime(month // 12, month % 12 + 1, 1) - datetime(1970, 1, 1)).days
+
+
+def ranking_window_bounds(window: str, now_ms: Optional[int] = None) -> Tuple[int, int]:
+    """
+    기간 → (일 버킷 시작, 월 버킷 시작). 오늘을 포함합니다.
+      day: 오늘 / week: 최근 7일 / month: 최근 30일 (모두 일 버킷만)
+      year: 이번 달 포함 최근 12개월 (압축된 월 버킷 + 아직 압축되지 않은 일 버킷)
+    한 풀이는 일 버킷 또는 그 달의 월 버킷 중 한 곳에만 있으므로 두 범위를 합쳐도 중복되지 않습니다.
+    """
+    today = day_bucket(int(time.time() * 1000) if now_ms is None else now_ms)
+    if window == 'day':
+        return today, _NO_BUCKET
+    if window == 'week':
+        return today - 6, _NO_BUCKET
+    if window == 'month':
+        return today - 29, _NO_BUCKET
+    if window == 'year':
+        first_month = month_bucket(today) - 11
+        return _month_first_day(first_month), first_month
+    raise ValueError(f"window must be one of {', '.join(RANKING_WINDOWS)}.")
+
+
+def compaction_cutoff(now_ms: Optional[int] = None) -> int:
+    """이 일 버킷보다 이전(미만)의 일 버킷을 월 버킷으로 접습니다."""
+    return day_bucket(int(time.time() * 1000) if now_ms is None else now_ms) - RANKING_DAY_BUCKET_RETENTION
+
+
+def bucket_rows(attempts: List[Dict[str, Any]]) -> List[Tuple]:
+    """풀이 기록들을 (일 버킷, 사용자) 별로 합친 SQL_SOLVE_BUCKET 행 목록 (잠금 순서 고정을 위해 정렬)"""
+    per_bucket: Dict[Tuple[int, str], List[int]] = {}
+    for a in attempts:
+        acc = per_bucket.setdefault((day_bucket(a['date']), a['userId']), [0, 0, 0])
+        acc[0] += 1
+        acc[1] += a['score']
+        acc[2] += a['totalQuestions']
+    return [(day, user_id, *per_bucket[(day, user_id)]) for day, user_id in sorted(per_bucket)]
+
+
+def attempt_rows(attempts: List[Dict[str, Any]]) -> Tuple[List[Tuple], List[Tuple]]:
+    """풀이 기록들을 (SQL_INSERT_ATTEMPT 행 목록, user_id 순으로 정렬된 SQL_SOLVE_STATS 행 목록) 으로 바꿉니다."""
+    # ✅ 여기서 'quiz_id'를 사용 (엔드포인트에서 quizId -> quiz_id 로 변환됨)
+    rows = [(
+        a['userId'],
+        a['quiz_id'],
+        a['score'],
+        a['totalQuestions'],
+        a['mode'],
+        a['date']
+    ) for a in attempts]
+
+    # 사용자별로 합쳐서 집계 테이블 갱신 (user_id 순서로 잠가 교착 방지)
+    per_user: Dict[str, List[int]] = {}
+    for a in attempts:
+        acc = per_user.setdefault(a['userId'], [0, 0, 0])
+        acc[0] += 1
+        acc[1] += a['score']
+        acc[2] += a['totalQuestions']
+    stats_rows = [(user_id, *per_user[user_id]) for user_id in sorted(per_user)]
+    return rows, stats_rows
+
+
 class DBManager:
     """
     MariaDB 연결 풀을 관리하고 쿼리를 실행하는 클래스.
@@ -22,140 +601,190 @@ class DBManager:
     # ------------------
     # 1. 초기화 및 연결
     # ------------------
-    def __init__(self):
+    def __init__(self, migrate: bool = True, warm: bool = True):
         self.DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
         self.DB_USER = os.getenv("DB_USER", "root")
         self.DB_PASSWORD = os.getenv("DB_PASSWORD", "1234")
         self.DB_NAME = os.getenv("DB_NAME", "quizpang")
         self.DB_PORT = int(os.getenv("DB_PORT", 3306))
 
-        # self.conn = None
-        # 데이터베이스 연결 및 테이블 초기화
-        self._initialize_database()
+        # 느린 쿼리 임계값 (ms). 음수이면 비활성화
+        slow_query_log.threshold_ms = float(os.getenv("DB_SLOW_QUERY_MS", 200))
 
-    # def _get_connection(self):
-    #     """데이터베이스 연결을 반환합니다."""
-    #     if self.conn and self.conn.open:
-    #         return self.conn
-        
-    #     try:
-    #         self.conn = pymysql.connect(
-    #             host=self.DB_HOST,
-    #             user=self.DB_USER,
-    #             password=self.DB_PASSWORD,
-    #             database=self.DB_NAME,
-    #             port=self.DB_PORT,
-    #             cursorclass=DictCursor # 딕셔너리 형태로 결과를 반환하도록 설정
-    #         )
-    #         return self.conn
-    #     except pymysql.Error as e:
-    #         logger.error(f"MariaDB 연결 실패: {e}")
-    #         raise
-    def _get_connection(self):
-        """요청/쿼리마다 새 커넥션 생성."""
+        # 커넥션 풀 설정 (gunicorn 워커당 하나의 풀)
+        self.pool = self._new_pool(self._connect, min_size=int(os.getenv("DB_POOL_MIN", 1)))
+
+        # 읽기 복제본 (DB_REPLICAS="host1,host2:3307"). 호스트마다 별도 풀
+        self.replicas = ReplicaRouter([
+            Replica(f"{host}:{port}", self._new_pool(
+                lambda host=host, port=port: self._connect(host, port),
+                min_size=int(os.getenv("DB_REPLICA_POOL_MIN", 0))))
+            for host, port in parse_hosts(os.getenv("DB_REPLICAS", ""), self.DB_PORT)
+        ])
+
+        # 데이터베이스 연결 및 테이블 초기화 (운영 워커는 master 가 미리 마이그레이션하므로 건너뜀)
+        if migrate:
+            self._initialize_database()
+        if warm:
+            try:
+                self.pool.fill()
+            except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+                self._record_failure(e)
+                raise
+
+    @staticmethod
+    def _new_pool(connect, min_size: int) -> ConnectionPool:
+        return ConnectionPool(
+            connect,
+            min_size=min_size,
+            max_size=int(os.getenv("DB_POOL_MAX", 10)),
+            checkout_timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+            ping_interval=float(os.getenv("DB_POOL_PING_INTERVAL", 30)),
+        )
+
+    def _connect(self, host: Optional[str] = None, port: Optional[int] = None):
+        """풀에서 사용할 새 물리 커넥션을 생성합니다. (host/port 를 주면 복제본)"""
+        start = time.perf_counter()
         conn = pymysql.connect(
-            host=self.DB_HOST,
+            host=host or self.DB_HOST,
             user=self.DB_USER,
             password=self.DB_PASSWORD,
             database=self.DB_NAME,
-            port=self.DB_PORT,
-            cursorclass=DictCursor,
-            autocommit=True,              # ✅ 자동 커밋
+            port=port or self.DB_PORT,
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            cursorclass=InstrumentedCursor,   # 실행 시간/행 수를 /metrics 로 기록
+            autocommit=True,              # ✅ 자동 커밋 (트랜잭션은 transaction()에서 명시적으로 시작)
             charset="utf8mb4"
         )
-        # 유휴 연결 재연결 안전장치
-        try:
-            conn.ping(reconnect=True)
-        except Exception:
-            pass
+        metrics.record_connect(time.perf_counter() - start)
         return conn
-    
+
+    @contextmanager
+    def connection(self):
+        """
+        풀에서 커넥션을 빌려주는 컨텍스트 매니저.
+            with db.connection() as conn: ...
+        블록을 벗어나면 커넥션은 닫히지 않고 풀로 반납됩니다.
+        서킷 브레이커가 열려 있으면 연결을 시도하지 않고 CircuitOpenError 를 발생시킵니다.
+        """
+        db_breaker.check(self._probe)
+        try:
+            with self.pool.connection() as conn:
+                yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+            self._record_failure(e)
+            raise
+        db_breaker.record_success()
+
+    def _record_failure(self, e: Exception):
+        """연결 수준 오류만 브레이커 실패로 셉니다. (문법 오류/잠금 대기 등은 DB 장애가 아님)"""
+        if is_connection_error(e) and db_breaker.record_failure(e):
+            # 남은 유휴 연결도 대부분 끊겼을 것이므로 비워 둡니다. (복구 후 죽은 소켓을 다시 쓰지 않도록)
+            self.pool.discard_idle()
+
+    def _probe(self):
+        """브레이커 probe: 풀을 거치지 않고 primary 에 새로 연결해 ping 한 뒤 닫습니다."""
+        conn = self._connect()
+        try:
+            conn.ping(reconnect=False)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def read_connection(self, affinity: Optional[str] = None):
+        """
+        읽기 전용 커넥션. 복제본이 있으면 복제본에서, 없거나 모두 제외됐거나
+        affinity(예: "user:<id>") 에 최근 쓰기가 있으면 primary 에서 빌립니다.
+        복제본 연결/지연 확인이 실패하면 그 복제본을 제외하고 primary 로 넘어갑니다.
+        연결을 넘겨준 뒤의 연결 오류는 ReplicaUnavailable 로 바꿔 올립니다. (execute_query 가 primary 로 재시도)
+        """
+        replica = self.replicas.route(affinity) if self.replicas else None
+        if replica is not None:
+            handed_out = False
+            try:
+                with replica.pool.connection() as conn:
+                    self.replicas.check_lag(replica, conn)
+                    handed_out = True
+                    yield conn
+                self.replicas.report_success(replica)
+                return
+            except ReplicaUnavailable as e:
+                # 지연 확인에서 기준 초과 (아직 연결을 넘겨주기 전)
+                self.replicas.report_failure(replica, e)
+            except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+                if not is_connection_error(e):
+                    raise
+                self.replicas.report_failure(replica, e)
+                if handed_out:
+                    raise ReplicaUnavailable(str(e)) from e
+            except PoolTimeoutError:
+                # 복제본 풀이 바쁜 것뿐이므로 제외하지 않고 이번 읽기만 primary 로
+                if handed_out:
+                    raise
+        with self.connection() as conn:
+            yield conn
+
+    def mark_write(self, *keys: str):
+        """이 키들의 읽기를 잠시 primary 로 보냅니다. (read-your-writes, 예: "user:<id>", "quiz:<id>")"""
+        self.replicas.mark_write(*keys)
+
+    @contextmanager
+    def transaction(self):
+        """
+        하나의 트랜잭션으로 묶인 커넥션을 제공합니다.
+        블록이 정상 종료되면 COMMIT, 예외가 발생하면 ROLLBACK 합니다.
+        """
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except pymysql.Error:
+                    pass
+                raise
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """커넥션 풀 상태(사용 중 연결 수, checkout 대기 시간 등)를 반환합니다. 복제본이 있으면 replicas 에 호스트별 상태"""
+        stats = self.pool.stats()
+        if self.replicas:
+            stats["replicas"] = self.replicas.stats()
+        return stats
+
+    @property
+    def slow_query_threshold_ms(self) -> float:
+        return slow_query_log.threshold_ms
+
+    @slow_query_threshold_ms.setter
+    def slow_query_threshold_ms(self, value: float):
+        slow_query_log.threshold_ms = value
+
+    def slow_queries(self) -> Dict[str, Any]:
+        """최근 느린 쿼리 목록과 EXPLAIN 결과를 반환합니다."""
+        return slow_query_log.snapshot()
+
+    def close(self):
+        """풀의 모든 유휴 커넥션을 닫습니다. (앱 종료 시 호출)"""
+        self.pool.close()
+        self.replicas.close()
+
     # ------------------
-    # 2. 테이블 생성 SQL 및 초기화
+    # 2. 스키마 초기화 (버전별 마이그레이션)
     # ------------------
     def _initialize_database(self):
-        """필요한 테이블들을 생성합니다."""
-        conn = self._get_connection()
+        """
+        스키마를 최신 버전으로 맞춥니다. (테이블/인덱스 정의는 migrations.py)
+        스키마가 이미 최신이면 SchemaVersion 조회 한 번으로 끝나므로 워커 부팅 시 DDL 을 보내지 않습니다.
+        """
         try:
-            with conn.cursor() as cursor:
-                # 1. User 테이블 (auth.py에서 사용)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS User (
-                        id VARCHAR(80) PRIMARY KEY,
-                        username VARCHAR(80) NOT NULL UNIQUE,
-                        email VARCHAR(120) NOT NULL UNIQUE,
-                        password_hash VARCHAR(256) NOT NULL,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-
-                # 2. Quiz 테이블 (votes_avg, votes_count 추가됨)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Quiz (
-                        quiz_id INT AUTO_INCREMENT PRIMARY KEY,
-                        title VARCHAR(100) NOT NULL,
-                        category VARCHAR(50) NOT NULL,
-                        creator_id VARCHAR(80) NOT NULL,
-                        votes_avg FLOAT DEFAULT 0.0,
-                        votes_count INT DEFAULT 0,
-                        questions_count INT DEFAULT 0,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (creator_id) REFERENCES User(id)
-                    );
-                """)
-                
-                # 3. Question 테이블 (type, options, votes_avg, votes_count 추가됨)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Question (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        quiz_id INT NOT NULL,
-                        type VARCHAR(20) NOT NULL, -- 'multiple', 'ox', 'subjective'
-                        text TEXT NOT NULL,
-                        options JSON, -- MariaDB 5.7+ JSON Type 사용
-                        correct_answer VARCHAR(500) NOT NULL,
-                        explanation TEXT,
-                        votes_avg FLOAT DEFAULT 0.0,
-                        votes_count INT DEFAULT 0,
-                        FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
-                    );
-                """)
-
-                # 4. QuizAttempt 테이블 (HistoryPage.tsx 요구사항 반영)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS QuizAttempt (
-                        attempt_id INT AUTO_INCREMENT PRIMARY KEY,
-                        user_id VARCHAR(80) NOT NULL,
-                        quiz_id INT NOT NULL,
-                        score INT NOT NULL,
-                        total_questions INT NOT NULL,
-                        mode VARCHAR(20) NOT NULL, -- 'exam' or 'study'
-                        date BIGINT NOT NULL, -- UNIX TimeStamp (ms)
-                        FOREIGN KEY (user_id) REFERENCES User(id),
-                        FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
-                    );
-                """)
-
-                # 5. UserQuizVote 테이블 (사용자가 퀴즈에 투표했는지 추적)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS UserQuizVote (
-                        user_id VARCHAR(80) NOT NULL,
-                        quiz_id INT NOT NULL,
-                        rating INT NOT NULL,
-                        PRIMARY KEY (user_id, quiz_id),
-                        FOREIGN KEY (user_id) REFERENCES User(id),
-                        FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
-                    );
-                """)
-                
-                conn.commit()
-                logger.info("MariaDB 연결 성공 및 테이블 초기화 완료.")
-
+            version = run_migrations(self)
+            logger.info(f"MariaDB 연결 성공 (스키마 버전 {version}).")
         except pymysql.Error as e:
-            logger.error(f"테이블 생성 오류: {e}")
-            conn.rollback()
+            logger.error(f"스키마 마이그레이션 오류: {e}")
             raise
-        finally:
-            conn.close()
         
         # Mock User 데이터 생성 (frontend `creator_id: 'CurrentUser (Mock)'` 대응)
         # self.add_mock_users()
@@ -173,87 +802,95 @@ class DBManager:
             
     def get_user_by_id(self, user_id: str):
         """사용자 ID로 사용자 정보를 조회합니다."""
-        sql = "SELECT id, username, email FROM `User` WHERE id = %s"
-        user = self.execute_query(sql, (user_id,), fetchone=True)
+        user = self.execute_query(SQL_USER_BY_ID, (user_id,), fetchone=True)
         return user
         
     def get_user_by_email(self, email: str):
         """이메일 주소로 사용자 정보를 조회합니다."""
-        sql = "SELECT id, username, email, password_hash FROM `User` WHERE email = %s"
         # execute_query는 DBManager 클래스에 이미 정의되어 있습니다.
         # 이 메서드를 호출하여 쿼리를 실행합니다.
-        user = self.execute_query(sql, (email,), fetchone=True)
+        user = self.execute_query(SQL_USER_BY_EMAIL, (email,), fetchone=True)
         return user
     
     def create_user(self, new_user_id: str, username: str, email: str, password_hash: str) -> str:
-        """새로운 사용자를 생성하고 생성한 문자열 ID를 반환합니다."""
+        """
+        새로운 사용자를 생성하고 생성한 문자열 ID를 반환합니다.
+        중복 확인용 SELECT 없이 INSERT 한 번만 실행하고, 중복은 IntegrityError 의 키 이름으로 판별합니다.
+        """
         try:
-            # 이메일 중복 확인
-            if self.get_user_by_email(email):
-                raise ValueError(f"Email '{email}' already exists.")
-    
-            sql = "INSERT INTO `User` (id, username, email, password_hash) VALUES (%s, %s, %s, %s)"
-            self.execute_non_query(sql, (new_user_id, username, email, password_hash))
-    
+            self.execute_non_query(SQL_INSERT_USER, (new_user_id, username, email, password_hash))
+            self.mark_write(f"user:{new_user_id}")
             return new_user_id
         except pymysql.err.IntegrityError as e:
-            if "for key 'email'" in str(e):
-                raise ValueError(f"Email '{email}' already exists.")
+            conflict = user_conflict_error(e, username, email)
+            if conflict:
+                raise conflict
             raise
 
 
-
-        
     # ------------------
     # 4. 퀴즈 관련 신규 메서드
     # ------------------
     
+    # 문제 INSERT 를 몇 행씩 묶어 보낼지 (executemany → 다중 행 INSERT)
+    QUESTION_INSERT_CHUNK = int(os.getenv("QUESTION_INSERT_CHUNK", 500))
+
+    def _insert_questions(self, cursor, quiz_id: int, questions) -> int:
+        """
+        문제들을 QUESTION_INSERT_CHUNK 개씩 다중 행 INSERT 로 저장하고 저장한 개수를 반환합니다.
+        questions 는 리스트뿐 아니라 제너레이터(스트리밍 import)도 받을 수 있습니다.
+        """
+        inserted = 0
+        chunk = []
+        for q in questions:
+            chunk.append(question_row(quiz_id, q))
+            if len(chunk) >= self.QUESTION_INSERT_CHUNK:
+                inserted += cursor.executemany(SQL_INSERT_QUESTION, chunk)
+                chunk = []
+        if chunk:
+            inserted += cursor.executemany(SQL_INSERT_QUESTION, chunk)
+        return inserted
+
     def add_quiz_and_questions(self, quiz_data):
-        conn = self._get_connection()
+        """
+        퀴즈와 문제들을 한 트랜잭션으로 저장하고 quiz_id 를 반환합니다.
+        quiz_data['questions'] 가 제너레이터이면 문제 수를 저장 후에 기록합니다.
+        """
+        questions = quiz_data['questions']
+        count_known = isinstance(questions, (list, tuple))
+        # 검색 색인에 넣을 문제 본문 (제너레이터도 한 번만 읽도록 저장하면서 모음)
+        texts = []
+
+        def collect(items):
+            for q in items:
+                texts.append(q['text'])
+                yield q
+
         try:
-            with conn.cursor() as cursor:
-                quiz_sql = """
-                    INSERT INTO `Quiz` (title, category, creator_id, questions_count)
-                    VALUES (%s, %s, %s, %s)
-                """
+            with self.transaction() as conn, conn.cursor() as cursor:
                 cursor.execute(
-                    quiz_sql,
-                    (quiz_data['title'], quiz_data['category'], quiz_data['creator_id'], len(quiz_data['questions']))
+                    SQL_INSERT_QUIZ,
+                    (quiz_data['title'], quiz_data['category'], quiz_data['creator_id'],
+                     len(questions) if count_known else 0)
                 )
                 quiz_id = cursor.lastrowid
 
-                # ✅ options 처리: 프론트가 문자열로 주면 그대로, 파이썬 list/dict면 dumps
-                question_sql = """
-                    INSERT INTO `Question`
-                    (quiz_id, type, text, options, correct_answer, explanation)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                for q in quiz_data['questions']:
-                    opts = q.get('options', None)
-                    if opts is None:
-                        options_json = None
-                    elif isinstance(opts, str):
-                        options_json = opts.strip()  # 이미 JSON 문자열
-                    else:
-                        options_json = json.dumps(opts, ensure_ascii=False)
-
-                    cursor.execute(
-                        question_sql,
-                        (
-                            quiz_id,
-                            q['type'],
-                            q['text'],
-                            options_json,
-                            q['correct_answer'],
-                            q.get('explanation', '')
-                        )
-                    )
+                inserted = self._insert_questions(cursor, quiz_id, collect(questions))
+                if not count_known:
+                    if inserted == 0:
+                        raise ValueError(f"Quiz '{quiz_data['title']}' has no questions.")
+                    cursor.execute(SQL_SET_QUESTIONS_COUNT, (inserted, quiz_id))
 
-                conn.commit()
-                return quiz_id
+                # 출제 랭킹 집계 (같은 트랜잭션)
+                cursor.execute(SQL_AUTHOR_QUIZ_COUNT, (quiz_data['creator_id'],))
+
+            self.mark_write(f"quiz:{quiz_id}", f"user:{quiz_data['creator_id']}")
+            # 커밋 후 이 워커의 검색 색인에 바로 반영
+            get_search_index().add_quiz(
+                quiz_id, quiz_data['title'], quiz_data['category'], quiz_data['creator_id'], texts)
+            return quiz_id
         except pymysql.Error as e:
             logger.error(f"퀴즈 및 문제 저장 트랜잭션 실패: {e}")
-            conn.rollback()
             raise
     # db_manager.py (또는 db.py)에 추가)
 
@@ -284,133 +921,138 @@ class DBManager:
 
  
     def get_created_quizzes_by_user(self, user_id: str):
-        sql = """
-            SELECT
-                q.quiz_id,
-                q.title,
-                -- 문제 수는 Question 개수로 계산
-                COUNT(qq.id) AS questions_count,
-                -- 총 투표 수
-                IFNULL(SUM(qq.votes_count), 0) AS votes_count,
-                -- 가중 평균(투표 수 기준)
-                IFNULL(
-                    CASE WHEN SUM(qq.votes_count) > 0
-                        THEN SUM(qq.votes_avg * qq.votes_count) / SUM(qq.votes_count)
-                        ELSE 0
-                    END, 0
-                ) AS votes_avg,
-                q.created_at
-            FROM Quiz q
-            LEFT JOIN Question qq ON qq.quiz_id = q.quiz_id
-            WHERE q.creator_id = %s
-            GROUP BY q.quiz_id, q.title, q.created_at
-            ORDER BY q.created_at DESC
-        """
-        return self.execute_query(sql, (user_id,))
+        return self.execute_query(SQL_CREATED_QUIZZES, (user_id,), replica=True, affinity=f"user:{user_id}")
 
 
             
 
     def get_all_quizzes(self):
-        sql = """
-        SELECT
-            q.quiz_id,
-            q.title,
-            q.category,
-            q.creator_id,
-            COUNT(qq.id) AS questions_count,
-            IFNULL(SUM(qq.votes_count), 0) AS votes_count,
-            IFNULL(
-                CASE WHEN SUM(qq.votes_count) > 0
-                    THEN SUM(qq.votes_avg * qq.votes_count) / SUM(qq.votes_count)
-                    ELSE 0
-                END, 0
-            ) AS votes_avg
-        FROM Quiz q
-        LEFT JOIN Question qq ON qq.quiz_id = q.quiz_id
-        GROUP BY q.quiz_id, q.title, q.category, q.creator_id
-        ORDER BY q.quiz_id DESC;
-        """
-        return self.execute_query(sql)
+        return self.execute_query(SQL_ALL_QUIZZES, replica=True)
 
 
 
+    def get_quizzes_page(self, limit: int, sort: str = 'latest', category: Optional[str] = None,
+                         after: Optional[Tuple] = None) -> List[Dict[str, Any]]:
+        """퀴즈 목록을 keyset(커서) 방식으로 한 페이지 조회합니다. (limit + 1 행까지, quizzes_page_query 참고)"""
+        sql, params = quizzes_page_query(limit, sort=sort, category=category, after=after)
+        return self.execute_query(sql, params, replica=True)
+
     def get_quiz_by_id(self, quiz_id):
         """단일 퀴즈 정보를 조회합니다."""
-        sql = "SELECT quiz_id, title, category, creator_id, votes_avg, votes_count, questions_count FROM Quiz WHERE quiz_id = %s"
-        return self.execute_query(sql, (quiz_id,), fetchone=True)
+        return self.execute_query(SQL_QUIZ_BY_ID, (quiz_id,), fetchone=True, replica=True, affinity=f"quiz:{quiz_id}")
         
+    def quiz_exists(self, quiz_id: int) -> bool:
+        """퀴즈가 있는지 primary 에서 확인합니다. (방금 만든 퀴즈도 복제 지연 없이 보이도록)"""
+        return self.execute_query("SELECT 1 FROM `Quiz` WHERE quiz_id = %s", (quiz_id,), fetchone=True) is not None
+
+    def get_quizzes_by_ids(self, quiz_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """여러 퀴즈 정보를 한 번에 조회합니다. {quiz_id: row}"""
+        if not quiz_ids:
+            return {}
+        rows = self.execute_query(quizzes_by_ids_query(len(quiz_ids)), tuple(quiz_ids), replica=True)
+        return {r['quiz_id']: r for r in rows}
+
     def get_questions_by_quiz_id(self, quiz_id):
         """특정 퀴즈의 문제들을 조회합니다. (QuizGamePage.tsx 연동)"""
-        sql = """
-            SELECT id, quiz_id, type, text, options, correct_answer, explanation, votes_avg, votes_count 
-            FROM Question 
-            WHERE quiz_id = %s
-        """
-        questions = self.execute_query(sql, (quiz_id,))
+        questions = self.execute_query(SQL_QUESTIONS_BY_QUIZ, (quiz_id,), replica=True, affinity=f"quiz:{quiz_id}")
         # options가 JSON 타입인 경우, pymysql이 딕셔너리로 변환하므로 그대로 사용
         # TEXT 타입에 JSON 문자열이 저장되었다면 json.loads 처리가 필요할 수 있음
         return questions
 
+    def iter_search_documents(self, after_quiz_id: int = 0):
+        """
+        검색 색인 재구성용. quiz_id 가 after_quiz_id 보다 큰 퀴즈를 문제 본문과 함께 하나씩 돌려줍니다.
+        전체 퀴즈를 메모리에 올리지 않도록 서버 측 커서(SSDictCursor)로 읽습니다.
+        """
+        with self.read_connection() as conn, conn.cursor(SSDictCursor) as cursor:
+            cursor.execute(SQL_SEARCH_DOCUMENTS, (after_quiz_id,))
+            yield from group_search_rows(cursor)
+
 
-    
     
     def update_question_rating(self, question_id: int, rating: int):
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT votes_avg, votes_count FROM Question WHERE id=%s",
-                    (question_id,)
-                )
-                row = cursor.fetchone()
-                if not row:
-                    raise ValueError("Question not found")
+        """문항 하나에 평점을 반영하고 새 평균을 반환합니다. (rate_questions 의 단건 버전)"""
+        new_avgs, _, _ = self.rate_questions([(question_id, rating)])
+        return new_avgs[question_id]
 
-                new_count = (row["votes_count"] or 0) + 1
-                new_avg = ((row["votes_avg"] or 0) * (row["votes_count"] or 0) + rating) / new_count
+    def rate_questions(self, ratings: List[Tuple[int, int]]) -> Tuple[Dict[int, float], List[int], List[str]]:
+        """
+        여러 문항의 평점을 한 트랜잭션으로 반영합니다.
 
-                cursor.execute(
-                    "UPDATE Question SET votes_avg=%s, votes_count=%s WHERE id=%s",
-                    (new_avg, new_count, question_id)
-                )
-            conn.commit()
-            return new_avg
-        finally:
-            conn.close()
+        - 문항/퀴즈 행을 FOR UPDATE 로 잠근 뒤 기존 평균/개수로 새 값을 계산해 쓰므로 동시 투표에도 유실이 없습니다.
+        - 퀴즈 평균/개수와 출제자 랭킹 집계도 전체 재계산 없이 증분으로 같은 트랜잭션에서 갱신합니다.
+        - 존재하지 않는 문항이 하나라도 있으면 ValueError 를 발생시키고 전체를 롤백합니다.
+
+        반환값: ({question_id: 새 평균}, [영향받은 quiz_id 목록], [영향받은 출제자 user_id 목록])
+        """
+        # 같은 문항에 대한 여러 평점은 (합계, 개수) 로 합쳐서 한 번에 반영
+        per_question = aggregate_ratings(ratings)
+        # 여러 요청이 같은 행들을 잠글 때 교착을 피하도록 항상 id 순서로 갱신
+        question_ids = sorted(per_question)
+
+        with self.transaction() as conn, conn.cursor() as cursor:
+            cursor.execute(lock_questions_query(len(question_ids)), tuple(question_ids))
+            rows = cursor.fetchall()
+            missing = set(question_ids) - {r['id'] for r in rows}
+            if missing:
+                raise ValueError(f"Question {min(missing)} not found")
+            updates = vote_updates(rows, 'id', per_question)
+            cursor.executemany(SQL_SET_QUESTION_VOTES, updates)
+            new_avgs = {question_id: avg for avg, _, question_id in updates}
+
+            per_quiz = aggregate_quiz_ratings(rows, per_question)
+            quiz_ids = sorted(per_quiz)
+            cursor.execute(lock_quizzes_query(len(quiz_ids)), tuple(quiz_ids))
+            quiz_rows = cursor.fetchall()
+            cursor.executemany(SQL_SET_QUIZ_VOTES, vote_updates(quiz_rows, 'quiz_id', per_quiz))
+
+            # 출제자의 랭킹 집계 (같은 트랜잭션)
+            cursor.executemany(SQL_AUTHOR_VOTES, [(per_quiz[q][1], per_quiz[q][0], q) for q in quiz_ids])
+
+        creator_ids = sorted({r['creator_id'] for r in quiz_rows})
+        self.mark_write(*(f"quiz:{quiz_id}" for quiz_id in per_quiz), *(f"user:{u}" for u in creator_ids))
+        return new_avgs, sorted(per_quiz), creator_ids
 
 
 
     
     def add_quiz_attempt(self, attempt_data):
         """사용자의 퀴즈 풀이 기록을 저장합니다. (QuizGamePage.tsx 완료 시)"""
-        sql = """
-            INSERT INTO QuizAttempt (user_id, quiz_id, score, total_questions, mode, date)
-            VALUES (%s, %s, %s, %s, %s, %s);
-        """
         # 서버에서 timestamp(ms) 생성
         attempt_data['date'] = int(time.time() * 1000)
+        return self.add_quiz_attempts([attempt_data]) > 0
 
-        # ✅ 여기서 'quiz_id'를 사용 (엔드포인트에서 quizId -> quiz_id 로 변환됨)
-        return self.execute_non_query(sql, (
-            attempt_data['userId'],
-            attempt_data['quiz_id'],     # <-- 핵심 수정
-            attempt_data['score'],
-            attempt_data['totalQuestions'],
-            attempt_data['mode'],
-            attempt_data['date']
-        )) > 0
+    def add_quiz_attempts(self, attempts: List[Dict[str, Any]]) -> int:
+        """
+        여러 풀이 기록을 다중 행 INSERT 한 번으로 저장하고, 풀이 랭킹 집계도 같은 트랜잭션에서 갱신합니다.
+        각 기록은 'date'(ms) 를 이미 가지고 있어야 합니다. (write-behind 큐에서 묶어서 호출)
+        """
+        rows, stats_rows = attempt_rows(attempts)
 
+        with self.transaction() as conn, conn.cursor() as cursor:
+            row_count = cursor.executemany(SQL_INSERT_ATTEMPT, rows)
+            # 풀이 랭킹 집계 (같은 트랜잭션)
+            cursor.executemany(SQL_SOLVE_STATS, stats_rows)
+            cursor.executemany(SQL_SOLVE_BUCKET, bucket_rows(attempts))
+        self.mark_write(*{f"user:{a['userId']}" for a in attempts})
+        return row_count
+
+
+    def get_user_attempts_page(self, user_id: str, limit: int, after: Optional[Tuple[int, int]] = None,
+                               since: Optional[int] = None) -> List[Dict[str, Any]]:
+        """풀이 기록 한 페이지 (최신순, limit + 1 행까지, history_page_query 참고)"""
+        sql, params = history_page_query(user_id, limit, after=after, since=since)
+        return self.execute_query(sql, params, replica=True, affinity=f"user:{user_id}")
+
+    def get_my_summary(self, user_id: str, recent_limit: int, created_limit: int) -> Dict[str, Any]:
+        """HistoryPage 요약: 합계, 최근 풀이 recent_limit 건, 만든 퀴즈 created_limit 건 (한 번의 쿼리)"""
+        rows = self.execute_query(SQL_MY_SUMMARY, my_summary_params(user_id, recent_limit, created_limit),
+                                  replica=True, affinity=f"user:{user_id}")
+        return parse_my_summary(rows)
 
     def get_user_attempts(self, user_id):
         """특정 사용자의 모든 풀이 기록을 최신순으로 조회합니다. (HistoryPage.tsx)"""
-        sql = """
-            SELECT attempt_id, user_id, quiz_id, score, total_questions, mode, date 
-            FROM QuizAttempt 
-            WHERE user_id = %s 
-            ORDER BY date DESC
-        """
-        return self.execute_query(sql, (user_id,))
+        return self.execute_query(SQL_USER_ATTEMPTS, (user_id,), replica=True, affinity=f"user:{user_id}")
         
     # def get_ranking_data(self):
     #     """랭킹 페이지에 필요한 데이터를 조회합니다. (RankingPage.tsx 로직 연동)"""
@@ -466,51 +1108,203 @@ class DBManager:
         return self.execute_query(sql)
 
     
+    # ------------------------------------
+    # 4. 랭킹 집계 테이블 조회/재계산 (UserSolveStats / UserAuthorStats)
+    # ------------------------------------
+    def get_solver_ranking(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """풀이 랭킹: 맞힌 문제 수 내림차순 (idx_solve_rank 역순 스캔 + LIMIT)."""
+        return self.execute_query(SQL_SOLVER_RANKING, (limit,), replica=True)
+
+    def get_solver_ranking_window(self, window: str, limit: int = 100,
+                                  now_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """기간 풀이 랭킹 (day / week / month / year). 기간에 속한 버킷만 합산합니다."""
+        day_from, month_from = ranking_window_bounds(window, now_ms)
+        return self.execute_query(SQL_SOLVER_RANKING_WINDOW, (day_from, month_from, limit), replica=True)
+
+    def compact_ranking_buckets(self, now_ms: Optional[int] = None) -> Dict[str, int]:
+        """
+        RANKING_DAY_BUCKET_RETENTION 일보다 오래된 일 버킷을 월 버킷으로 접습니다.
+        같은 트랜잭션에서 더하고 지우므로 여러 번 실행해도 합계가 바뀌지 않습니다.
+        (flask --app app compact-ranking-buckets, 하루 한 번 cron 권장)
+        """
+        cutoff = compaction_cutoff(now_ms)
+        with self.transaction() as conn, conn.cursor() as cursor:
+            months = cursor.execute(SQL_COMPACT_DAY_BUCKETS, (cutoff,))
+            days = cursor.execute(SQL_DELETE_DAY_BUCKETS, (cutoff,))
+        logger.info(f"랭킹 버킷 압축 완료: 일 버킷 {days}개 → 월 버킷 갱신 {months}행 (cutoff {cutoff})")
+        return {"day_buckets": days, "month_rows": months, "cutoff": cutoff}
+
+    def get_attempt_watermark(self) -> int:
+        """가장 최근 풀이 기록의 attempt_id (관련 퀴즈 재계산이 필요한지 판단용)"""
+        row = self.execute_query(SQL_ATTEMPT_WATERMARK, fetchone=True, replica=True)
+        return (row or {}).get('watermark') or 0
+
+    def iter_attempt_pairs(self):
+        """모든 풀이 기록의 (user_id, quiz_id) 를 서버 측 커서로 하나씩 돌려줍니다. (관련 퀴즈 계산용)"""
+        with self.read_connection() as conn, conn.cursor(SSCursor) as cursor:
+            cursor.execute(SQL_ATTEMPT_PAIRS)
+            yield from cursor
+
+    def get_author_ranking(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """출제 랭킹: 받은 평점 합계(author_points) 내림차순 (idx_author_rank 역순 스캔 + LIMIT)."""
+        return self.execute_query(SQL_AUTHOR_RANKING, (limit,), replica=True)
+
+    def rebuild_leaderboards(self) -> Dict[str, int]:
+        """
+        랭킹 집계 테이블을 원본(QuizAttempt, Quiz, Question)에서 처음부터 다시 계산합니다.
+        집계 테이블 도입 이전 데이터가 있거나 값이 어긋났을 때 사용합니다.
+        (flask --app app rebuild-leaderboards)
+        """
+        with self.transaction() as conn, conn.cursor() as cursor:
+            cursor.execute("DELETE FROM UserSolveStats")
+            solvers = cursor.execute("""
+                INSERT INTO UserSolveStats (user_id, attempts, total_correct, total_questions)
+                SELECT user_id, COUNT(*), SUM(score), SUM(total_questions)
+                FROM QuizAttempt
+                GROUP BY user_id
+            """)
+            cursor.execute("DELETE FROM UserAuthorStats")
+            authors = cursor.execute("""
+                INSERT INTO UserAuthorStats (user_id, quiz_count, question_votes, author_points)
+                SELECT q.creator_id,
+                       COUNT(DISTINCT q.quiz_id),
+                       IFNULL(SUM(qq.votes_count), 0),
+                       IFNULL(SUM(qq.votes_avg * qq.votes_count), 0)
+                FROM Quiz q
+                LEFT JOIN Question qq ON qq.quiz_id = q.quiz_id
+                GROUP BY q.creator_id
+            """)
+            # 기간 랭킹 버킷: 일 버킷으로 다시 채운 뒤 오래된 것은 바로 월 버킷으로 접음
+            cursor.execute("DELETE FROM UserSolveBucket")
+            cursor.execute("""
+                INSERT INTO UserSolveBucket (period, bucket, user_id, attempts, total_correct, total_questions)
+                SELECT 'D', FLOOR((date DIV 1000 + %s) / 86400), user_id, COUNT(*), SUM(score), SUM(total_questions)
+                FROM QuizAttempt
+                GROUP BY FLOOR((date DIV 1000 + %s) / 86400), user_id
+            """, (int(RANKING_TZ_OFFSET_HOURS * 3600),) * 2)
+            cutoff = compaction_cutoff()
+            cursor.execute(SQL_COMPACT_DAY_BUCKETS, (cutoff,))
+            cursor.execute(SQL_DELETE_DAY_BUCKETS, (cutoff,))
+        logger.info(f"랭킹 집계 재계산 완료: solver {solvers}명, author {authors}명")
+        return {"solvers": solvers, "authors": authors}
+
+    # ------------------------------------
+    # 5. AI 퀴즈 생성 작업 (GenerationJob — 워커 간 공유 상태)
+    #    상태가 바로 바뀌므로 복제본이 아닌 primary 에서 읽습니다.
+    # ------------------------------------
+    def insert_generation_job(self, job_id: str, prompt_key: str, req: Dict[str, Any],
+                              status: str, created_at: int):
+        self.execute_non_query(SQL_INSERT_GENERATION_JOB, (
+            job_id, prompt_key, json.dumps(req, ensure_ascii=False), status, created_at))
+
+    def update_generation_job(self, job_id: str, status: str, result: Optional[List[Dict[str, Any]]],
+                              error: Optional[str], started_at: Optional[int], finished_at: Optional[int]):
+        result_json = json.dumps(result, ensure_ascii=False) if result is not None else None
+        self.execute_non_query(SQL_UPDATE_GENERATION_JOB, (
+            status, result_json, error[:500] if error else None, started_at, finished_at, job_id))
+
+    def get_generation_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.execute_query(SQL_GENERATION_JOB_BY_ID, (job_id,), fetchone=True)
+
+    def find_reusable_generation_job(self, prompt_key: str, done_since: int,
+                                     active_since: int) -> Optional[Dict[str, Any]]:
+        """done_since 이후 끝난 결과나 active_since 이후 만든 대기/진행 작업 중 가장 최근 것"""
+        return self.execute_query(SQL_REUSABLE_GENERATION_JOB, (prompt_key, done_since, active_since), fetchone=True)
+
+    def delete_generation_jobs(self, before: int) -> int:
+        """before(ms) 이전에 만든 작업을 지웁니다. (한 번에 최대 1000행)"""
+        return self.execute_non_query(SQL_DELETE_GENERATION_JOBS, (before,))
+
     # ------------------
     # 3. 공통 DB 메서드 (핵심 구현)
     # ------------------
 
-    def execute_query(self, sql: str, params=None, fetchone=False):
-        """SELECT 쿼리를 실행하고 결과를 반환합니다."""
-        conn = self._get_connection()
+    def execute_query(self, sql: str, params=None, fetchone=False, replica: bool = False,
+                      affinity: Optional[str] = None):
+        """
+        SELECT 쿼리를 실행하고 결과를 반환합니다.
+        replica=True 이면 복제본에서 읽습니다. (read_connection 참고, 복제본 오류 시 primary 로 한 번 더)
+        """
         try:
-            with conn.cursor() as cursor:
-                cursor.execute(sql, params)
-                if fetchone:
-                    return cursor.fetchone()
-                return cursor.fetchall()
+            if replica and self.replicas:
+                try:
+                    with self.read_connection(affinity) as conn:
+                        return self._fetch(conn, sql, params, fetchone)
+                except ReplicaUnavailable:
+                    pass
+            with self.connection() as conn:
+                return self._fetch(conn, sql, params, fetchone)
         except pymysql.Error as e:
             logger.error(f"쿼리 실행 실패: {sql}, 오류: {e}")
             raise
 
+    @staticmethod
+    def _fetch(conn, sql: str, params, fetchone: bool):
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            if fetchone:
+                return cursor.fetchone()
+            return cursor.fetchall()
+
     def execute_non_query(self, sql: str, params=None) -> int:
         """INSERT, UPDATE, DELETE 쿼리를 실행하고 영향을 받은 행 수를 반환합니다."""
-        conn = self._get_connection()
         try:
-            with conn.cursor() as cursor:
-                row_count = cursor.execute(sql, params)
-            conn.commit()
-            return row_count
+            with self.connection() as conn, conn.cursor() as cursor:
+                # autocommit 커넥션이므로 단일 문장은 즉시 커밋됩니다.
+                return cursor.execute(sql, params)
         except pymysql.Error as e:
             logger.error(f"Non-Query 실행 실패: {sql}, 오류: {e}")
-            conn.rollback()
             raise
-        finally:
-            conn.close()
 
 
 # 싱글톤 패턴을 위한 전역 변수
 db_manager = None
+# get_db_manager() 가 DBManager 를 만들 때 넘길 옵션 (create_app 이 설정)
+_db_options: Dict[str, Any] = {}
+
+def configure_db_manager(**options):
+    """이후 처음 만들어질 DBManager 의 옵션 (migrate 등) 을 정합니다."""
+    _db_options.update(options)
 
 def get_db_manager():
-    # ... (기존 get_db_manager 함수 유지) ...
-    """DBManager의 싱글톤 인스턴스를 반환합니다."""
+    """
+    DBManager의 싱글톤 인스턴스를 반환합니다.
+    만들지 못했으면 None. 생성 실패가 이어져 브레이커가 열린 동안에는 다시 연결을 시도하지 않고
+    바로 None 을 반환하며, 재시도 시각이 지나면 요청 하나만 생성을 다시 시도합니다. (probe)
+    """
     global db_manager
     if db_manager is None:
         try:
-            db_manager = DBManager()
+            # 열려 있으면 바로 CircuitOpenError. 재시도 시각이 지났으면 새 연결 하나로 먼저 확인 (마이그레이션 전)
+            db_breaker.check(lambda: DBManager(migrate=False, warm=False)._probe())
+            db_manager = DBManager(**_db_options)
+        except CircuitOpenError:
+            return None
         except Exception as e:
             logger.error(f"DBManager 초기화 실패: {e}")
             # 초기화 실패 시 db_manager를 None으로 유지
             db_manager = None 
     return db_manager
+
+def db_available() -> bool:
+    """DB 를 쓸 수 있는 상태인지 (싱글톤이 있고 브레이커가 닫혀 있음). 연결을 시도하지 않습니다."""
+    return db_manager is not None and db_breaker.state == 'closed'
+
+def close_db_manager():
+    """싱글톤이 만들어졌다면 풀의 연결을 닫습니다. (프로세스 종료 시)"""
+    global db_manager
+    if db_manager is not None:
+        db_manager.close()
+        db_manager = None
+        logger.info("Application shutting down: DB connection closed.")
+
+def migrate_database() -> int:
+    """
+    스키마 마이그레이션만 실행하고 연결을 닫습니다.
+    gunicorn master 가 fork 전에 한 번 호출하므로, 워커가 여러 개 재시작되어도 스키마 확인은 배포당 한 번입니다.
+    """
+    db = DBManager(migrate=False, warm=False)
+    try:
+        return run_migrations(db)
+    finally:
+        db.close()
@@ -0,0 +1,174 @@
+# grading.py (서버 채점 — 퀴즈별 정답 키를 한 번 컴파일해 두고 답안지를 한꺼번에 비교)
+import re
+import json
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+
+# 주관식 정답에서 허용 답안을 구분하는 문자 (예: "서울|서울특별시"). CSV 보기 구분자와 같음
+ALTERNATIVE_SEPARATOR = '|'
+
+_WHITESPACE = re.compile(r"\s+")
+_OX_TRUE = frozenset(['o', 'ㅇ', '○', '⭕', 'true', 't', 'yes', 'y', '1', '참', '맞다', '예'])
+_OX_FALSE = frozenset(['x', '×', '✕', '❌', 'false', 'f', 'no', 'n', '0', '거짓', '틀리다', '아니오'])
+
+
+class AnswerSheetError(ValueError):
+    """답안지 형식이 잘못되었을 때 발생합니다. (400 응답)"""
+
+
+# ------------------
+# 1. 정규화
+# ------------------
+def normalize_text(value) -> str:
+    """
+    주관식 비교용 정규화. NFKC 로 전각/반각을 통일하고(Ａ→A, １→1), 대소문자를 무시하며,
+    공백은 모두 제거합니다. ("서울 특별시" == "서울특별시")
+    """
+    if value is None:
+        return ''
+    return _WHITESPACE.sub('', unicodedata.normalize('NFKC', str(value)).casefold())
+
+
+def parse_ox(value) -> Optional[bool]:
+    """O/X 답안을 bool 로. 알아볼 수 없으면 None (오답 처리)."""
+    if isinstance(value, bool):
+        return value
+    text = normalize_text(value)
+    if text in _OX_TRUE:
+        return True
+    if text in _OX_FALSE:
+        return False
+    return None
+
+
+def _parse_options(options) -> List[str]:
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            return []
+    return [str(o) for o in options] if isinstance(options, list) else []
+
+
+# ------------------
+# 2. 정답 키
+# ------------------
+class AnswerKey:
+    """
+    한 퀴즈의 컴파일된 정답 키.
+
+    - 객관식: 정답 보기의 인덱스. 답안은 보기 인덱스(int) 또는 보기 문자열 모두 받습니다.
+    - OX: bool
+    - 주관식: '|' 로 구분한 허용 답안들을 정규화한 frozenset
+
+    DB 행 파싱(options JSON, 정규화)은 compile 할 때 한 번만 하고,
+    grade() 는 답안을 같은 형태로 바꾼 뒤 키와 비교만 합니다.
+    """
+
+    __slots__ = ('quiz_id', 'question_ids', 'kinds', 'accepted', 'option_index',
+                 'display', 'explanations', '_position', '_nbytes')
+
+    def __init__(self, quiz_id: int, questions: List[Dict[str, Any]]):
+        self.quiz_id = quiz_id
+        ids, kinds, accepted, option_index, display, explanations = [], [], [], [], [], []
+        for q in questions:
+            kind = q['type']
+            correct = q['correct_answer']
+            index: Dict[str, int] = {}
+            if kind == 'multiple':
+                options = _parse_options(q.get('options'))
+                for i, option in enumerate(options):
+                    index.setdefault(normalize_text(option), i)
+                target = index.get(normalize_text(correct))
+                accepted.append(frozenset() if target is None else frozenset([target]))
+            elif kind == 'ox':
+                value = parse_ox(correct)
+                accepted.append(frozenset() if value is None else frozenset([value]))
+            else:
+                accepted.append(frozenset(
+                    alt for alt in (normalize_text(a) for a in str(correct).split(ALTERNATIVE_SEPARATOR)) if alt))
+            ids.append(q['id'])
+            kinds.append(kind)
+            option_index.append(index)
+            display.append(correct)
+            explanations.append(q.get('explanation') or '')
+        self.question_ids = tuple(ids)
+        self.kinds = tuple(kinds)
+        self.accepted = tuple(accepted)
+        self.option_index = tuple(option_index)
+        self.display = tuple(display)
+        self.explanations = tuple(explanations)
+        self._position = {qid: i for i, qid in enumerate(ids)}
+        self._nbytes = sum(len(str(d)) + len(e) for d, e in zip(display, explanations)) + 200 * len(ids) + 200
+
+    def __len__(self) -> int:
+        """ByteLRUCache 크기 한도 계산용 대략적인 바이트 수"""
+        return self._nbytes
+
+    def canonical(self, i: int, answer):
+        """답안을 i 번째 문제의 키와 같은 형태(보기 인덱스 / bool / 정규화 문자열)로 바꿉니다."""
+        kind = self.kinds[i]
+        if answer is None:
+            return None
+        if kind == 'multiple':
+            if isinstance(answer, int) and not isinstance(answer, bool):
+                return answer
+            return self.option_index[i].get(normalize_text(answer))
+        if kind == 'ox':
+            return parse_ox(answer)
+        return normalize_text(answer)
+
+    def check(self, index: int, answer) -> bool:
+        """index 번째 문제 하나를 채점합니다. (실시간 방에서 답이 들어올 때마다 사용)"""
+        value = self.canonical(index, answer)
+        return value is not None and value in self.accepted[index]
+
+    def grade(self, answers: Dict[int, Any]) -> Dict[str, Any]:
+        """
+        {question_id: 답안} 을 채점합니다. 답하지 않은 문제는 오답, 이 퀴즈에 없는 문제 id 는 AnswerSheetError.
+        """
+        unknown = [qid for qid in answers if qid not in self._position]
+        if unknown:
+            raise AnswerSheetError(f"Unknown question id(s) for this quiz: {unknown[:5]}")
+        canonical = [self.canonical(i, answers.get(qid)) for i, qid in enumerate(self.question_ids)]
+        correct = [value is not None and value in accepted for value, accepted in zip(canonical, self.accepted)]
+        return {
+            "score": sum(correct),
+            "totalQuestions": len(self.question_ids),
+            "results": [
+                {
+                    "questionId": qid,
+                    "correct": ok,
+                    "correct_answer": shown,
+                    "explanation": explanation,
+                }
+                for qid, ok, shown, explanation in zip(self.question_ids, correct, self.display, self.explanations)
+            ],
+        }
+
+
+def parse_answer_sheet(data) -> Dict[int, Any]:
+    """
+    답안지를 {question_id: 답안} 으로 바꿉니다. 두 형식을 받습니다.
+      {"answers": [{"questionId": 1, "answer": "서울"}, ...]}
+      {"answers": {"1": "서울", "2": 0}}
+    """
+    answers = (data or {}).get('answers')
+    pairs: List[Tuple[Any, Any]]
+    if isinstance(answers, dict):
+        pairs = list(answers.items())
+    elif isinstance(answers, list):
+        pairs = []
+        for item in answers:
+            if not isinstance(item, dict):
+                raise AnswerSheetError("answers[] items must be objects with questionId and answer.")
+            pairs.append((item.get('questionId', item.get('question_id')), item.get('answer')))
+    else:
+        raise AnswerSheetError("answers must be a list or an object keyed by question id.")
+    sheet: Dict[int, Any] = {}
+    for qid, answer in pairs:
+        try:
+            sheet[int(qid)] = answer
+        except (TypeError, ValueError):
+            raise AnswerSheetError(f"Invalid question id: {qid!r}")
+    return sheet
@@ -0,0 +1,75 @@
+# gunicorn.conf.py (운영 실행 프로필)
+#
+# 실행: gunicorn -c gunicorn.conf.py
+#
+# - preload: master 가 app 을 한 번 임포트한 뒤 fork 합니다. create_app('production') 은 DB 연결이나
+#   스레드를 만들지 않으므로 fork 에 안전하고, 워커는 임포트 비용 없이 바로 뜹니다.
+# - 스키마 마이그레이션은 master 가 시작할 때 한 번만 실행하고, 워커는 연결 풀만 채웁니다.
+#   (롤링 재시작 때 워커 수만큼 스키마 확인 쿼리가 몰리지 않음)
+import os
+import time
+import logging
+import multiprocessing
+
+os.environ.setdefault("APP_ENV", "production")
+# 워커 슬롯(사용자 ID 노드 번호)은 아래 pre_fork/post_fork 가 나눠 줍니다. 이 표시가 없는 gunicorn 워커는
+# 슬롯이 겹칠 수 있으므로 idgen 이 부팅을 막습니다. (preload master 는 슬롯 없이 임포트만 함)
+os.environ["ID_WORKER_SLOTS"] = "managed"
+
+bind = os.getenv("BIND", "0.0.0.0:5001")
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+preload_app = True
+wsgi_app = "app:app"
+
+# 요청 스레드보다 많은 DB 연결은 쓰이지 않으므로 워커당 풀 상한을 스레드 수에 맞춥니다.
+os.environ.setdefault("DB_POOL_MAX", str(threads))
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def on_starting(server):
+    """master 에서 한 번: 스키마 마이그레이션 (DB_MIGRATE_ON_START=0 이면 배포 단계의 flask db-upgrade 에 맡김)"""
+    if os.getenv("DB_MIGRATE_ON_START", "1") != "1":
+        return
+    from db import migrate_database, configure_db_manager
+    try:
+        logger.info(f"스키마 버전 {migrate_database()}")
+    except Exception as e:
+        # DB 가 아직 준비되지 않았다면 워커가 처음 연결할 때 마이그레이션하도록 되돌립니다. (fork 로 상속)
+        logger.error(f"master 마이그레이션 실패, 워커에서 다시 시도합니다: {e}")
+        configure_db_manager(migrate=True)
+
+
+def pre_fork(server, worker):
+    """
+    master 에서 fork 직전: 살아 있는 워커가 쓰지 않는 가장 작은 슬롯을 줍니다.
+    슬롯은 사용자 ID(idgen.py) 의 노드 번호가 되므로 같은 서버의 워커끼리 절대 겹치지 않습니다.
+    (죽은 워커는 server.WORKERS 에서 빠지므로 그 슬롯은 새 워커가 다시 씁니다.)
+    """
+    from idgen import MAX_SLOT
+    used = {getattr(w, 'id_slot', None) for w in server.WORKERS.values()}
+    free = [slot for slot in range(MAX_SLOT + 1) if slot not in used]
+    if not free:
+        raise RuntimeError(f"no free worker slot (at most {MAX_SLOT + 1} workers per ID_SERVER_ID)")
+    worker.id_slot = free[0]
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+    os.environ["ID_WORKER_SLOT"] = str(worker.id_slot)
+
+
+def post_worker_init(worker):
+    """워커가 앱을 불러온 직후 (요청을 받기 전): DB 풀 준비 + 부팅 시간 기록"""
+    from app import init_worker
+    init_worker(worker.wsgi, forked_at=getattr(worker, 'forked_at', None))
+
+
+def worker_exit(server, worker):
+    from app import shutdown
+    shutdown()
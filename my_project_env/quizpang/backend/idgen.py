@@ -0,0 +1,112 @@
+# idgen.py (Snowflake 방식 사용자 ID 생성기)
+import os
+import sys
+import time
+import threading
+from typing import Optional
+
+# 2024-01-01T00:00:00Z (ms) — 41비트 타임스탬프로 약 69년 사용 가능
+EPOCH_MS = 1704067200000
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+# 노드 번호 = [5비트 서버 번호][5비트 워커 슬롯] — 서버 32대, 서버당 워커 32개까지
+SLOT_BITS = 5
+MAX_SERVER = (1 << (NODE_BITS - SLOT_BITS)) - 1
+MAX_SLOT = (1 << SLOT_BITS) - 1
+
+# 이 모듈을 임포트한 프로세스 (gunicorn --preload 이면 master). 여기서 fork 된 프로세스는 워커 슬롯이 있어야 합니다.
+_IMPORT_PID = os.getpid()
+
+
+def _under_gunicorn() -> bool:
+    # gunicorn 은 앱보다 먼저 임포트되므로 워커/master 모두 sys.modules 에 있습니다.
+    return "gunicorn" in sys.modules or os.getenv("SERVER_SOFTWARE", "").startswith("gunicorn")
+
+
+def _default_node_id() -> Optional[int]:
+    """
+    노드 번호를 정합니다. 같은 시각에 ID 를 만드는 프로세스끼리 노드 번호가 겹치지 않아야 합니다.
+
+    - ID_NODE_ID 가 있으면 그 값 (0..1023, 프로세스마다 직접 지정하는 배포용)
+    - 없으면 ID_SERVER_ID(0..31, 기본 0) 와 ID_WORKER_SLOT(0..31) 조합.
+      ID_WORKER_SLOT 은 gunicorn master 가 살아 있는 워커끼리 겹치지 않게 나눠 줍니다. (gunicorn.conf.py)
+    - gunicorn 아래에서 슬롯이 없으면 RuntimeError. (gunicorn.conf.py 없이 `gunicorn app:app` 으로 띄우면
+      워커마다 슬롯 0 을 써서 ID 가 겹치므로, 워커가 부팅하지 못하게 막습니다.)
+      단, gunicorn.conf.py 가 슬롯을 나눠 주는 경우(ID_WORKER_SLOTS=managed) 의 preload master 는
+      ID 를 만들지 않으므로 None (fork 뒤 워커에서 다시 계산)
+    - 슬롯 없이 fork 된 프로세스도 다른 프로세스와 노드가 겹칠 수 있으므로 RuntimeError
+    - 그 밖의 단일 프로세스 (flask run, python app.py) 는 슬롯 0
+    """
+    env = os.getenv("ID_NODE_ID")
+    if env is not None:
+        node = int(env)
+        if not 0 <= node <= MAX_NODE:
+            raise ValueError(f"ID_NODE_ID must be 0..{MAX_NODE}")
+        return node
+    server = int(os.getenv("ID_SERVER_ID", 0))
+    if not 0 <= server <= MAX_SERVER:
+        raise ValueError(f"ID_SERVER_ID must be 0..{MAX_SERVER}")
+    slot = os.getenv("ID_WORKER_SLOT")
+    if slot is None:
+        if os.getpid() != _IMPORT_PID:
+            raise RuntimeError("forked process has no ID_WORKER_SLOT (run under gunicorn.conf.py or set ID_NODE_ID)")
+        if _under_gunicorn():
+            if os.getenv("ID_WORKER_SLOTS") == "managed":
+                return None
+            raise RuntimeError("gunicorn worker has no ID_WORKER_SLOT (run gunicorn -c gunicorn.conf.py or set ID_NODE_ID)")
+        slot = 0
+    slot = int(slot)
+    if not 0 <= slot <= MAX_SLOT:
+        raise ValueError(f"ID_WORKER_SLOT must be 0..{MAX_SLOT}")
+    return (server << SLOT_BITS) | slot
+
+
+class SnowflakeGenerator:
+    """
+    시간순으로 증가하는 64비트 정수 ID 를 만듭니다.
+    [41비트 ms 타임스탬프][10비트 노드][12비트 시퀀스] — 노드당 ms 당 4096개까지 충돌 없이 생성합니다.
+    fork 된 뒤에는 노드 번호를 다시 계산합니다. (노드 번호 규칙은 _default_node_id)
+    """
+
+    def __init__(self, node_id: int = None):
+        self._fixed_node = node_id
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        node = self._fixed_node if self._fixed_node is not None else _default_node_id()
+        self.node_id = None if node is None else node & MAX_NODE
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self.node_id is None:
+                raise RuntimeError("no Snowflake node id in this process (gunicorn master does not create ids)")
+            now = int(time.time() * 1000)
+            if now < self._last_ms:
+                # 시계가 뒤로 간 경우: 마지막 시각까지 기다려 중복을 막음
+                time.sleep((self._last_ms - now) / 1000)
+                now = self._last_ms
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 같은 ms 에 4096개를 다 썼으면 다음 ms 까지 대기
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return ((now - EPOCH_MS) << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+
+_generator = SnowflakeGenerator()
+
+def new_user_id() -> str:
+    """User.id 컬럼(VARCHAR)에 저장할 새 사용자 ID 문자열을 반환합니다."""
+    return str(_generator.next_id())
@@ -0,0 +1,525 @@
+# live_rooms.py (실시간 멀티플레이 퀴즈 방 — asyncio 이벤트 루프 위의 방 상태 / 브로드캐스트)
+#
+# 한 교실(30~200명)이 같은 퀴즈를 동시에 푸는 경우를 위한 방입니다.
+# - 방을 만들 때 퀴즈를 한 번만 읽어 정답 키(grading.AnswerKey)와 정답을 뺀 문제 목록을 준비합니다.
+# - 메시지는 한 번만 JSON 으로 인코딩한 뒤 각 구독자 큐에 같은 bytes 를 넣습니다. (플레이어 수에 비례)
+# - 답안은 메모리에서만 채점/집계하고, 마지막 문제의 정답 공개(또는 방 종료) 때 풀이 기록을 한 번의 다중 행 INSERT 로
+#   저장합니다. 저장에 계속 실패하면 풀이 기록 dead letter 파일에 남깁니다. (flask --app app replay-attempts)
+#
+# 방 상태는 프로세스 메모리에 있으므로 ASGI 워커가 여러 개라면 방 코드 기준 sticky 라우팅이 필요합니다.
+import os
+import time
+import heapq
+import asyncio
+import secrets
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from grading import AnswerKey
+from attempt_writer import DeadLetterFile, ATTEMPT_DEAD_LETTER_PATH
+from json_provider import dumps_bytes
+from serializers import question_item
+
+logger = logging.getLogger(__name__)
+
+LIVE_MAX_ROOMS = int(os.getenv("LIVE_MAX_ROOMS", 500))
+LIVE_MAX_PLAYERS = int(os.getenv("LIVE_MAX_PLAYERS", 300))
+LIVE_QUESTION_SECONDS = float(os.getenv("LIVE_QUESTION_SECONDS", 20))
+# 끝난 방 / 오래 아무 일도 없는 방을 정리하는 기준 (초)
+LIVE_FINISHED_TTL = float(os.getenv("LIVE_FINISHED_TTL", 600))
+LIVE_IDLE_TTL = float(os.getenv("LIVE_IDLE_TTL", 2 * 3600))
+# 구독자 큐 길이. 이만큼 밀린 느린 연결은 끊어서 방 전체가 기다리지 않도록 합니다.
+LIVE_SUBSCRIBER_QUEUE = int(os.getenv("LIVE_SUBSCRIBER_QUEUE", 64))
+LIVE_LEADERBOARD_SIZE = 10
+# 풀이 기록 저장 재시도 횟수와 첫 대기 시간(초, 재시도마다 두 배). 끝내 실패하면 dead letter 로
+LIVE_SAVE_RETRIES = int(os.getenv("LIVE_SAVE_RETRIES", 3))
+LIVE_SAVE_RETRY_DELAY = float(os.getenv("LIVE_SAVE_RETRY_DELAY", 1.0))
+
+_dead_letter = DeadLetterFile(ATTEMPT_DEAD_LETTER_PATH)
+
+# 방 코드에는 헷갈리는 글자(0/O, 1/I/L)를 쓰지 않습니다.
+_CODE_ALPHABET = "23456789ABCDEFGHJKMNPQRSTUVWXYZ"
+_CLOSED = None   # 구독자 큐 종료 신호
+
+
+class RoomError(ValueError):
+    """방 요청이 현재 상태에서 허용되지 않을 때 발생합니다. (status 는 HTTP 응답 코드)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------
+# 1. 구독자 / 플레이어
+# ------------------
+class Subscriber:
+    """연결 하나(WebSocket 또는 SSE)의 송신 큐. 큐가 가득 차면 연결을 끊습니다."""
+
+    __slots__ = ('queue', 'closed')
+
+    def __init__(self):
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=LIVE_SUBSCRIBER_QUEUE)
+        self.closed = False
+
+    def send(self, message: bytes) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.close(drop=True)
+            return False
+
+    def close(self, drop: bool = False):
+        """종료 신호를 넣습니다. 이미 넣은 메시지(최종 순위 등)는 보낸 뒤 끝나고, drop 이면 밀린 메시지를 버립니다."""
+        if self.closed:
+            return
+        self.closed = True
+        if drop or self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSED)
+
+    async def next_message(self, timeout: float) -> Optional[bytes]:
+        """다음 메시지. timeout 동안 없으면 b'' (keep-alive 용), 연결이 닫혔으면 None."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return b''
+
+
+class Player:
+    __slots__ = ('id', 'token', 'name', 'user_id', 'score', 'answer_ms', 'answered_index', 'last_correct',
+                 'subscribers')
+
+    def __init__(self, player_id: int, name: str, user_id: Optional[str]):
+        self.id = player_id
+        self.token = secrets.token_urlsafe(16)
+        self.name = name
+        self.user_id = user_id
+        self.score = 0
+        self.answer_ms = 0          # 맞힌 문제에 걸린 시간 합계 (동점자 정렬용)
+        self.answered_index = -1    # 마지막으로 답한 문제 번호 (한 문제에 한 번만)
+        self.last_correct = False
+        self.subscribers: List[Subscriber] = []
+
+    def send(self, message: bytes):
+        for sub in self.subscribers:
+            sub.send(message)
+
+
+# ------------------
+# 2. 방
+# ------------------
+class LiveRoom:
+    """
+    lobby → question → reveal → question → ... → finished
+
+    호스트가 next 로 문제를 열고, 제한 시간이 지나거나 호스트가 reveal 하면 정답과 순위를 공개합니다.
+    마지막 문제를 공개하면 점수가 더 바뀌지 않으므로 바로 save_attempts 로 풀이 기록을 저장하고,
+    그 전에 end 되거나 방치된 방은 end (prune 이 대신 호출) 때 그때까지의 점수로 저장합니다.
+    """
+
+    def __init__(self, code: str, quiz: Dict[str, Any], questions: List[Dict[str, Any]],
+                 question_seconds: float, save_attempts: Callable[[List[Dict[str, Any]]], Awaitable[Any]]):
+        self.code = code
+        self.host_token = secrets.token_urlsafe(16)
+        self.quiz = {"quiz_id": quiz['quiz_id'], "title": quiz['title'], "category": quiz['category']}
+        self.key = AnswerKey(quiz['quiz_id'], questions)
+        self.public_questions = [question_item(q, include_answers=False) for q in questions]
+        self.question_seconds = question_seconds
+        self.save_attempts = save_attempts
+        self.state = 'lobby'
+        self.index = -1
+        self.question_started = 0.0
+        self.deadline = 0.0
+        self.players: Dict[int, Player] = {}
+        self.by_token: Dict[str, Player] = {}
+        self.host_subscribers: List[Subscriber] = []
+        self.answered = 0
+        self.distribution: Dict[str, int] = {}
+        self.created_at = time.time()
+        self.last_activity = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.saved = False              # 풀이 기록을 DB 또는 dead letter 에 남겼는지
+        self._save_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._next_player_id = 1
+        self.stats = {"broadcasts": 0, "messages": 0, "dropped": 0, "answers": 0, "save_failures": 0}
+
+    # --- 전송 ---
+    def _all_subscribers(self):
+        for sub in self.host_subscribers:
+            yield sub
+        for player in self.players.values():
+            yield from player.subscribers
+
+    def broadcast(self, message: Dict[str, Any]):
+        """message 를 한 번만 인코딩해 모든 연결에 넣습니다. O(연결 수)"""
+        data = dumps_bytes(message)
+        sent = dropped = 0
+        for sub in self._all_subscribers():
+            if sub.send(data):
+                sent += 1
+            else:
+                dropped += 1
+        self.stats["broadcasts"] += 1
+        self.stats["messages"] += sent
+        self.stats["dropped"] += dropped
+
+    def _send_host(self, message: Dict[str, Any]):
+        data = dumps_bytes(message)
+        for sub in self.host_subscribers:
+            sub.send(data)
+
+    # --- 접속 ---
+    def join(self, name: str, user_id: Optional[str]) -> Player:
+        if self.state == 'finished':
+            raise RoomError("This room has already finished.", 409)
+        if len(self.players) >= LIVE_MAX_PLAYERS:
+            raise RoomError("This room is full.", 409)
+        name = (name or '').strip()[:30]
+        if not name:
+            raise RoomError("name is required.")
+        player = Player(self._next_player_id, name, user_id)
+        self._next_player_id += 1
+        self.players[player.id] = player
+        self.by_token[player.token] = player
+        self.last_activity = time.monotonic()
+        self.broadcast({"type": "player_joined", "name": name, "players": len(self.players)})
+        return player
+
+    def subscribe(self, token: str) -> Subscriber:
+        """호스트 또는 플레이어 토큰으로 연결을 등록하고, 현재 상태를 첫 메시지로 보냅니다."""
+        sub = Subscriber()
+        if self.is_host(token):
+            self.host_subscribers.append(sub)
+            sub.send(dumps_bytes(self.snapshot(host=True)))
+            return sub
+        player = self.by_token.get(token)
+        if player is None:
+            raise RoomError("Invalid room token.", 403)
+        player.subscribers.append(sub)
+        sub.send(dumps_bytes({**self.snapshot(), "you": self._player_view(player)}))
+        return sub
+
+    def unsubscribe(self, token: str, sub: Subscriber):
+        sub.close()
+        owner = self.host_subscribers if self.is_host(token) else getattr(self.by_token.get(token), 'subscribers', [])
+        if sub in owner:
+            owner.remove(sub)
+
+    def is_host(self, token: str) -> bool:
+        return bool(token) and secrets.compare_digest(token, self.host_token)
+
+    def snapshot(self, host: bool = False) -> Dict[str, Any]:
+        data = {
+            "type": "state",
+            "code": self.code,
+            "quiz": self.quiz,
+            "state": self.state,
+            "index": self.index,
+            "total": len(self.public_questions),
+            "players": len(self.players),
+        }
+        if self.state == 'question':
+            data["question"] = self.public_questions[self.index]
+            data["deadline_ms"] = int(self.deadline * 1000)
+        if host:
+            data["answered"] = self.answered
+        return data
+
+    def _player_view(self, player: Player) -> Dict[str, Any]:
+        return {"playerId": player.id, "name": player.name, "score": player.score}
+
+    # --- 진행 (호스트) ---
+    async def control(self, token: str, action: str):
+        """호스트 명령: next(다음 문제, 마지막 뒤에는 종료) / reveal / end"""
+        if not self.is_host(token):
+            raise RoomError("Only the host can control this room.", 403)
+        if action == 'next':
+            if self.state != 'question' and self.index + 1 >= len(self.public_questions):
+                await self.end()
+            else:
+                self.next_question()
+        elif action == 'reveal':
+            self.reveal()
+        elif action == 'end':
+            await self.end()
+        else:
+            raise RoomError("action must be one of next, reveal, end.")
+
+    def next_question(self):
+        if self.state == 'question':
+            raise RoomError("Reveal the current question first.", 409)
+        if self.state == 'finished':
+            raise RoomError("This room has already finished.", 409)
+        if self.index + 1 >= len(self.public_questions):
+            raise RoomError("No more questions.", 409)
+        self.index += 1
+        self.state = 'question'
+        self.answered = 0
+        self.distribution = {}
+        self.question_started = time.time()
+        self.deadline = self.question_started + self.question_seconds
+        self.last_activity = time.monotonic()
+        self._timer = asyncio.get_running_loop().call_later(self.question_seconds, self._on_deadline, self.index)
+        self.broadcast({
+            "type": "question",
+            "index": self.index,
+            "total": len(self.public_questions),
+            "question": self.public_questions[self.index],
+            "deadline_ms": int(self.deadline * 1000),
+        })
+
+    def _on_deadline(self, index: int):
+        if self.state == 'question' and self.index == index:
+            self.reveal()
+
+    def reveal(self):
+        """정답과 분포, 상위 순위를 공개하고 각 플레이어에게 자기 점수/순위를 보냅니다."""
+        if self.state != 'question':
+            raise RoomError("No open question to reveal.", 409)
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.state = 'reveal'
+        ranks = self._ranks()
+        self.broadcast({
+            "type": "reveal",
+            "index": self.index,
+            "correct_answer": self.key.display[self.index],
+            "explanation": self.key.explanations[self.index],
+            "answered": self.answered,
+            "distribution": self.distribution,
+            "leaderboard": self._leaderboard(),
+        })
+        if self.index + 1 >= len(self.public_questions):
+            self.finalize()
+        for player in self.players.values():
+            if player.subscribers:
+                player.send(dumps_bytes({
+                    "type": "you",
+                    "correct": player.answered_index == self.index and player.last_correct,
+                    "score": player.score,
+                    "rank": ranks[player.score],
+                }))
+
+    def answer(self, token: str, index: int, answer) -> Dict[str, Any]:
+        player = self.by_token.get(token)
+        if player is None:
+            raise RoomError("Invalid room token.", 403)
+        if self.state != 'question' or index != self.index:
+            raise RoomError("This question is not open.", 409)
+        if time.time() > self.deadline:
+            raise RoomError("Time is up.", 409)
+        if player.answered_index == self.index:
+            raise RoomError("Already answered.", 409)
+        correct = self.key.check(self.index, answer)
+        player.answered_index = self.index
+        player.last_correct = correct
+        if correct:
+            player.score += 1
+            player.answer_ms += int((time.time() - self.question_started) * 1000)
+        self.answered += 1
+        self.stats["answers"] += 1
+        bucket = self._bucket(answer, correct)
+        self.distribution[bucket] = self.distribution.get(bucket, 0) + 1
+        self.last_activity = time.monotonic()
+        # 호스트 화면의 "응답 n/m" 갱신 (플레이어에게는 보내지 않음)
+        self._send_host({"type": "answered", "answered": self.answered, "players": len(self.players)})
+        if self.answered >= len(self.players):
+            self.reveal()
+        return {"accepted": True}
+
+    def _bucket(self, answer, correct: bool) -> str:
+        """답안 분포의 키. 객관식은 보기 번호, OX 는 O/X, 주관식은 정답/오답만 셉니다. (키 수가 제한됨)"""
+        kind = self.key.kinds[self.index]
+        if kind == 'subjective':
+            return 'correct' if correct else 'wrong'
+        value = self.key.canonical(self.index, answer)
+        if value is None:
+            return 'invalid'
+        if kind == 'ox':
+            return 'O' if value else 'X'
+        return str(value)
+
+    async def end(self):
+        """방을 끝내고 최종 순위를 보낸 뒤, 로그인한 플레이어의 풀이 기록을 한 번에 저장합니다."""
+        if self.state == 'finished':
+            # 이미 끝난 방도 저장이 끝나지 않았으면 기다립니다. (prune / 종료 시)
+            await asyncio.shield(self.finalize())
+            return
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.state = 'finished'
+        self.finished_at = time.monotonic()
+        ranks = self._ranks()
+        self.broadcast({"type": "finished", "leaderboard": self._leaderboard(), "players": len(self.players)})
+        for player in self.players.values():
+            player.send(dumps_bytes({"type": "you", "score": player.score, "rank": ranks[player.score],
+                                     "final": True}))
+        for sub in list(self._all_subscribers()):
+            sub.close()
+        # 요청이 끊겨도 저장은 계속되도록 shield
+        await asyncio.shield(self.finalize())
+
+    @property
+    def results_pending(self) -> bool:
+        """저장해야 할 풀이 기록이 아직 남아 있는지 (문제를 하나라도 연 방의 로그인 플레이어)"""
+        return not self.saved and self.index >= 0 and any(p.user_id for p in self.players.values())
+
+    def finalize(self) -> "asyncio.Task":
+        """풀이 기록 저장 작업. 방마다 한 번만 만들어지며, 여러 곳에서 불러도 같은 작업을 돌려줍니다."""
+        if self._save_task is None:
+            self._save_task = asyncio.get_running_loop().create_task(self._save())
+        return self._save_task
+
+    def _attempts(self) -> List[Dict[str, Any]]:
+        if self.index < 0:
+            return []
+        total = len(self.public_questions)
+        now_ms = int(time.time() * 1000)
+        return [{
+            'userId': p.user_id,
+            'quiz_id': self.quiz['quiz_id'],
+            'score': p.score,
+            'totalQuestions': total,
+            'mode': 'live',
+            'date': now_ms,
+        } for p in self.players.values() if p.user_id]
+
+    async def _save(self):
+        """LIVE_SAVE_RETRIES 번까지 재시도하고, 그래도 실패하면 dead letter 파일에 남깁니다."""
+        attempts = self._attempts()
+        if not attempts:
+            self.saved = True
+            return
+        error: Optional[Exception] = None
+        for attempt in range(1, LIVE_SAVE_RETRIES + 1):
+            try:
+                await self.save_attempts(attempts)
+                self.saved = True
+                return
+            except Exception as e:
+                error = e
+                if attempt < LIVE_SAVE_RETRIES:
+                    logger.warning(f"실시간 방 {self.code} 풀이 기록 저장 실패, 재시도 {attempt}/{LIVE_SAVE_RETRIES}: {e}")
+                    await asyncio.sleep(LIVE_SAVE_RETRY_DELAY * 2 ** (attempt - 1))
+        logger.error(f"실시간 방 {self.code} 풀이 기록 {len(attempts)}건 저장 실패 (dead letter 로 보냄): {error}")
+        await asyncio.to_thread(_dead_letter.append, attempts, error)
+        self.stats["save_failures"] += 1
+        self.saved = True
+
+    # --- 순위 ---
+    def _ranks(self) -> List[int]:
+        """
+        점수 → 순위 표. 점수는 0..문제 수 범위의 정수이므로 계수 정렬로 O(플레이어 + 문제 수) 에 구합니다.
+        (동점은 같은 순위)
+        """
+        counts = [0] * (len(self.public_questions) + 1)
+        for player in self.players.values():
+            counts[player.score] += 1
+        ranks = [0] * len(counts)
+        higher = 0
+        for score in range(len(counts) - 1, -1, -1):
+            ranks[score] = higher + 1
+            higher += counts[score]
+        return ranks
+
+    def _leaderboard(self) -> List[Dict[str, Any]]:
+        """상위 LIVE_LEADERBOARD_SIZE 명. 점수별 버킷에서 위에서부터 채우고, 버킷 안은 빨리 맞힌 순."""
+        buckets: Dict[int, List[Player]] = {}
+        for player in self.players.values():
+            buckets.setdefault(player.score, []).append(player)
+        board = []
+        for score in sorted(buckets, reverse=True):
+            remaining = LIVE_LEADERBOARD_SIZE - len(board)
+            for player in heapq.nsmallest(remaining, buckets[score], key=lambda p: p.answer_ms):
+                board.append({"rank": len(board) + 1, "name": player.name, "score": score})
+            if len(board) >= LIVE_LEADERBOARD_SIZE:
+                break
+        return board
+
+    def expired(self, now: float) -> bool:
+        if self.finished_at is not None:
+            return now - self.finished_at > LIVE_FINISHED_TTL
+        return now - self.last_activity > LIVE_IDLE_TTL
+
+
+# ------------------
+# 3. 방 목록
+# ------------------
+class RoomRegistry:
+    def __init__(self):
+        self.rooms: Dict[str, LiveRoom] = {}
+        self._created = 0
+
+    def _new_code(self) -> str:
+        while True:
+            code = ''.join(secrets.choice(_CODE_ALPHABET) for _ in range(6))
+            if code not in self.rooms:
+                return code
+
+    def prune(self):
+        """
+        끝난 지 오래됐거나 방치된 방을 지웁니다. 아직 저장하지 않은 풀이 기록이 있는 방은 end 로 저장을 시작하고
+        저장이 끝날 때까지 남겨 둡니다. (다음 prune 에서 지움)
+        """
+        now = time.monotonic()
+        for code in [c for c, room in self.rooms.items() if room.expired(now)]:
+            room = self.rooms[code]
+            if room.results_pending:
+                if room._save_task is None:
+                    asyncio.get_running_loop().create_task(room.end())
+                continue
+            del self.rooms[code]
+            for sub in list(room._all_subscribers()):
+                sub.close()
+
+    async def close(self):
+        """서버 종료 시 호출: 저장하지 않은 방의 풀이 기록을 저장(실패하면 dead letter)할 때까지 기다립니다."""
+        pending = [room.end() for room in self.rooms.values() if room.results_pending or room._save_task]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def create(self, quiz, questions, question_seconds: float, save_attempts) -> LiveRoom:
+        self.prune()
+        if len(self.rooms) >= LIVE_MAX_ROOMS:
+            raise RoomError("Too many live rooms on this server.", 503)
+        if not questions:
+            raise RoomError("This quiz has no questions.")
+        room = LiveRoom(self._new_code(), quiz, questions, question_seconds, save_attempts)
+        self.rooms[room.code] = room
+        self._created += 1
+        return room
+
+    def get(self, code: str) -> LiveRoom:
+        room = self.rooms.get((code or '').upper())
+        if room is None:
+            raise RoomError("Room not found.", 404)
+        return room
+
+    def stats(self) -> Dict[str, Any]:
+        connections = sum(len(r.host_subscribers) + sum(len(p.subscribers) for p in r.players.values())
+                          for r in self.rooms.values())
+        return {
+            "rooms": len(self.rooms),
+            "rooms_created": self._created,
+            "players": sum(len(r.players) for r in self.rooms.values()),
+            "connections": connections,
+            "messages": sum(r.stats["messages"] for r in self.rooms.values()),
+            "dropped": sum(r.stats["dropped"] for r in self.rooms.values()),
+            "pending_saves": sum(1 for r in self.rooms.values() if r.results_pending),
+            "save_failures": sum(r.stats["save_failures"] for r in self.rooms.values()),
+        }
+
+
+# 싱글톤 (ASGI 프로세스당 하나)
+room_registry = RoomRegistry()
+
+def get_room_registry() -> RoomRegistry:
+    return room_registry
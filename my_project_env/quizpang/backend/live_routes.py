@@ -0,0 +1,202 @@
+# live_routes.py (실시간 퀴즈 방 API — ASGI 모드 전용, asgi_app.py 에서 등록)
+#
+#   POST /api/live/rooms                     {quizId, questionSeconds?}  → {code, hostToken}
+#   POST /api/live/rooms/<code>/join         {name, userId?}             → {playerId, token}
+#   GET  /api/live/rooms/<code>                                          → 현재 상태 (토큰 불필요)
+#   WS   /api/live/rooms/<code>/ws?token=    서버 → 이벤트, 클라이언트 → {"type": "answer"|"next"|"reveal"|"end", ...}
+#   GET  /api/live/rooms/<code>/events?token=   WebSocket 을 못 쓰는 환경용 SSE
+#   POST /api/live/rooms/<code>/answer       {token, index, answer}      (SSE 클라이언트용)
+#   POST /api/live/rooms/<code>/control      {token, action}             (SSE 호스트용)
+import asyncio
+import logging
+from quart import Blueprint, jsonify, request, websocket, Response
+
+from async_db import get_async_db_manager
+from async_routes import _invalidate_summaries
+from json_provider import dumps_bytes, loads
+from live_rooms import get_room_registry, RoomError, LIVE_QUESTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+live_bp = Blueprint('live', __name__, url_prefix='/api/live')
+
+# 이 시간(초) 동안 보낼 메시지가 없으면 ping / keep-alive 를 보냅니다. (프록시 유휴 타임아웃 방지)
+KEEPALIVE_SECONDS = 25.0
+
+
+async def _save_room_attempts(attempts):
+    """마지막 문제 공개 또는 방 종료 때 한 번 호출: 모든 플레이어의 풀이 기록을 다중 행 INSERT 한 번으로 저장"""
+    await get_async_db_manager().add_quiz_attempts(attempts)
+    _invalidate_summaries({a['userId'] for a in attempts})
+
+
+def _room_error(e: RoomError):
+    return jsonify({"error": str(e)}), e.status
+
+
+# ------------------------------------
+# 1. 방 만들기 / 참가 / 상태
+# ------------------------------------
+@live_bp.route('/rooms', methods=['POST'])
+async def create_room():
+    data = await request.get_json(silent=True) or {}
+    try:
+        quiz_id = int(data.get('quizId'))
+        seconds = float(data.get('questionSeconds') or LIVE_QUESTION_SECONDS)
+    except (TypeError, ValueError):
+        return jsonify({"error": "quizId must be an integer."}), 400
+    if not (5 <= seconds <= 300):
+        return jsonify({"error": "questionSeconds must be between 5 and 300."}), 400
+
+    db = get_async_db_manager()
+    try:
+        # 방 하나당 퀴즈를 한 번만 읽습니다. (이후 문제 전송/채점은 메모리에서)
+        quiz = await db.get_quiz_by_id(quiz_id)
+        if not quiz:
+            return jsonify({"error": "Quiz not found."}), 404
+        questions = await db.get_questions_by_quiz_id(quiz_id)
+        room = get_room_registry().create(quiz, questions, seconds, _save_room_attempts)
+    except RoomError as e:
+        return _room_error(e)
+    except Exception as e:
+        logger.error(f"Live room creation failed for quiz {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    return jsonify({
+        "code": room.code,
+        "hostToken": room.host_token,
+        "quiz": room.quiz,
+        "total": len(room.public_questions),
+    }), 201
+
+
+@live_bp.route('/rooms/<string:code>/join', methods=['POST'])
+async def join_room(code):
+    data = await request.get_json(silent=True) or {}
+    user_id = (data.get('userId') or '').strip() or None
+    try:
+        room = get_room_registry().get(code)
+        # 로그인 사용자는 방이 끝날 때 풀이 기록이 저장되므로 미리 존재를 확인 (일괄 INSERT 실패 방지)
+        if user_id and not await get_async_db_manager().get_user_by_id(user_id):
+            return jsonify({"error": f"userId '{user_id}' does not exist."}), 400
+        player = room.join(data.get('name'), user_id)
+    except RoomError as e:
+        return _room_error(e)
+    return jsonify({"code": room.code, "playerId": player.id, "token": player.token}), 201
+
+
+@live_bp.route('/rooms/<string:code>', methods=['GET'])
+async def get_room(code):
+    try:
+        return jsonify(get_room_registry().get(code).snapshot()), 200
+    except RoomError as e:
+        return _room_error(e)
+
+
+# ------------------------------------
+# 2. 명령 처리 (WebSocket 메시지와 POST 가 같은 함수를 사용)
+# ------------------------------------
+async def _handle(room, token: str, message) -> dict:
+    if not isinstance(message, dict):
+        raise RoomError("message must be a JSON object.")
+    kind = message.get('type') or message.get('action')
+    if kind == 'answer':
+        try:
+            index = int(message.get('index'))
+        except (TypeError, ValueError):
+            raise RoomError("index must be an integer.")
+        result = room.answer(token, index, message.get('answer'))
+        return {"type": "answer_ack", "index": index, **result}
+    await room.control(token, kind)
+    return {"type": "ok", "action": kind}
+
+
+@live_bp.route('/rooms/<string:code>/answer', methods=['POST'])
+async def answer(code):
+    data = await request.get_json(silent=True) or {}
+    try:
+        room = get_room_registry().get(code)
+        return jsonify(await _handle(room, data.get('token') or '', {**data, "type": "answer"})), 200
+    except RoomError as e:
+        return _room_error(e)
+
+
+@live_bp.route('/rooms/<string:code>/control', methods=['POST'])
+async def control(code):
+    data = await request.get_json(silent=True) or {}
+    try:
+        room = get_room_registry().get(code)
+        if data.get('action') == 'answer':
+            raise RoomError("Use /answer to submit answers.")
+        return jsonify(await _handle(room, data.get('token') or '', data)), 200
+    except RoomError as e:
+        return _room_error(e)
+
+
+# ------------------------------------
+# 3. 이벤트 전송 (WebSocket / SSE)
+# ------------------------------------
+@live_bp.websocket('/rooms/<string:code>/ws')
+async def room_socket(code):
+    token = websocket.args.get('token') or ''
+    try:
+        room = get_room_registry().get(code)
+        sub = room.subscribe(token)
+    except RoomError as e:
+        await websocket.accept()
+        await websocket.send(dumps_bytes({"type": "error", "error": str(e)}).decode('utf-8'))
+        await websocket.close(4000 + e.status)
+        return
+
+    async def sender():
+        while True:
+            message = await sub.next_message(KEEPALIVE_SECONDS)
+            if message is None:
+                return
+            await websocket.send(message.decode('utf-8') if message else '{"type":"ping"}')
+
+    async def receiver():
+        while True:
+            raw = await websocket.receive()
+            try:
+                reply = await _handle(room, token, loads(raw))
+            except RoomError as e:
+                reply = {"type": "error", "error": str(e)}
+            except ValueError:
+                reply = {"type": "error", "error": "Invalid JSON message."}
+            sub.send(dumps_bytes(reply))
+
+    tasks = [asyncio.ensure_future(sender()), asyncio.ensure_future(receiver())]
+    try:
+        # 방이 끝나 sender 가 끝나거나 클라이언트가 끊어 receiver 가 끝나면 정리
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        room.unsubscribe(token, sub)
+
+
+@live_bp.route('/rooms/<string:code>/events', methods=['GET'])
+async def room_events(code):
+    token = request.args.get('token') or ''
+    try:
+        room = get_room_registry().get(code)
+        sub = room.subscribe(token)
+    except RoomError as e:
+        return _room_error(e)
+
+    async def events():
+        try:
+            while True:
+                message = await sub.next_message(KEEPALIVE_SECONDS)
+                if message is None:
+                    return
+                yield (b"data: " + message + b"\n\n") if message else b": keep-alive\n\n"
+        finally:
+            room.unsubscribe(token, sub)
+
+    resp = Response(events(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    resp.timeout = None   # 방이 끝날 때까지 유지
+    return resp
@@ -0,0 +1,224 @@
+# metrics.py (요청/DB 지연 시간 측정 및 Prometheus 텍스트 포맷 출력)
+import time
+import bisect
+import threading
+import contextvars
+from typing import Dict, Tuple, List, Optional, Callable
+
+from flask import request, g
+
+# 초 단위 기본 버킷 (Prometheus 기본값과 동일)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(label_values.get(l, "")) for l in self.labels)
+
+    def _fmt_labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **label_values):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [f"{self.name}{self._fmt_labels(k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """수집 시점에 callback() 으로 값을 읽는 게이지. callback 은 {label 튜플: 값} 을 반환합니다."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 callback: Callable[[], Dict[Tuple[str, ...], float]] = None):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception:
+            values = {}
+        return [f"{self.name}{self._fmt_labels(k)} {v}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # key -> [버킷별 개수..., 합계, 전체 개수]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **label_values):
+        key = self._key(label_values)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{self._fmt_labels(key, ('le', repr(float(bound))))} {cumulative}")
+                lines.append(f"{self.name}_bucket{self._fmt_labels(key, ('le', '+Inf'))} {row[-1]}")
+                lines.append(f"{self.name}_sum{self._fmt_labels(key)} {row[-2]}")
+                lines.append(f"{self.name}_count{self._fmt_labels(key)} {row[-1]}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+# ------------------
+# 1. 메트릭 정의
+# ------------------
+HTTP_REQUESTS = _register(Counter(
+    "quizpang_http_requests_total", "HTTP requests by route and status.",
+    ("blueprint", "route", "method", "status")))
+HTTP_LATENCY = _register(Histogram(
+    "quizpang_http_request_duration_seconds", "HTTP request latency by route.",
+    ("blueprint", "route", "method")))
+HTTP_DB_QUERIES = _register(Histogram(
+    "quizpang_http_request_db_queries", "Number of DB statements executed per request.",
+    ("blueprint", "route"), buckets=COUNT_BUCKETS))
+HTTP_DB_CONNECT_SECONDS = _register(Counter(
+    "quizpang_http_request_db_connect_seconds_total", "Time spent opening DB connections, by route.",
+    ("blueprint", "route")))
+HTTP_DB_EXECUTE_SECONDS = _register(Counter(
+    "quizpang_http_request_db_execute_seconds_total", "Time spent executing DB statements, by route.",
+    ("blueprint", "route")))
+DB_QUERY_LATENCY = _register(Histogram(
+    "quizpang_db_query_duration_seconds", "DB statement execution time by statement type.",
+    ("op",)))
+DB_ROWS = _register(Counter(
+    "quizpang_db_rows_total", "Rows returned or affected by DB statements.", ("op",)))
+DB_CONNECT_LATENCY = _register(Histogram(
+    "quizpang_db_connect_duration_seconds", "Time to open a new DB connection."))
+
+
+def register_gauge(name: str, help_text: str, labels: Tuple[str, ...],
+                   callback: Callable[[], Dict[Tuple[str, ...], float]]):
+    """수집 시점에 값을 읽는 게이지를 등록합니다. (예: 커넥션 풀 상태)"""
+    return _register(Gauge(name, help_text, labels, callback))
+
+
+# ------------------
+# 2. 요청 단위 DB 통계 (요청 스레드/컨텍스트별)
+# ------------------
+_request_db_stats: contextvars.ContextVar = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def _statement_op(sql: str) -> str:
+    head = sql.lstrip().split(None, 1)
+    return head[0].lower() if head else "unknown"
+
+
+def record_query(sql: str, duration: float, rows: int):
+    """DB 문장 하나의 실행 시간과 행 수를 기록합니다. (db.py 의 커서에서 호출)"""
+    op = _statement_op(sql)
+    DB_QUERY_LATENCY.observe(duration, op=op)
+    DB_ROWS.inc(max(rows, 0), op=op)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["execute"] += duration
+
+
+def record_connect(duration: float):
+    """새 DB 커넥션을 여는 데 걸린 시간을 기록합니다. (db.py 의 _connect 에서 호출)"""
+    DB_CONNECT_LATENCY.observe(duration)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats["connect"] += duration
+
+
+# ------------------
+# 3. Flask 연동
+# ------------------
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    return request.blueprint or "app", rule
+
+
+def init_app(app):
+    """요청 지연 시간/DB 사용량을 기록하는 before/after_request 훅을 등록합니다."""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_token = _request_db_stats.set({"queries": 0, "connect": 0.0, "execute": 0.0})
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        token = g.pop("_metrics_token", None)
+        if start is None:
+            return response
+        blueprint, route = _route_labels()
+        HTTP_LATENCY.observe(time.perf_counter() - start, blueprint=blueprint, route=route, method=request.method)
+        HTTP_REQUESTS.inc(blueprint=blueprint, route=route, method=request.method, status=response.status_code)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            HTTP_DB_QUERIES.observe(stats["queries"], blueprint=blueprint, route=route)
+            HTTP_DB_CONNECT_SECONDS.inc(stats["connect"], blueprint=blueprint, route=route)
+            HTTP_DB_EXECUTE_SECONDS.inc(stats["execute"], blueprint=blueprint, route=route)
+        if token is not None:
+            _request_db_stats.reset(token)
+        return response
+
+
+def render_prometheus() -> str:
+    """등록된 모든 메트릭을 Prometheus text exposition format(0.0.4) 으로 출력합니다."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,220 @@
+# migrations.py (버전별 스키마 마이그레이션)
+import logging
+from typing import List, Tuple
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# 여러 gunicorn 워커가 동시에 부팅해도 마이그레이션은 한 번만 실행되도록 잡는 락 이름
+MIGRATION_LOCK = "quizpang_schema_migration"
+MIGRATION_LOCK_TIMEOUT = 60
+
+# (버전, 설명, SQL 목록) — 반드시 버전 순서대로 추가하고, 이미 배포된 항목은 수정하지 않습니다.
+# 기존 DB(버전 테이블 도입 이전)에도 안전하게 적용되도록 IF NOT EXISTS 를 사용합니다.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "initial tables", [
+        # 1. User 테이블 (auth.py에서 사용)
+        """
+        CREATE TABLE IF NOT EXISTS User (
+            id VARCHAR(80) PRIMARY KEY,
+            username VARCHAR(80) NOT NULL UNIQUE,
+            email VARCHAR(120) NOT NULL UNIQUE,
+            password_hash VARCHAR(256) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # 2. Quiz 테이블 (votes_avg, votes_count 추가됨)
+        """
+        CREATE TABLE IF NOT EXISTS Quiz (
+            quiz_id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(100) NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            creator_id VARCHAR(80) NOT NULL,
+            votes_avg FLOAT DEFAULT 0.0,
+            votes_count INT DEFAULT 0,
+            questions_count INT DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (creator_id) REFERENCES User(id)
+        )
+        """,
+        # 3. Question 테이블 (type, options, votes_avg, votes_count 추가됨)
+        """
+        CREATE TABLE IF NOT EXISTS Question (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            quiz_id INT NOT NULL,
+            type VARCHAR(20) NOT NULL, -- 'multiple', 'ox', 'subjective'
+            text TEXT NOT NULL,
+            options JSON, -- MariaDB 5.7+ JSON Type 사용
+            correct_answer VARCHAR(500) NOT NULL,
+            explanation TEXT,
+            votes_avg FLOAT DEFAULT 0.0,
+            votes_count INT DEFAULT 0,
+            FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
+        )
+        """,
+        # 4. QuizAttempt 테이블 (HistoryPage.tsx 요구사항 반영)
+        """
+        CREATE TABLE IF NOT EXISTS QuizAttempt (
+            attempt_id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id VARCHAR(80) NOT NULL,
+            quiz_id INT NOT NULL,
+            score INT NOT NULL,
+            total_questions INT NOT NULL,
+            mode VARCHAR(20) NOT NULL, -- 'exam' or 'study'
+            date BIGINT NOT NULL, -- UNIX TimeStamp (ms)
+            FOREIGN KEY (user_id) REFERENCES User(id),
+            FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
+        )
+        """,
+        # 5. UserQuizVote 테이블 (사용자가 퀴즈에 투표했는지 추적)
+        """
+        CREATE TABLE IF NOT EXISTS UserQuizVote (
+            user_id VARCHAR(80) NOT NULL,
+            quiz_id INT NOT NULL,
+            rating INT NOT NULL,
+            PRIMARY KEY (user_id, quiz_id),
+            FOREIGN KEY (user_id) REFERENCES User(id),
+            FOREIGN KEY (quiz_id) REFERENCES Quiz(quiz_id) ON DELETE CASCADE
+        )
+        """,
+    ]),
+    (2, "quiz list keyset indexes", [
+        # 최신순: PK(quiz_id), 카테고리별 최신순: (category, quiz_id)
+        # 평점순: (votes_avg, quiz_id), 카테고리별 평점순: (category, votes_avg, quiz_id)
+        "CREATE INDEX IF NOT EXISTS idx_quiz_category_id ON Quiz (category, quiz_id)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_rating_id ON Quiz (votes_avg, quiz_id)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_category_rating_id ON Quiz (category, votes_avg, quiz_id)",
+    ]),
+    (3, "leaderboard aggregate tables", [
+        # 랭킹 집계 테이블 (QuizAttempt/Question 을 매번 훑지 않도록 쓰기 시점에 증분 갱신)
+        # author_points = 받은 평점의 합계 (SUM(votes_avg * votes_count))
+        """
+        CREATE TABLE IF NOT EXISTS UserSolveStats (
+            user_id VARCHAR(80) PRIMARY KEY,
+            attempts INT NOT NULL DEFAULT 0,
+            total_correct INT NOT NULL DEFAULT 0,
+            total_questions INT NOT NULL DEFAULT 0,
+            INDEX idx_solve_rank (total_correct, user_id),
+            FOREIGN KEY (user_id) REFERENCES User(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS UserAuthorStats (
+            user_id VARCHAR(80) PRIMARY KEY,
+            quiz_count INT NOT NULL DEFAULT 0,
+            question_votes INT NOT NULL DEFAULT 0,
+            author_points DOUBLE NOT NULL DEFAULT 0,
+            INDEX idx_author_rank (author_points, user_id),
+            FOREIGN KEY (user_id) REFERENCES User(id)
+        )
+        """,
+    ]),
+    (4, "hot-path indexes for history, summary and ranking", [
+        # 사용자별 풀이 기록 최신순 (get_user_attempts, /my/summary)
+        "CREATE INDEX IF NOT EXISTS idx_attempt_user_date ON QuizAttempt (user_id, date)",
+        # 내가 만든 퀴즈 최신순 (get_created_quizzes_by_user)
+        "CREATE INDEX IF NOT EXISTS idx_quiz_creator_created ON Quiz (creator_id, created_at)",
+    ]),
+    (5, "covering index for paginated history", [
+        # 풀이 기록 keyset 페이지 (user_id, date, attempt_id) 범위 스캔에 필요한 컬럼을 모두 담아
+        # 테이블(클러스터드 인덱스)을 읽지 않고 인덱스만으로 응답합니다.
+        """
+        CREATE INDEX IF NOT EXISTS idx_attempt_user_date_cover
+        ON QuizAttempt (user_id, date, attempt_id, quiz_id, score, total_questions, mode)
+        """,
+        # 앞부분이 같은 v4 인덱스는 중복이므로 제거 (user_id FK 는 새 인덱스가 받침)
+        "DROP INDEX IF EXISTS idx_attempt_user_date ON QuizAttempt",
+    ]),
+    (6, "time-bucketed solver stats for windowed rankings", [
+        # 사용자별 일(D) / 월(M) 단위 풀이 집계. 기간 랭킹은 기간에 속한 버킷만 PK 범위로 읽어 합산합니다.
+        # bucket: D 는 1970-01-01 부터의 일 수, M 은 연*12 + (월-1) (둘 다 RANKING_TZ_OFFSET_HOURS 기준)
+        # 오래된 일 버킷은 월 버킷으로 접습니다. (flask --app app compact-ranking-buckets)
+        # 기존 풀이 기록은 flask --app app rebuild-leaderboards 로 채웁니다.
+        """
+        CREATE TABLE IF NOT EXISTS UserSolveBucket (
+            period CHAR(1) NOT NULL,
+            bucket INT NOT NULL,
+            user_id VARCHAR(80) NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            total_correct INT NOT NULL DEFAULT 0,
+            total_questions INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, user_id),
+            FOREIGN KEY (user_id) REFERENCES User(id)
+        )
+        """,
+    ]),
+    (7, "shared AI quiz generation jobs", [
+        # AI 퀴즈 생성 작업 상태/결과 (quiz_gen.py). 작업을 받은 워커가 아닌 다른 워커로 폴링이 가도 보이고,
+        # 끝난 결과는 prompt_key 로 모든 워커가 캐시처럼 재사용합니다. 시각은 UNIX ms.
+        """
+        CREATE TABLE IF NOT EXISTS GenerationJob (
+            job_id CHAR(32) PRIMARY KEY,
+            prompt_key CHAR(64) NOT NULL,
+            request JSON NOT NULL,
+            status VARCHAR(10) NOT NULL, -- 'queued', 'running', 'done', 'failed'
+            result JSON,
+            error VARCHAR(500),
+            created_at BIGINT NOT NULL,
+            started_at BIGINT,
+            finished_at BIGINT,
+            INDEX idx_genjob_key_created (prompt_key, created_at),
+            INDEX idx_genjob_created (created_at)
+        )
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current_version(cursor) -> int:
+    """적용된 최신 스키마 버전. 버전 테이블이 없으면 0."""
+    try:
+        cursor.execute("SELECT MAX(version) AS version FROM SchemaVersion")
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == 1146:   # ER_NO_SUCH_TABLE
+            return 0
+        raise
+    row = cursor.fetchone()
+    return (row and row['version']) or 0
+
+
+def run_migrations(db) -> int:
+    """
+    스키마를 최신 버전으로 올리고 현재 버전을 반환합니다.
+    이미 최신이면 버전 확인 쿼리 한 번으로 끝납니다.
+    """
+    with db.connection() as conn, conn.cursor() as cursor:
+        version = _current_version(cursor)
+        if version >= LATEST_VERSION:
+            return version
+
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if not cursor.fetchone()['locked']:
+            raise RuntimeError("스키마 마이그레이션 락을 얻지 못했습니다.")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS SchemaVersion (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(200) NOT NULL,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # 락을 기다리는 동안 다른 워커가 이미 적용했을 수 있으므로 다시 확인
+            version = _current_version(cursor)
+            for target, description, statements in MIGRATIONS:
+                if target <= version:
+                    continue
+                logger.info(f"스키마 마이그레이션 {target} 적용: {description}")
+                # DDL 은 암묵적으로 커밋되므로, 각 마이그레이션은 멱등(IF NOT EXISTS)하게 작성합니다.
+                for sql in statements:
+                    cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO SchemaVersion (version, description) VALUES (%s, %s)",
+                    (target, description)
+                )
+                version = target
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+    return version
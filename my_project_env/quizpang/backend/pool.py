@@ -0,0 +1,265 @@
+# pool.py (PyMySQL 커넥션 풀)
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Any
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """checkout_timeout 안에 커넥션을 빌리지 못했을 때 발생합니다."""
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 고정 상한(bounded) 커넥션 풀.
+
+    - min_size 만큼 미리 연결을 만들어 두고, 최대 max_size 개까지만 동시에 연결합니다.
+    - 풀이 가득 차면 checkout_timeout 초 동안 반납을 기다린 뒤 PoolTimeoutError 를 발생시킵니다.
+    - idle_timeout 초 이상 놀고 있던 연결은 정리하고, ping_interval 초 이상 쉬었던 연결은
+      빌려주기 전에 ping 으로 상태를 확인합니다.
+    - gunicorn 이 fork 한 뒤에는 부모 프로세스의 소켓을 공유하지 않도록 풀을 새로 시작합니다.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 checkout_timeout: float = 5.0, idle_timeout: float = 300.0,
+                 ping_interval: float = 30.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("invalid pool size (0 <= min_size <= max_size, max_size >= 1)")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self._reset_state()
+
+    def _reset_state(self):
+        """락/유휴 목록/통계를 현재 프로세스 기준으로 초기화합니다."""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._idle = deque()          # (conn, 반납 시각) — 오른쪽이 가장 최근
+        self._size = 0                # 열려 있는 전체 연결 수 (유휴 + 사용 중)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    # ------------------
+    # 1. fork 감지
+    # ------------------
+    def _check_pid(self):
+        """fork 된 자식 프로세스라면 부모의 연결을 버리고 풀을 새로 시작합니다."""
+        if self._pid == os.getpid():
+            return
+        # 부모 소켓은 닫지 않고(부모가 계속 사용) 참조만 버립니다.
+        logger.info(f"fork 감지 (pid {self._pid} -> {os.getpid()}): 커넥션 풀 재초기화")
+        self._reset_state()
+
+    # ------------------
+    # 2. 연결 생성/폐기
+    # ------------------
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        """오래 쉬었던 연결만 ping 으로 확인합니다 (매번 ping 하는 왕복을 피하기 위함)."""
+        if not conn.open:
+            return False
+        if time.monotonic() - idle_since < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle_locked(self):
+        """
+        idle_timeout 을 넘긴 유휴 연결을 min_size 까지 풀에서 떼어내 반환합니다.
+        (락 보유 상태에서 호출하며, 실제 close 는 락 밖에서 합니다.)
+        """
+        now = time.monotonic()
+        evicted = []
+        while self._idle and self._size > self.min_size:
+            conn, since = self._idle[0]
+            if now - since < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats["discarded"] += 1
+            evicted.append(conn)
+        return evicted
+
+    def fill(self):
+        """min_size 까지 연결을 미리 만들어 둡니다."""
+        self._check_pid()
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    # ------------------
+    # 3. 대여/반납
+    # ------------------
+    def acquire(self):
+        """풀에서 연결을 빌립니다. 필요하면 새로 만들고, 가득 찼으면 기다립니다."""
+        self._check_pid()
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        while True:
+            conn = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                evicted = self._evict_idle_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"{self.checkout_timeout}s 안에 DB 커넥션을 얻지 못했습니다. "
+                            f"(in_use={self._in_use}, max={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, since = self._idle.pop()   # LIFO: 최근에 쓴 연결부터 재사용
+                else:
+                    self._size += 1
+                    create = True
+            for old in evicted:
+                self._close_quietly(old)
+
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(conn, since):
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._lock:
+                self._in_use += 1
+                self._stats["checkouts"] += 1
+                self._stats["wait_time_total"] += waited
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return conn
+
+    def release(self, conn, discard: bool = False):
+        """빌린 연결을 반납합니다. discard=True 이거나 닫힌 연결이면 폐기합니다."""
+        if self._pid != os.getpid():
+            # fork 이전에 빌린 연결은 이 프로세스의 풀 소유가 아님
+            return
+        with self._lock:
+            self._in_use -= 1
+        if discard or self._closed or not conn.open:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        with pool.connection() as conn: 형태로 사용합니다.
+        연결 수준 오류(OperationalError/InterfaceError)가 나면 해당 연결은 폐기합니다.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    # ------------------
+    # 4. 종료 및 통계
+    # ------------------
+    def close(self):
+        """유휴 연결을 모두 닫습니다. 사용 중인 연결은 반납 시점에 닫힙니다."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def discard_idle(self) -> int:
+        """유휴 연결을 모두 닫습니다. (DB 장애로 끊겼을 연결을 복구 후 다시 빌려주지 않도록) 닫은 개수를 반환"""
+        if self._pid != os.getpid():
+            return 0
+        with self._lock:
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+        return len(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 (크기, 사용 중 연결 수, checkout 대기 시간 등)를 반환합니다."""
+        with self._lock:
+            checkouts = self._stats["checkouts"]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": checkouts,
+                "timeouts": self._stats["timeouts"],
+                "created": self._stats["created"],
+                "discarded": self._stats["discarded"],
+                "wait_time_avg_ms": round(self._stats["wait_time_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+                "wait_time_max_ms": round(self._stats["wait_time_max"] * 1000, 3),
+            }
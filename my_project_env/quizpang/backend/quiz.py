@@ -2,17 +2,174 @@
 
 import logging
 import json
+import math
 import os
-from flask import Blueprint, jsonify, request, abort
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, Any
+from flask import Blueprint, jsonify, request, abort, Response
 # from google import genai ... (Gemini 관련 코드는 퀴즈 생성 로직에 필요하지만, 
 # 프론트엔드 연동을 위한 CRUD API에 집중하기 위해 생략했습니다.)
-from db import get_db_manager 
+from db import get_db_manager, db_breaker, CircuitOpenError, RANKING_WINDOWS
+from cache import ResponseCache, ByteLRUCache
+from compression import EncodedBody
+from json_provider import dumps_bytes
+from quiz_import import iter_quiz_bundles, ImportFormatError
+from attempt_writer import get_attempt_writer, AttemptQueueFull
+from quiz_gen import get_generation_queue, normalize_request, GenerationQueueFull
+from search_index import get_search_index
+from recommender import get_recommender, is_available as recommender_available
+from grading import AnswerKey, AnswerSheetError, parse_answer_sheet
+from serializers import (
+    quiz_list_item, quiz_payload, attempt_item,
+    solver_rank_item, author_rank_item, parse_quiz_list_args, split_quiz_page,
+    my_summary_payload, parse_summary_recent, MY_SUMMARY_RECENT, MY_SUMMARY_CREATED,
+    parse_history_args, split_history_page, parse_search_args, search_next_cursor,
+    related_quiz_item, parse_related_limit, parse_rating, parse_rating_batch, parse_attempt,
+)
 
 # 블루프린트 생성
 quiz_bp = Blueprint('quiz', __name__, url_prefix='/api')
 
 logger = logging.getLogger(__name__)
 
+# 퀴즈 목록 응답 캐시 (create_quiz / rate_question 에서 무효화, TTL 은 안전장치)
+quiz_list_cache = ResponseCache("quiz_list", ttl=float(os.getenv("QUIZ_LIST_CACHE_TTL", 30)))
+
+# 퀴즈 문제 페이로드 캐시 (퀴즈별 인코딩된 JSON, 바이트 한도 LRU). 문항 평점이 바뀌면 해당 퀴즈만 무효화
+quiz_payload_cache = ByteLRUCache(
+    "quiz_payload", max_bytes=int(os.getenv("QUIZ_PAYLOAD_CACHE_BYTES", 32 * 1024 * 1024)))
+
+
+# 사용자별 /my/summary 응답 캐시. 풀이 저장/퀴즈 생성/평점 반영 시 해당 사용자만 무효화하고,
+# 다른 워커에서 일어난 변경은 짧은 TTL 로 따라잡습니다.
+my_summary_cache = ByteLRUCache(
+    "my_summary", max_bytes=int(os.getenv("MY_SUMMARY_CACHE_BYTES", 8 * 1024 * 1024)),
+    ttl=float(os.getenv("MY_SUMMARY_CACHE_TTL", 10)))
+# 퀴즈별 컴파일된 정답 키 (채점용). 문제는 저장 후 바뀌지 않으므로 무효화 없이 바이트 한도 LRU 로만 관리
+answer_key_cache = ByteLRUCache(
+    "answer_key", max_bytes=int(os.getenv("ANSWER_KEY_CACHE_BYTES", 16 * 1024 * 1024)))
+
+# 관련 퀴즈 응답 캐시. 키에 추천 결과 버전이 들어가므로 재계산되면 자연히 새 키를 쓰고,
+# 목록에 포함된 평점 정보는 TTL 동안만 재사용합니다.
+related_cache = ByteLRUCache(
+    "related", max_bytes=int(os.getenv("RELATED_CACHE_BYTES", 8 * 1024 * 1024)),
+    ttl=float(os.getenv("RELATED_CACHE_TTL", 60)))
+
+# 기간 랭킹 응답 캐시 (버킷 합산 결과). 풀이 저장 시 무효화하지 않고 짧은 TTL 로만 갱신합니다.
+ranking_cache = ByteLRUCache(
+    "ranking", max_bytes=int(os.getenv("RANKING_CACHE_BYTES", 2 * 1024 * 1024)),
+    ttl=float(os.getenv("RANKING_CACHE_TTL", 30)))
+
+# 생성 작업 SSE 스트림을 최대 몇 초까지 열어 둘지 (이후에는 클라이언트가 다시 연결하거나 폴링)
+GENERATE_STREAM_TIMEOUT = float(os.getenv("QUIZ_GENERATE_STREAM_TIMEOUT", 120))
+
+
+def _invalidate_summaries(user_ids):
+    for user_id in user_ids:
+        my_summary_cache.invalidate(user_id)
+
+
+def _on_attempts_flushed(batch):
+    """write-behind 배치가 저장된 뒤, 그 배치의 사용자 요약 캐시를 무효화합니다."""
+    _invalidate_summaries({a['userId'] for a in batch})
+
+
+def _cached_json_response(etag: str, body: EncodedBody):
+    """
+    캐시된 JSON 바디로 응답을 만들고, If-None-Match 가 일치하면 304 를 반환합니다.
+    Accept-Encoding 에 맞춰 미리 압축해 둔 변형을 보내며, ETag 에도 인코딩을 붙여 구분합니다.
+    """
+    encoding, data = body.select(request.headers.get('Accept-Encoding'))
+    if encoding:
+        etag = f"{etag}-{encoding}"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(data, status=200, mimetype='application/json')
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    resp.set_etag(etag)
+    # 브라우저가 매번 ETag 로 재검증하도록 (변경이 없으면 304)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+def db_unavailable_response(e: Optional[CircuitOpenError] = None):
+    """
+    DB 를 쓸 수 없을 때의 503 응답. (DBManager 를 만들지 못했거나 서킷 브레이커가 열려 있음)
+    Retry-After 는 브레이커의 다음 probe 까지 남은 시간입니다.
+    """
+    retry_after = e.retry_after if e else db_breaker.retry_after()
+    resp = jsonify({"error": "Database connection is not available."})
+    resp.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return resp, 503
+
+
+def _invalidate_quiz_caches(quiz_ids):
+    """평점 변경 후 목록 캐시와 해당 퀴즈들의 문제 페이로드 캐시를 무효화합니다."""
+    quiz_list_cache.invalidate()
+    for quiz_id in quiz_ids:
+        quiz_payload_cache.invalidate(quiz_id)
+        quiz_payload_cache.invalidate(f"{quiz_id}:public")
+
+
+# 풀이 기록 저장 전 존재 확인을 통과한 (종류, id). 사용자/퀴즈 삭제 API 가 없으므로 무효화 없이 개수만 제한
+_known_refs: "OrderedDict[Tuple[str, Any], bool]" = OrderedDict()
+_known_refs_lock = threading.Lock()
+KNOWN_REFS_MAX = 50_000
+
+
+def _check_attempt_refs(db_manager, data):
+    """
+    userId / quiz_id 가 실제로 있는지 확인합니다. 없으면 ValueError.
+    write-behind 큐에 FK 위반 행이 들어가 202 응답 뒤에 거부되는 일을 막습니다. (확인된 id 는 워커에서 기억)
+    """
+    checks = (("user", data['userId'], db_manager.get_user_by_id),
+              ("quiz", data['quiz_id'], db_manager.quiz_exists))
+    for kind, key, lookup in checks:
+        ref = (kind, key)
+        with _known_refs_lock:
+            if ref in _known_refs:
+                _known_refs.move_to_end(ref)
+                continue
+        if not lookup(key):
+            raise ValueError(f"{kind} '{key}' does not exist.")
+        with _known_refs_lock:
+            _known_refs[ref] = True
+            if len(_known_refs) > KNOWN_REFS_MAX:
+                _known_refs.popitem(last=False)
+
+
+def _store_attempt(db_manager, data) -> bool:
+    """
+    풀이 기록을 저장합니다. write-behind 모드이면 큐에 넣고 True(대기 중),
+    바로 저장했으면 False 를 반환합니다. (AttemptQueueFull 은 호출한 쪽에서 처리)
+    사용자/퀴즈가 없으면 ValueError.
+    """
+    _check_attempt_refs(db_manager, data)
+    writer = get_attempt_writer(db_manager, on_flush=_on_attempts_flushed)
+    if writer:
+        writer.submit(data)
+        return True
+    if not db_manager.add_quiz_attempt(data):
+        raise Exception("No rows affected during save.")
+    _invalidate_summaries([data['userId']])
+    return False
+
+
+def _answer_key(db_manager, quiz_id: int):
+    """퀴즈의 컴파일된 정답 키. 퀴즈가 없으면 None."""
+    def build():
+        questions = db_manager.get_questions_by_quiz_id(quiz_id)
+        return AnswerKey(quiz_id, questions) if questions else None
+
+    cached = answer_key_cache.get_or_build(quiz_id, build)
+    return cached[1] if cached else None
+
+
 # --- CRUD 및 연동 API ---
 
 # ------------------------------------
@@ -24,7 +181,7 @@ logger = logging.getLogger(__name__)
 def create_quiz():
     db = get_db_manager()
     if not db:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
 
     data = request.get_json() or {}
     required = ['title', 'category', 'questions']
@@ -47,37 +204,118 @@ def create_quiz():
 
     try:
         quiz_id = db.add_quiz_and_questions(data)
+        quiz_list_cache.invalidate()
+        _invalidate_summaries([creator_id])
         return jsonify({"message": "Quiz created successfully.", "quiz_id": quiz_id}), 201
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Quiz creation failed: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+# ------------------------------------
+# 1-1. 대량 퀴즈 가져오기 API (POST /api/quiz/import?format=jsonl|csv)
+#      요청 바디를 한 줄씩 읽으며 퀴즈 단위 트랜잭션으로 저장합니다. (바디 전체를 메모리에 올리지 않음)
+#      - JSONL: {"title", "category"} 헤더 줄 다음에 {"type", "text", "options", "correct_answer", "explanation"} 문제 줄
+#      - CSV: title,category,type,text,options,correct_answer,explanation
+# ------------------------------------
+IMPORT_MIMETYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-jsonlines': 'jsonl',
+}
+
+@quiz_bp.route('/quiz/import', methods=['POST'])
+def import_quizzes():
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
+
+    fmt = (request.args.get('format') or IMPORT_MIMETYPES.get(request.mimetype, '')).lower()
+    if fmt not in ('jsonl', 'csv'):
+        return jsonify({"error": "format must be jsonl or csv (use ?format= or Content-Type)."}), 400
+
+    creator_id = (request.headers.get('X-User-Id') or request.args.get('creator_id') or "").strip()
+    if not creator_id:
+        return jsonify({"error": "creator_id is required (use logged-in user id)."}), 401
+    if not db.get_user_by_id(creator_id):
+        return jsonify({"error": f"creator_id '{creator_id}' does not exist."}), 400
+
+    imported = []
+    try:
+        lines = iter(request.stream.readline, b'')
+        for header, questions in iter_quiz_bundles(lines, fmt):
+            quiz_id = db.add_quiz_and_questions({**header, 'creator_id': creator_id, 'questions': questions})
+            imported.append({"quiz_id": quiz_id, "title": header['title']})
+        return jsonify({"message": "Quizzes imported successfully.", "imported": imported}), 201
+    except (ImportFormatError, ValueError) as e:
+        # 오류 이전에 끝난 퀴즈들은 이미 커밋되었으므로 함께 알려줍니다.
+        return jsonify({"error": str(e), "imported": imported}), 400
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Quiz import failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}", "imported": imported}), 500
+    finally:
+        if imported:
+            quiz_list_cache.invalidate()
+            _invalidate_summaries([creator_id])
+
+
 
 
 # ------------------------------------
 # 2. 퀴즈 목록 조회 API (GET /api/quiz/list)
+#    - 쿼리 파라미터가 없으면 기존처럼 전체 목록을 반환합니다. (기존 프론트 호환)
+#    - ?limit=&cursor=&category=&sort=latest|rating 중 하나라도 있으면 keyset 페이지네이션으로
+#      한 페이지만 반환하고, 다음 페이지 커서는 X-Next-Cursor 헤더로 내려줍니다.
 # ------------------------------------
+def _dumps(payload) -> bytes:
+    return dumps_bytes(payload)
+
+
 @quiz_bp.route('/quiz/list', methods=['GET'])
 def get_quiz_list():
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
-        
+        return db_unavailable_response()
+
+    args = request.args
+    paged = any(k in args for k in ('limit', 'cursor', 'category', 'sort'))
+
     try:
-        quizzes = db_manager.get_all_quizzes()
-        # 필드 이름이 프론트엔드와 일치하는지 확인 (quiz_id, votes_avg 등)
-        quiz_list = [{
-            "quiz_id": q['quiz_id'],
-            "title": q['title'],
-            "category": q['category'],
-            "creator_id": q['creator_id'],
-            "votes_avg": q['votes_avg'],
-            "votes_count": q['votes_count'],
-            "questions_count": q['questions_count'],
-        } for q in quizzes]
-        
-        return jsonify(quiz_list), 200
+        if not paged:
+            etag, body = quiz_list_cache.get_or_build(
+                'all', lambda: EncodedBody(_dumps([quiz_list_item(q) for q in db_manager.get_all_quizzes()])))
+            return _cached_json_response(etag, body)
+
+        try:
+            sort, limit, category, after = parse_quiz_list_args(args)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        def build():
+            rows = db_manager.get_quizzes_page(limit, sort=sort, category=category, after=after)
+            items, next_cursor = split_quiz_page(rows, sort, limit)
+            return _dumps(items), next_cursor
+
+        if after is None:
+            # 첫 페이지만 캐시합니다. (대부분의 트래픽이 첫 페이지에 몰림)
+            def build_cached():
+                body, next_cursor = build()
+                return EncodedBody(body), next_cursor
+            etag, (body, next_cursor) = quiz_list_cache.get_or_build(('page', sort, category, limit), build_cached)
+            resp = _cached_json_response(etag, body)
+        else:
+            body, next_cursor = build()
+            resp = Response(body, status=200, mimetype='application/json')
+        if next_cursor:
+            resp.headers['X-Next-Cursor'] = next_cursor
+        return resp
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Quiz list fetch failed: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -85,52 +323,33 @@ def get_quiz_list():
 
 # ------------------------------------
 # 3. 특정 퀴즈의 문제 목록 조회 API (GET /api/quiz/<int:quiz_id>/questions) - QuizGamePage.tsx 연동
+#    ?answers=0 이면 correct_answer / explanation 을 빼고 보냅니다. (서버 채점 /submit 을 쓰는 클라이언트용)
 # ------------------------------------
 @quiz_bp.route('/quiz/<int:quiz_id>/questions', methods=['GET'])
 def get_quiz_with_questions(quiz_id):
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
 
-    try:
+    include_answers = request.args.get('answers') != '0'
+
+    def build():
         quiz = db_manager.get_quiz_by_id(quiz_id)
         if not quiz:
-            return jsonify({"error": "Quiz not found."}), 404
+            return None
 
         questions = db_manager.get_questions_by_quiz_id(quiz_id)
-        
-        question_list = []
-        for q in questions:
-            # options는 DB에서 JSON으로 저장되므로, 프론트엔드 형식에 맞춰 역직렬화
-            options_data = q.get('options')
-            if isinstance(options_data, str):
-                 try:
-                    options_data = json.loads(options_data)
-                 except:
-                    options_data = [] # JSON 파싱 실패 시 빈 리스트
-            elif options_data is None:
-                options_data = []
-
-            question_list.append({
-                "id": q['id'],
-                "type": q['type'],
-                "text": q['text'],
-                "options": options_data,
-                "correct_answer": q['correct_answer'],
-                "explanation": q.get('explanation', ''),
-                "votes_avg": q['votes_avg'],
-                "votes_count": q['votes_count'],
-            })
-            
-        return jsonify({
-            "quiz": {
-                "quiz_id": quiz['quiz_id'],
-                "title": quiz['title'],
-                "category": quiz['category'],
-                "creator_id": quiz['creator_id'],
-            },
-            "questions": question_list
-        }), 200
+        return EncodedBody(_dumps(quiz_payload(quiz, questions, include_answers=include_answers)))
+
+    try:
+        # 교실 전체가 같은 퀴즈를 동시에 열어도 DB 를 거치지 않도록 인코딩된 바디를 캐시
+        cache_key = quiz_id if include_answers else f"{quiz_id}:public"
+        cached = quiz_payload_cache.get_or_build(cache_key, build)
+        if cached is None:
+            return jsonify({"error": "Quiz not found."}), 404
+        return _cached_json_response(*cached)
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Quiz and questions fetch failed for ID {quiz_id}: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -143,30 +362,64 @@ def get_quiz_with_questions(quiz_id):
 def rate_question():
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
-        
-    data = request.get_json()
-    question_id = data.get('questionId') # Frontend uses questionId
-    rating = data.get('rating')
-    
-    if not all([question_id, rating]) or not (1 <= rating <= 5):
-        return jsonify({"error": "Invalid question ID or rating (must be 1-5)."}), 400
+        return db_unavailable_response()
         
     try:
-        new_avg = db_manager.update_question_rating(question_id, rating)
-         # ✅ 방금 평가된 문항이 속한 퀴즈 집계 갱신
-        quiz_id = db_manager.get_quiz_id_by_question(question_id)
-        if quiz_id:
-            db_manager.recompute_quiz_rating(quiz_id)
-            
+        # 문자열 id("12") 도 정수로 맞춰야 rate_questions 결과(int 키)에서 찾을 수 있음
+        question_id, rating = parse_rating(request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        # 문항 평균, 퀴즈 집계, 출제자 랭킹을 한 트랜잭션에서 증분 갱신
+        new_avgs, quiz_ids, creator_ids = db_manager.rate_questions([(question_id, rating)])
+        new_avg = new_avgs[question_id]
+        _invalidate_quiz_caches(quiz_ids)
+        _invalidate_summaries(creator_ids)
+
         return jsonify({"message": "Rating updated successfully.", "new_avg": new_avg}), 200
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 404
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Question rating failed: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+# ------------------------------------
+# 4-1. 문제 평점 일괄 API (POST /api/question/rate/batch)
+#      퀴즈를 끝낸 뒤 모든 문항 평점을 한 요청/한 트랜잭션으로 제출합니다.
+#      body: {"ratings": [{"questionId": 1, "rating": 5}, ...]}
+# ------------------------------------
+@quiz_bp.route('/question/rate/batch', methods=['POST'])
+def rate_questions_batch():
+    db_manager = get_db_manager()
+    if not db_manager:
+        return db_unavailable_response()
+
+    try:
+        ratings = parse_rating_batch(request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        new_avgs, quiz_ids, creator_ids = db_manager.rate_questions(ratings)
+        _invalidate_quiz_caches(quiz_ids)
+        _invalidate_summaries(creator_ids)
+        return jsonify({
+            "message": "Ratings updated successfully.",
+            "new_avgs": {str(qid): avg for qid, avg in new_avgs.items()},
+        }), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 404
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Batch question rating failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
 # ------------------------------------
 # 5. 퀴즈 풀이 기록 저장 API (POST /api/attempt/save) - QuizGamePage.tsx 연동
 # ------------------------------------
@@ -174,50 +427,119 @@ def rate_question():
 def save_quiz_attempt():
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
         
-    data = request.get_json()
-    if not all(key in data for key in ['userId', 'quizId', 'score', 'totalQuestions', 'mode']):
-         return jsonify({"error": "Missing required fields for quiz attempt."}), 400
-
-    # 필드 이름 통일: Frontend: quizId, Backend: quiz_id
-    data['quiz_id'] = data.pop('quizId') 
+    try:
+        # 필드 이름 통일: Frontend: quizId, Backend: quiz_id (형식/범위 검사 포함)
+        data = parse_attempt(request.get_json(silent=True) or {})
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
 
     try:
-        if db_manager.add_quiz_attempt(data):
-            return jsonify({"message": "Quiz attempt saved successfully."}), 201
-        else:
-            raise Exception("No rows affected during save.")
+        # write-behind 모드: 큐에 넣고 바로 응답 (백그라운드에서 묶어서 INSERT)
+        if _store_attempt(db_manager, data):
+            return jsonify({"message": "Quiz attempt queued."}), 202
+        return jsonify({"message": "Quiz attempt saved successfully."}), 201
 
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except AttemptQueueFull as e:
+        logger.warning(f"Quiz attempt rejected: {e}")
+        return jsonify({"error": "Server is busy. Please retry shortly."}), 503
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Quiz attempt save failed: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+# ------------------------------------
+# 5-1. 서버 채점 API (POST /api/quiz/<int:quiz_id>/submit)
+#    body: {"userId": "...", "mode": "...", "answers": [{"questionId": 1, "answer": "서울"}, ...]}
+#    캐시된 정답 키로 답안지 전체를 채점하고, userId 가 있으면 그 점수로 풀이 기록까지 저장합니다.
+# ------------------------------------
+@quiz_bp.route('/quiz/<int:quiz_id>/submit', methods=['POST'])
+def submit_quiz(quiz_id):
+    db_manager = get_db_manager()
+    if not db_manager:
+        return db_unavailable_response()
+
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('userId')
+    if user_id and not data.get('mode'):
+        return jsonify({"error": "mode is required when userId is given."}), 400
+
+    try:
+        sheet = parse_answer_sheet(data)
+        key = _answer_key(db_manager, quiz_id)
+        if key is None:
+            return jsonify({"error": "Quiz not found."}), 404
+        result = key.grade(sheet)
+    except AnswerSheetError as e:
+        return jsonify({"error": str(e)}), 400
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Grading failed for quiz {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    if not user_id:
+        return jsonify(result), 200
+
+    try:
+        attempt = parse_attempt({
+            'userId': user_id,
+            'quizId': quiz_id,
+            'score': result['score'],
+            'totalQuestions': result['totalQuestions'],
+            'mode': data['mode'],
+        })
+        queued = _store_attempt(db_manager, attempt)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except AttemptQueueFull as e:
+        logger.warning(f"Graded attempt rejected: {e}")
+        return jsonify({"error": "Server is busy. Please retry shortly."}), 503
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Graded attempt save failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    result["saved"] = "queued" if queued else "saved"
+    return jsonify(result), (202 if queued else 201)
+
+
 # ------------------------------------
 # 6. 사용자 풀이 기록 조회 API (GET /api/history/<string:user_id>) - HistoryPage.tsx 연동
+#    - 쿼리 파라미터가 없으면 기존처럼 전체 기록을 반환합니다. (기존 프론트 호환)
+#    - ?limit=&cursor= 는 (date, attempt_id) keyset 페이지, ?since=<ms> 는 그 시각 이후 기록만 반환하고
+#      다음 페이지 커서는 X-Next-Cursor 헤더로 내려줍니다.
 # ------------------------------------
 @quiz_bp.route('/history/<string:user_id>', methods=['GET'])
 def get_user_history(user_id):
     db_manager = get_db_manager()
     if not db_manager:
-        return jsonify({"error": "Database connection is not available."}), 500
-        
+        return db_unavailable_response()
+
+    paged = any(k in request.args for k in ('limit', 'cursor', 'since'))
     try:
-        attempts = db_manager.get_user_attempts(user_id)
-        
-        # 필드 이름을 Frontend 규격에 맞춰 변환 (attempt_id -> attemptId, total_questions -> totalQuestions 등)
-        history_list = [{
-            "attemptId": a['attempt_id'],
-            "userId": a['user_id'],
-            "quizId": a['quiz_id'],
-            "score": a['score'],
-            "totalQuestions": a['total_questions'],
-            "mode": a['mode'],
-            "date": a['date'],
-        } for a in attempts]
-        
-        return jsonify(history_list), 200
+        if not paged:
+            attempts = db_manager.get_user_attempts(user_id)
+            return jsonify([attempt_item(a) for a in attempts]), 200
+
+        try:
+            limit, after, since = parse_history_args(request.args)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        rows = db_manager.get_user_attempts_page(user_id, limit, after=after, since=since)
+        items, next_cursor = split_history_page(rows, limit)
+        resp = jsonify(items)
+        if next_cursor:
+            resp.headers['X-Next-Cursor'] = next_cursor
+        return resp, 200
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"User history fetch failed for ID {user_id}: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -256,94 +578,202 @@ def get_user_history(user_id):
 def get_ranking():
     db = get_db_manager()
     if not db:
-        return jsonify({"error": "Database connection is not available."}), 500
+        return db_unavailable_response()
 
     rtype = (request.args.get('type') or 'author').lower()  # 기본 author
+    # 기간: all(기본, 누적) / day / week / month / year (풀이 랭킹만)
+    window = (request.args.get('window') or 'all').lower()
+    if window != 'all':
+        if rtype != 'solver':
+            return jsonify({"error": "window is only supported for type=solver."}), 400
+        if window not in RANKING_WINDOWS:
+            return jsonify({"error": f"window must be one of {', '.join(RANKING_WINDOWS)}."}), 400
     try:
+        if rtype == 'solver' and window != 'all':
+            # 기간 풀이 랭킹: 기간에 속한 일/월 버킷만 합산 (UserSolveBucket)
+            cached = ranking_cache.get_or_build(f"solver:{window}", lambda: EncodedBody(
+                _dumps([solver_rank_item(r) for r in db.get_solver_ranking_window(window, 100)])))
+            return _cached_json_response(*cached)
+
         if rtype == 'solver':
-            # 풀이 랭킹: 맞힌 총점 내림차순
-            sql = """
-            SELECT u.id AS userId, u.username,
-                   s.attempts,
-                   s.total_correct     AS solverPoints,
-                   s.total_questions,
-                   s.accuracy
-            FROM v_user_solve_stats s
-            JOIN User u ON u.id = s.user_id
-            ORDER BY s.total_correct DESC, u.username ASC
-            LIMIT 100
-            """
-            rows = db.execute_query(sql)
+            # 풀이 랭킹: 맞힌 총점 내림차순 (UserSolveStats 집계 테이블)
+            rows = db.get_solver_ranking(100)
 
             # 응답 형태 통일(프론트에서 키만 사용)
-            result = [{
-                "userId": r["userId"],
-                "username": r["username"],
-                "attempts": r["attempts"],
-                "solverPoints": int(r["solverPoints"] or 0),
-                "totalQuestions": int(r["total_questions"] or 0),
-                "accuracy": float(r["accuracy"] or 0),
-            } for r in rows]
-            return jsonify(result), 200
+            return jsonify([solver_rank_item(r) for r in rows]), 200
 
         else:
-            # 출제 랭킹: author_points 내림차순
-            sql = """
-            SELECT u.id AS userId, u.username,
-                   a.quiz_count,
-                   a.question_votes,
-                   a.avg_question_rating,
-                   a.author_points  AS authorPoints
-            FROM v_user_author_stats a
-            JOIN User u ON u.id = a.user_id
-            ORDER BY a.author_points DESC, u.username ASC
-            LIMIT 100
-            """
-            rows = db.execute_query(sql)
-            result = [{
-                "userId": r["userId"],
-                "username": r["username"],
-                "quizCount": int(r["quiz_count"] or 0),
-                "questionVotes": int(r["question_votes"] or 0),
-                "avgQuestionRating": float(r["avg_question_rating"] or 0),
-                "authorPoints": float(r["authorPoints"] or 0),
-            } for r in rows]
-            return jsonify(result), 200
+            # 출제 랭킹: author_points 내림차순 (UserAuthorStats 집계 테이블)
+            rows = db.get_author_ranking(100)
+            return jsonify([author_rank_item(r) for r in rows]), 200
 
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
     except Exception as e:
         logger.error(f"Ranking fetch failed: {e}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     
+# ------------------------------------
+# 8. 내 요약 API (GET /api/my/summary/<user_id>?recent=N) - HistoryPage.tsx 연동
+#    합계(totals) + 최근 풀이 N건 + 내가 만든 퀴즈를 한 번의 쿼리로 읽습니다.
+# ------------------------------------
 @quiz_bp.route('/my/summary/<string:user_id>', methods=['GET'])
 def get_my_summary(user_id):
-        db = get_db_manager()
-        if not db:
-            return jsonify({"error": "Database connection is not available."}), 500
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
 
-        try:
-            attempts = db.get_user_attempts(user_id) or []
-            created  = db.get_created_quizzes_by_user(user_id) or []
-
-            return jsonify({
-                "attempts": [{
-                    "attemptId": a['attempt_id'],
-                    "userId": a['user_id'],
-                    "quizId": a['quiz_id'],
-                    "score": a['score'],
-                    "totalQuestions": a['total_questions'],
-                    "mode": a['mode'],
-                    "date": a['date'],
-                } for a in attempts],
-                "created": [{
-                    "quizId": c['quiz_id'],
-                    "title": c['title'],
-                    "questionsCount": c['questions_count'],
-                    "votesAvg": float(c['votes_avg'] or 0),
-                    "votesCount": int(c['votes_count'] or 0),
-                    "createdAt": c['created_at'].isoformat() if c['created_at'] else None,
-                } for c in created]
-            }), 200
-        except Exception as e:
-            logger.exception(f"/my/summary failed: {e}")
-            return jsonify({"error": f"Server error: {str(e)}"}), 500
+    try:
+        recent = parse_summary_recent(request.args)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    def build():
+        summary = db.get_my_summary(user_id, recent, MY_SUMMARY_CREATED)
+        return _dumps(my_summary_payload(summary))
+
+    try:
+        if recent == MY_SUMMARY_RECENT:
+            return _cached_json_response(*my_summary_cache.get_or_build(user_id, lambda: EncodedBody(build())))
+        return Response(build(), status=200, mimetype='application/json')
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.exception(f"/my/summary failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+# ------------------------------------
+# 9. AI 퀴즈 생성 API (POST /api/quiz/generate) - 작업 큐 방식
+#    요청은 바로 202 + job_id 로 응답하고, 백그라운드 워커가 모델을 호출합니다.
+#    결과는 GET /api/quiz/generate/<job_id> 로 폴링하거나 /stream (SSE) 으로 받습니다.
+#    작업 상태는 GenerationJob 테이블에도 기록하므로 폴링이 다른 gunicorn 워커로 가도 조회됩니다.
+# ------------------------------------
+@quiz_bp.route('/quiz/generate', methods=['POST'])
+def generate_quiz():
+    data = request.get_json(silent=True) or {}
+    try:
+        req = normalize_request(data.get('topic'), data.get('difficulty'), data.get('count'))
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        job = get_generation_queue().submit(req)
+    except GenerationQueueFull as e:
+        logger.warning(f"Generation queue rejected job: {e}")
+        return jsonify({"error": "Too many generation requests, please retry shortly."}), 503
+
+    return jsonify(job.to_dict()), (200 if job.finished else 202)
+
+
+@quiz_bp.route('/quiz/generate/<string:job_id>', methods=['GET'])
+def get_generation_job(job_id):
+    job = get_generation_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@quiz_bp.route('/quiz/generate/<string:job_id>/stream', methods=['GET'])
+def stream_generation_job(job_id):
+    """작업 상태가 바뀔 때마다 SSE 이벤트를 보내고, done/failed 가 되면 스트림을 닫습니다."""
+    jobs = get_generation_queue()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    def events():
+        seen = None
+        deadline = time.monotonic() + GENERATE_STREAM_TIMEOUT
+        current = job
+        while current is not None:
+            if current.version != seen:
+                seen = current.version
+                yield f"event: {current.status}\ndata: {dumps_bytes(current.to_dict()).decode('utf-8')}\n\n"
+            if current.finished or time.monotonic() >= deadline:
+                return
+            # 변경이 없어도 15초마다 주석 줄을 보내 프록시가 연결을 끊지 않도록
+            current = jobs.wait(job_id, seen, 15.0)
+            if current is not None and current.version == seen and not current.finished:
+                yield ": keep-alive\n\n"
+
+    resp = Response(events(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+# ------------------------------------
+# 10. 검색 API (GET /api/search?q=&limit=&cursor=)
+#     퀴즈 제목/카테고리/문제 본문에 대한 메모리 역색인(search_index.py)을 BM25 점수 순으로 조회합니다.
+#     다음 페이지 커서는 X-Next-Cursor, 일치한 퀴즈 수는 X-Total-Count 헤더로 보냅니다.
+# ------------------------------------
+@quiz_bp.route('/search', methods=['GET'])
+def search_quizzes():
+    try:
+        query, limit, offset = parse_search_args(request.args)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
+
+    try:
+        index = get_search_index()
+        index.ensure_fresh(db.iter_search_documents)
+        total, results = index.search(query, limit, offset)
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.exception(f"Search failed: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    resp = Response(_dumps(results), status=200, mimetype='application/json')
+    resp.headers['X-Total-Count'] = str(total)
+    next_cursor = search_next_cursor(total, limit, offset)
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+    return resp
+
+
+# ------------------------------------
+# 11. 관련 퀴즈 API (GET /api/quiz/<int:quiz_id>/related?limit=N) - QuizGamePage.tsx
+#     "이 퀴즈를 푼 사람들이 함께 푼 퀴즈". 풀이 기록의 item-item 코사인 유사도(recommender.py)를
+#     주기적으로 미리 계산해 두고 상위 N 개를 돌려줍니다.
+# ------------------------------------
+@quiz_bp.route('/quiz/<int:quiz_id>/related', methods=['GET'])
+def get_related_quizzes(quiz_id):
+    if not recommender_available():
+        return jsonify({"error": "Recommendations are not available on this server."}), 503
+    rec = get_recommender()
+    try:
+        limit = parse_related_limit(request.args, rec.k)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    db = get_db_manager()
+    if not db:
+        return db_unavailable_response()
+
+    def build():
+        related = rec.related(quiz_id, limit)
+        if related is None:
+            return None
+        rows = db.get_quizzes_by_ids([related_id for related_id, _ in related])
+        return EncodedBody(_dumps([related_quiz_item(rows[related_id], sim)
+                                   for related_id, sim in related if related_id in rows]))
+
+    try:
+        rec.ensure_fresh(db.get_attempt_watermark, db.iter_attempt_pairs)
+        cached = related_cache.get_or_build((rec.version, quiz_id, limit), build)
+    except CircuitOpenError as e:
+        return db_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Related quizzes fetch failed for ID {quiz_id}: {e}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+    if cached is None:
+        # 이 워커에서 첫 계산이 아직 끝나지 않음
+        resp = jsonify({"error": "Recommendations are being prepared, please retry shortly."})
+        resp.headers['Retry-After'] = '5'
+        return resp, 503
+    return _cached_json_response(*cached)
@@ -0,0 +1,561 @@
+# quiz_gen.py (AI 퀴즈 생성 작업 큐 + 프롬프트 해시 결과 캐시)
+#
+# 생성은 작업을 받은 워커 프로세스의 스레드가 하지만, 작업 상태와 결과는 GenerationJob 테이블(DBJobStore)에도
+# 기록합니다. 그래서 gunicorn 워커가 여러 개여도 폴링/스트림이 어느 워커로 가든 같은 작업을 볼 수 있고,
+# 끝난 결과는 모든 워커가 캐시처럼 재사용합니다. (QUIZ_GENERATE_STORE=memory 이면 워커 메모리에만 보관)
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import random
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from quiz_import import _validate_question, ImportFormatError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# 저장소에서 읽은 작업의 version (상태 순서)
+_STATUS_VERSION = {'queued': 0, 'running': 1, 'done': 2, 'failed': 2}
+
+DIFFICULTIES = ('easy', 'normal', 'hard')
+GENERATE_MAX_COUNT = int(os.getenv("QUIZ_GENERATE_MAX_COUNT", 20))
+
+
+class GenerationQueueFull(Exception):
+    """대기 중인 생성 작업이 너무 많아 새 작업을 받을 수 없을 때 발생합니다."""
+
+
+# ------------------
+# 1. 요청 정규화 / 캐시 키
+# ------------------
+def normalize_request(topic, difficulty, count) -> Dict[str, Any]:
+    """
+    (topic, difficulty, count) 를 검증하고 정규화합니다. 잘못된 값이면 ValueError.
+    topic 은 NFKC 정규화 + 공백 정리 + 소문자로 바꿔 "한국사 ", "한국사" 가 같은 키가 되도록 합니다.
+    """
+    if not isinstance(topic, str) or not topic.strip():
+        raise ValueError("topic is required.")
+    topic = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", topic)).strip().lower()
+    if len(topic) > 100:
+        raise ValueError("topic is too long (max 100 characters).")
+    difficulty = (difficulty or 'normal').strip().lower() if isinstance(difficulty, str) else 'normal'
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}.")
+    try:
+        count = int(count if count is not None else 5)
+    except (TypeError, ValueError):
+        raise ValueError("count must be an integer.")
+    if not (1 <= count <= GENERATE_MAX_COUNT):
+        raise ValueError(f"count must be between 1 and {GENERATE_MAX_COUNT}.")
+    return {"topic": topic, "difficulty": difficulty, "count": count}
+
+
+def prompt_key(req: Dict[str, Any]) -> str:
+    """정규화된 요청의 해시. 같은 요청은 생성기를 다시 호출하지 않고 캐시된 결과를 씁니다."""
+    raw = json.dumps([req["topic"], req["difficulty"], req["count"]], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ------------------
+# 2. 생성기 (Gemini / 로컬 스텁)
+# ------------------
+class StubGenerator:
+    """
+    Gemini 대신 쓰는 결정적 생성기. 같은 요청에는 항상 같은 문제를 만들며 네트워크를 쓰지 않습니다.
+    (개발/테스트/벤치마크용, QUIZ_GENERATOR=stub) delay 초만큼 모델 호출 지연을 흉내냅니다.
+    """
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def generate(self, req: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.delay:
+            time.sleep(self.delay)
+        rng = random.Random(prompt_key(req))
+        topic = req["topic"]
+        questions = []
+        for i in range(1, req["count"] + 1):
+            if rng.random() < 0.3:
+                answer = rng.choice(["O", "X"])
+                questions.append({
+                    "type": "ox",
+                    "text": f"[{topic}] {i}번 문제: 다음 설명이 맞으면 O, 틀리면 X ({req['difficulty']})",
+                    "options": ["O", "X"],
+                    "correct_answer": answer,
+                    "explanation": f"{topic} 스텁 해설 {i}",
+                })
+            else:
+                options = [f"{topic} 보기 {i}-{k}" for k in range(1, 5)]
+                questions.append({
+                    "type": "multiple",
+                    "text": f"[{topic}] {i}번 문제: 알맞은 것을 고르세요. ({req['difficulty']})",
+                    "options": options,
+                    "correct_answer": rng.choice(options),
+                    "explanation": f"{topic} 스텁 해설 {i}",
+                })
+        return questions
+
+
+class GeminiGenerator:
+    """google.generativeai 로 문제를 만듭니다. 응답은 JSON 배열로 받아 가져오기 규칙으로 검증합니다."""
+    name = "gemini"
+
+    PROMPT = (
+        "주제 '{topic}'에 대한 {difficulty} 난이도 퀴즈 문제 {count}개를 만들어 주세요. "
+        "JSON 배열만 출력하고, 각 원소는 "
+        '{{"type": "multiple" | "ox", "text": 문제, "options": 보기 배열(ox 는 ["O","X"]), '
+        '"correct_answer": 정답(보기 중 하나), "explanation": 해설}} 형식이어야 합니다.'
+    )
+
+    def __init__(self, model_name: str = None, timeout: float = 60.0):
+        # 무거운 SDK 라서 Gemini 를 실제로 쓸 때만 불러옵니다. (워커 부팅 시간에서 제외)
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self._genai = genai
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+        self.timeout = timeout
+
+    def generate(self, req: Dict[str, Any]) -> List[Dict[str, Any]]:
+        model = self._genai.GenerativeModel(
+            self.model_name,
+            generation_config={"response_mime_type": "application/json"},
+        )
+        response = model.generate_content(
+            self.PROMPT.format(**req), request_options={"timeout": self.timeout})
+        items = json.loads(response.text)
+        if not isinstance(items, list) or not items:
+            raise ValueError("model returned no questions")
+        try:
+            return [_validate_question(i, q) for i, q in enumerate(items[:req["count"]], start=1)]
+        except ImportFormatError as e:
+            raise ValueError(f"model returned an invalid question ({e})")
+
+
+def default_generator():
+    """QUIZ_GENERATOR=stub|gemini. 지정이 없으면 GEMINI_API_KEY 가 있을 때만 Gemini 를 사용합니다."""
+    kind = os.getenv("QUIZ_GENERATOR") or ("gemini" if os.getenv("GEMINI_API_KEY") else "stub")
+    if kind == "gemini":
+        return GeminiGenerator()
+    return StubGenerator(delay=float(os.getenv("QUIZ_GENERATOR_STUB_DELAY", 0)))
+
+
+# ------------------
+# 3. 워커 간 공유 저장소 (GenerationJob 테이블)
+# ------------------
+def _json_column(value):
+    # MariaDB 의 JSON 컬럼은 문자열로 돌아옵니다.
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+
+def _ms(ts: Optional[float]) -> Optional[int]:
+    return int(ts * 1000) if ts else None
+
+
+class DBJobStore:
+    """
+    작업 상태/결과를 DB 에 기록해 모든 워커가 보게 합니다. get_db 는 DBManager 를 돌려주는 함수입니다.
+    DB 를 쓸 수 없으면 예외를 올리고, 큐는 그동안 워커 메모리만으로 동작합니다.
+    """
+    name = "db"
+
+    def __init__(self, get_db: Callable[[], Any]):
+        self._get_db = get_db
+
+    def _db(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("database unavailable")
+        return db
+
+    def insert(self, job: "GenerationJob"):
+        self._db().insert_generation_job(job.id, job.key, job.request, job.status, _ms(job.created_at))
+
+    def save(self, job: "GenerationJob"):
+        self._db().update_generation_job(job.id, job.status, job.result, job.error,
+                                         _ms(job.started_at), _ms(job.finished_at))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._db().get_generation_job(job_id)
+
+    def find(self, key: str, done_since: float, active_since: float) -> Optional[Dict[str, Any]]:
+        return self._db().find_reusable_generation_job(key, _ms(done_since), _ms(active_since))
+
+    def prune(self, before: float) -> int:
+        return self._db().delete_generation_jobs(_ms(before))
+
+
+# ------------------
+# 4. 작업 큐
+# ------------------
+class GenerationJob:
+    __slots__ = ('id', 'key', 'request', 'status', 'result', 'error', 'cached',
+                 'created_at', 'started_at', 'finished_at', 'version', 'remote')
+
+    def __init__(self, key: str, req: Dict[str, Any], job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.key = key
+        self.request = req
+        self.status = 'queued'          # queued → running → done | failed
+        self.result: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self.cached = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.version = 0                # 상태가 바뀔 때마다 증가 (스트리밍에서 변경 감지용)
+        self.remote = False             # 다른 워커가 맡은 작업을 저장소에서 읽어 온 것
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], stale_before: float) -> "GenerationJob":
+        """
+        GenerationJob 테이블 행으로 작업을 만듭니다. (다른 워커가 맡은 작업)
+        stale_before 전에 만들어졌는데 아직 끝나지 않은 작업은 맡은 워커가 죽은 것으로 보고 failed 로 돌려줍니다.
+        """
+        req = _json_column(row['request'])
+        job = cls(row['prompt_key'], req, job_id=row['job_id'])
+        job.status = row['status']
+        job.result = _json_column(row['result'])
+        job.error = row['error']
+        job.created_at = row['created_at'] / 1000
+        job.started_at = row['started_at'] / 1000 if row['started_at'] else None
+        job.finished_at = row['finished_at'] / 1000 if row['finished_at'] else None
+        if not job.finished and job.created_at < stale_before:
+            job.status, job.error = 'failed', "generation worker was lost, please retry"
+            job.finished_at = job.finished_at or time.time()
+        # 로컬 작업의 version 과 같은 규칙 (queued 0 → running 1 → done/failed 2)
+        job.version = _STATUS_VERSION[job.status]
+        job.remote = True
+        return job
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "request": self.request,
+            "cached": self.cached,
+            "created_at": int(self.created_at * 1000),
+        }
+        if self.finished_at:
+            data["duration_ms"] = round((self.finished_at - (self.started_at or self.created_at)) * 1000, 1)
+        if self.status == 'done':
+            data["questions"] = self.result
+        elif self.status == 'failed':
+            data["error"] = self.error
+        return data
+
+
+class GenerationJobQueue:
+    """
+    퀴즈 생성 요청을 큐에 넣고 workers 개의 백그라운드 스레드가 생성기를 호출합니다.
+
+    - 결과는 prompt_key 로 cache_max 개까지 LRU 캐시에 result_ttl 초 동안 보관하며,
+      캐시에 있으면 큐를 거치지 않고 바로 done 상태의 작업을 돌려줍니다.
+    - 같은 키의 작업이 이미 대기/진행 중이면 새 작업을 만들지 않고 그 작업을 공유합니다.
+    - 대기 작업이 max_queue 개를 넘으면 GenerationQueueFull 을 발생시킵니다.
+    - 끝난 작업은 job_ttl 초 뒤 조회 목록에서 지웁니다.
+    - store(DBJobStore) 가 있으면 작업 상태를 저장소에도 기록합니다. 이 워커에 없는 작업은 저장소에서 읽고
+      (스트림은 poll_interval 초 간격으로 확인), 다른 워커의 진행 중 작업/끝난 결과도 재사용합니다.
+      job_timeout 초가 지나도 끝나지 않은 다른 워커의 작업은 그 워커가 죽은 것으로 봅니다.
+    """
+
+    def __init__(self, generator, workers: int = 2, max_queue: int = 100,
+                 result_ttl: float = 3600.0, cache_max: int = 500, job_ttl: float = 600.0,
+                 store: Optional[DBJobStore] = None, job_timeout: float = 300.0, poll_interval: float = 1.0):
+        self.generator = generator
+        self.result_ttl = result_ttl
+        self.cache_max = cache_max
+        self.job_ttl = job_ttl
+        self.store = store
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self._next_store_prune = 0.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._inflight: Dict[str, GenerationJob] = {}
+        # prompt_key → (결과, 만료 시각, 결과를 만든 작업 id)
+        self._results: "OrderedDict[str, Tuple[List[Dict[str, Any]], float, str]]" = OrderedDict()
+        self._stats = {"submitted": 0, "cache_hits": 0, "coalesced": 0, "rejected": 0,
+                       "shared_hits": 0, "store_errors": 0,
+                       "generated": 0, "failed": 0, "generate_time_total": 0.0}
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"quiz-gen-{i}", daemon=True) for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # --- 제출 / 조회 ---
+    def submit(self, req: Dict[str, Any]) -> GenerationJob:
+        """정규화된 요청으로 작업을 만들거나, 캐시/진행 중 작업을 재사용해 반환합니다."""
+        key = prompt_key(req)
+        with self._cond:
+            if self._closed:
+                raise GenerationQueueFull("generation queue is shut down")
+            self._prune_locked()
+            self._stats["submitted"] += 1
+            job = self._reuse_local_locked(key, req)
+            if job is not None:
+                return job
+        self._prune_store()
+
+        # 다른 워커가 이미 만들었거나 만들고 있는 작업
+        shared = self._find_shared(key)
+        if shared is not None:
+            return shared
+
+        with self._cond:
+            if self._closed:
+                raise GenerationQueueFull("generation queue is shut down")
+            # 저장소를 보는 동안 이 워커의 다른 요청이 같은 작업을 만들었을 수 있음
+            job = self._reuse_local_locked(key, req)
+            if job is not None:
+                return job
+            if self._queue.full():
+                self._stats["rejected"] += 1
+                raise GenerationQueueFull(f"generation queue is full ({self._queue.maxsize})")
+            job = GenerationJob(key, req)
+            # 생성 스레드가 상태를 갱신하기 전에 행이 있어야 하므로 큐에 넣기 전에 기록합니다.
+            self._store_call("insert", job)
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            return job
+
+    def _reuse_local_locked(self, key: str, req: Dict[str, Any]) -> Optional[GenerationJob]:
+        cached = self._cached_result_locked(key)
+        if cached is not None:
+            result, job_id = cached
+            # 결과를 만든 작업 id 를 그대로 돌려주므로 저장소의 행으로 다른 워커에서도 조회됩니다.
+            job = GenerationJob(key, req, job_id=job_id)
+            job.status, job.result, job.cached = 'done', result, True
+            job.finished_at = job.created_at
+            self._jobs[job.id] = job
+            self._stats["cache_hits"] += 1
+            return job
+        running = self._inflight.get(key)
+        if running is not None:
+            self._stats["coalesced"] += 1
+            return running
+        return None
+
+    def _find_shared(self, key: str) -> Optional[GenerationJob]:
+        if self.store is None:
+            return None
+        now = time.time()
+        row = self._store_call("find", key, now - self.result_ttl, now - self.job_timeout)
+        if row is None:
+            return None
+        job = GenerationJob.from_row(row, now - self.job_timeout)
+        with self._cond:
+            self._stats["shared_hits"] += 1
+            if job.status == 'done':
+                job.cached = True
+                self._remember_result_locked(key, job.result, job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is not None or self.store is None:
+            return job
+        # 다른 워커가 맡은 작업
+        row = self._store_call("get", job_id)
+        return GenerationJob.from_row(row, time.time() - self.job_timeout) if row else None
+
+    def wait(self, job_id: str, seen_version: int, timeout: float) -> Optional[GenerationJob]:
+        """작업 상태가 seen_version 이후로 바뀌거나 timeout 이 지날 때까지 기다립니다. (스트리밍용)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while job_id in self._jobs:
+                job = self._jobs[job_id]
+                if job.version != seen_version or job.finished:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                self._cond.wait(remaining)
+        # 이 워커에 없는 작업은 알림을 받을 수 없으므로 저장소를 poll_interval 간격으로 확인합니다.
+        while True:
+            job = self.get(job_id)
+            if job is None or job.version != seen_version or job.finished:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            time.sleep(min(self.poll_interval, remaining))
+
+    def _store_call(self, method: str, *args):
+        """저장소 호출. 실패하면 로그만 남기고 None (이 워커 메모리만으로 계속 동작)"""
+        if self.store is None:
+            return None
+        try:
+            return getattr(self.store, method)(*args)
+        except Exception as e:
+            logger.warning(f"생성 작업 저장소 {method} 실패: {e}")
+            with self._cond:
+                self._stats["store_errors"] += 1
+            return None
+
+    def _prune_store(self):
+        # 끝난 결과는 result_ttl 동안 캐시로 쓰이므로 그보다 오래된 행만 1분에 한 번 지웁니다.
+        if self.store is None or time.monotonic() < self._next_store_prune:
+            return
+        self._next_store_prune = time.monotonic() + 60.0
+        self._store_call("prune", time.time() - max(self.result_ttl, self.job_ttl, self.job_timeout))
+
+    def _cached_result_locked(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        result, expires, job_id = entry
+        if expires <= time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return result, job_id
+
+    def _remember_result_locked(self, key: str, result: List[Dict[str, Any]], job_id: str):
+        self._results[key] = (result, time.monotonic() + self.result_ttl, job_id)
+        self._results.move_to_end(key)
+        while len(self._results) > self.cache_max:
+            self._results.popitem(last=False)
+
+    def _prune_locked(self):
+        cutoff = time.time() - self.job_ttl
+        stale = [job_id for job_id, job in self._jobs.items()
+                 if job.finished and (job.finished_at or job.created_at) < cutoff]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    # --- 백그라운드 생성 ---
+    def _update(self, job: GenerationJob, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+        self._store_call("save", job)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            self._update(job, status='running', started_at=time.time())
+            start = time.monotonic()
+            try:
+                result = self.generator.generate(job.request)
+            except Exception as e:
+                logger.warning(f"퀴즈 생성 실패 ({job.request['topic']}): {e}")
+                with self._cond:
+                    self._inflight.pop(job.key, None)
+                    self._stats["failed"] += 1
+                self._update(job, status='failed', error=str(e), finished_at=time.time())
+                continue
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._remember_result_locked(job.key, result, job.id)
+                self._inflight.pop(job.key, None)
+                self._stats["generated"] += 1
+                self._stats["generate_time_total"] += elapsed
+            self._update(job, status='done', result=result, finished_at=time.time())
+
+    # --- 종료 / 통계 ---
+    def close(self, timeout: Optional[float] = 5.0):
+        """새 작업을 막고 워커 스레드를 종료합니다. (대기 중인 작업은 failed 로 기록하고 버림)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+        dropped = []
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP:
+                dropped.append(job)
+        for job in dropped:
+            # 다른 워커에서 폴링 중인 클라이언트가 job_timeout 까지 기다리지 않도록
+            self._update(job, status='failed', error="server is shutting down, please retry",
+                         finished_at=time.time())
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            generated = self._stats["generated"]
+            return {
+                "generator": getattr(self.generator, "name", type(self.generator).__name__),
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "jobs": len(self._jobs),
+                "inflight": len(self._inflight),
+                "cached_results": len(self._results),
+                "submitted": self._stats["submitted"],
+                "cache_hits": self._stats["cache_hits"],
+                "coalesced": self._stats["coalesced"],
+                "rejected": self._stats["rejected"],
+                "store": self.store.name if self.store else "memory",
+                "shared_hits": self._stats["shared_hits"],
+                "store_errors": self._stats["store_errors"],
+                "generated": generated,
+                "failed": self._stats["failed"],
+                "generate_latency_avg_ms": round(self._stats["generate_time_total"] / generated * 1000, 1) if generated else 0.0,
+            }
+
+
+# 작업 상태 저장소: db (GenerationJob 테이블, 워커 간 공유) | memory (워커 메모리에만)
+QUIZ_GENERATE_STORE = os.getenv("QUIZ_GENERATE_STORE", "db").lower()
+
+# 싱글톤 (워커 프로세스당 하나, 첫 요청 시 생성)
+generation_queue: Optional[GenerationJobQueue] = None
+_queue_lock = threading.Lock()
+
+def get_generation_queue() -> GenerationJobQueue:
+    global generation_queue
+    if generation_queue is None:
+        with _queue_lock:
+            if generation_queue is None:
+                store = None
+                if QUIZ_GENERATE_STORE == "db":
+                    from db import get_db_manager
+                    store = DBJobStore(get_db_manager)
+                generation_queue = GenerationJobQueue(
+                    default_generator(),
+                    workers=int(os.getenv("QUIZ_GENERATE_WORKERS", 2)),
+                    max_queue=int(os.getenv("QUIZ_GENERATE_QUEUE_MAX", 100)),
+                    result_ttl=float(os.getenv("QUIZ_GENERATE_CACHE_TTL", 3600)),
+                    cache_max=int(os.getenv("QUIZ_GENERATE_CACHE_MAX", 500)),
+                    store=store,
+                    job_timeout=float(os.getenv("QUIZ_GENERATE_JOB_TIMEOUT", 300)),
+                )
+    return generation_queue
+
+
+def shutdown_generation_queue():
+    """워커 스레드를 종료합니다. (atexit 에서 호출)"""
+    if generation_queue is not None:
+        generation_queue.close()
@@ -0,0 +1,117 @@
+# quiz_import.py (대량 퀴즈 가져오기: JSONL / CSV 스트리밍 파서)
+import csv
+import json
+from typing import Iterable, Iterator, Tuple, Dict, Any, Optional
+
+QUESTION_TYPES = ('multiple', 'ox', 'subjective')
+CSV_COLUMNS = ('title', 'category', 'type', 'text', 'options', 'correct_answer', 'explanation')
+
+
+class ImportFormatError(ValueError):
+    """가져오기 파일의 형식 오류 (몇 번째 줄인지 포함)."""
+
+    def __init__(self, line_no: int, message: str):
+        super().__init__(f"line {line_no}: {message}")
+        self.line_no = line_no
+
+
+def _validate_question(line_no: int, q: Dict[str, Any]) -> Dict[str, Any]:
+    if q.get('type') not in QUESTION_TYPES:
+        raise ImportFormatError(line_no, f"type must be one of {', '.join(QUESTION_TYPES)}")
+    if not q.get('text') or not q.get('correct_answer'):
+        raise ImportFormatError(line_no, "text and correct_answer are required")
+    return {
+        'type': q['type'],
+        'text': q['text'],
+        'options': q.get('options'),
+        'correct_answer': str(q['correct_answer']),
+        'explanation': q.get('explanation') or '',
+    }
+
+
+def _jsonl_records(lines: Iterable[bytes]) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    """
+    JSONL 한 줄을 ('quiz' | 'question', dict) 레코드로 바꿉니다.
+    - {"title": ..., "category": ...}            → 새 퀴즈 시작
+    - {"type": ..., "text": ..., "correct_answer": ...} → 직전 퀴즈의 문제
+    """
+    for line_no, raw in enumerate(lines, start=1):
+        line = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(line_no, f"invalid JSON ({e.msg})")
+        if not isinstance(obj, dict):
+            raise ImportFormatError(line_no, "each line must be a JSON object")
+        if 'text' in obj:
+            yield line_no, 'question', _validate_question(line_no, obj)
+        elif obj.get('title') and obj.get('category'):
+            yield line_no, 'quiz', {'title': obj['title'], 'category': obj['category']}
+        else:
+            raise ImportFormatError(line_no, "line is neither a quiz header (title, category) nor a question")
+
+
+def _csv_records(lines: Iterable[bytes]) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    """
+    CSV 헤더: title,category,type,text,options,correct_answer,explanation
+    (title, category) 가 바뀔 때마다 새 퀴즈로 간주합니다.
+    options 는 JSON 배열 문자열 또는 '|' 로 구분한 문자열을 허용합니다.
+    """
+    decoded = (raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw for raw in lines)
+    reader = csv.DictReader(decoded)
+    missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or []) and c not in ('options', 'explanation')]
+    if missing:
+        raise ImportFormatError(1, f"missing CSV columns: {', '.join(missing)}")
+
+    current: Optional[Tuple[str, str]] = None
+    for row in reader:
+        line_no = reader.line_num
+        key = ((row.get('title') or '').strip(), (row.get('category') or '').strip())
+        if not all(key):
+            raise ImportFormatError(line_no, "title and category are required")
+        if key != current:
+            current = key
+            yield line_no, 'quiz', {'title': key[0], 'category': key[1]}
+
+        options = (row.get('options') or '').strip()
+        if not options:
+            options = None
+        elif not options.startswith('['):
+            options = [o.strip() for o in options.split('|')]
+        yield line_no, 'question', _validate_question(line_no, {**row, 'options': options})
+
+
+def iter_quiz_bundles(lines: Iterable[bytes], fmt: str) -> Iterator[Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]]:
+    """
+    (퀴즈 헤더, 문제 이터레이터) 쌍을 차례로 돌려줍니다.
+    전체 파일을 메모리에 올리지 않도록, 문제 이터레이터는 입력을 읽는 만큼만 진행합니다.
+    다음 퀴즈로 넘어가기 전에 이전 문제 이터레이터를 끝까지 소비해야 합니다.
+    """
+    if fmt == 'csv':
+        records = _csv_records(lines)
+    elif fmt == 'jsonl':
+        records = _jsonl_records(lines)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    pending = None   # 문제 이터레이터가 읽어버린 다음 퀴즈 헤더
+
+    def questions():
+        nonlocal pending
+        for line_no, kind, obj in records:
+            if kind == 'quiz':
+                pending = (line_no, obj)
+                return
+            yield obj
+
+    for line_no, kind, obj in records:
+        if kind != 'quiz':
+            raise ImportFormatError(line_no, "question appears before any quiz header")
+        pending = (line_no, obj)
+        while pending:
+            _, header = pending
+            pending = None
+            yield header, questions()
@@ -0,0 +1,227 @@
+# recommender.py ("이 퀴즈를 푼 사람들이 함께 푼 퀴즈" — 풀이 기록 기반 item-item 코사인 유사도)
+import os
+import time
+import logging
+import threading
+from array import array
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+try:
+    import numpy as np
+    import scipy.sparse as sp
+except ImportError:   # numpy/scipy 가 없으면 추천 기능만 비활성화
+    np = sp = None
+
+logger = logging.getLogger(__name__)
+
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", 20))
+# 함께 푼 사용자가 이 수보다 적은 퀴즈 쌍은 무시 (우연한 동시 풀이로 인한 잡음 제거)
+RELATED_MIN_SUPPORT = int(os.getenv("RELATED_MIN_SUPPORT", 2))
+# 풀이 기록이 늘었는지 확인해 다시 계산하는 간격 (초)
+RELATED_REFRESH_INTERVAL = float(os.getenv("RELATED_REFRESH_INTERVAL", 600))
+# 유사도 블록(퀴즈 수 × 배치 열 수) 하나의 최대 원소 수. 메모리 상한 = 이 값 × 8 바이트 정도
+RELATED_BLOCK_ELEMENTS = int(os.getenv("RELATED_BLOCK_ELEMENTS", 4_000_000))
+
+
+def is_available() -> bool:
+    return np is not None and sp is not None
+
+
+# ------------------
+# 1. 계산
+# ------------------
+def pairs_to_arrays(pairs: Iterable[Tuple[str, int]]):
+    """(user_id, quiz_id) 이터러블을 (사용자 인덱스 배열, quiz_id 배열, 사용자 수) 로 바꿉니다."""
+    users: Dict[str, int] = {}
+    user_idx = array('i')
+    quiz_ids = array('i')
+    for user_id, quiz_id in pairs:
+        idx = users.get(user_id)
+        if idx is None:
+            idx = users[user_id] = len(users)
+        user_idx.append(idx)
+        quiz_ids.append(quiz_id)
+    return (np.frombuffer(user_idx, dtype=np.int32), np.frombuffer(quiz_ids, dtype=np.int32), len(users))
+
+
+def compute_related(user_idx, quiz_ids, n_users: int, k: int = RELATED_TOP_K,
+                    min_support: int = RELATED_MIN_SUPPORT,
+                    block_elements: int = RELATED_BLOCK_ELEMENTS) -> "RelatedStore":
+    """
+    사용자 × 퀴즈 이진 희소 행렬 X 에서 퀴즈 간 코사인 유사도
+        cos(i, j) = |U_i ∩ U_j| / sqrt(|U_i| · |U_j|)
+    를 구하고 퀴즈마다 상위 k 개 이웃만 남깁니다.
+
+    공동 풀이 수 행렬 Xᵀ·X 는 퀴즈 열 블록 단위로 계산하므로 메모리는 퀴즈 수² 가 아니라
+    block_elements 로 제한됩니다. 블록 안의 상위 k 선택도 argpartition 으로 한 번에 처리합니다.
+    """
+    items, item_col = np.unique(quiz_ids, return_inverse=True)
+    n_items = len(items)
+    if n_items == 0:
+        return RelatedStore(items.astype(np.int32), np.empty((0, k), np.int32), np.empty((0, k), np.float32))
+
+    # 같은 (사용자, 퀴즈) 를 여러 번 풀어도 1 로 (이진 행렬)
+    X = sp.csr_matrix((np.ones(len(user_idx), dtype=np.float32), (user_idx, item_col)),
+                      shape=(n_users, n_items))
+    X.sum_duplicates()
+    X.data[:] = 1.0
+    Xc = X.tocsc()
+    XT = Xc.T.tocsr()                                  # 퀴즈 × 사용자
+    norms = np.sqrt(np.asarray(X.sum(axis=0), dtype=np.float32).ravel())
+
+    kk = min(k, max(n_items - 1, 0))
+    neighbors = np.full((n_items, k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, k), dtype=np.float32)
+    if kk == 0:
+        return RelatedStore(items.astype(np.int32), neighbors, scores)
+
+    batch = max(1, block_elements // n_items)
+    for start in range(0, n_items, batch):
+        end = min(start + batch, n_items)
+        co = (XT @ Xc[:, start:end]).toarray()         # n_items × b 공동 풀이 수
+        co[co < min_support] = 0.0
+        cols = np.arange(end - start)
+        co[start + cols, cols] = 0.0                   # 자기 자신 제외
+        sim = co / norms[:, None] / norms[None, start:end]
+
+        top = np.argpartition(-sim, kk - 1, axis=0)[:kk]          # kk × b (정렬 전)
+        top_sim = np.take_along_axis(sim, top, axis=0)
+        order = np.argsort(-top_sim, axis=0, kind='stable')
+        top = np.take_along_axis(top, order, axis=0).T             # b × kk
+        top_sim = np.take_along_axis(top_sim, order, axis=0).T
+        top[top_sim <= 0] = -1                                     # 공동 풀이가 없는 자리는 비움
+        neighbors[start:end, :kk] = top
+        scores[start:end, :kk] = np.where(top >= 0, top_sim, 0.0)
+
+    # 열 인덱스 → 실제 quiz_id
+    valid = neighbors >= 0
+    neighbors[valid] = items[neighbors[valid]]
+    return RelatedStore(items.astype(np.int32), neighbors, scores)
+
+
+# ------------------
+# 2. 저장소
+# ------------------
+class RelatedStore:
+    """
+    퀴즈별 상위 k 이웃을 담은 고정 크기 배열.
+    quiz_ids(정렬됨) 에서 이진 탐색으로 행을 찾으므로 퀴즈 수만큼의 dict 를 만들지 않습니다.
+    """
+
+    __slots__ = ('quiz_ids', 'neighbors', 'scores', 'built_at', 'watermark')
+
+    def __init__(self, quiz_ids, neighbors, scores, watermark: int = 0):
+        self.quiz_ids = quiz_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.built_at = time.time()
+        self.watermark = watermark
+
+    def related(self, quiz_id: int, k: int) -> List[Tuple[int, float]]:
+        pos = int(np.searchsorted(self.quiz_ids, quiz_id))
+        if pos >= len(self.quiz_ids) or self.quiz_ids[pos] != quiz_id:
+            return []
+        ids, sims = self.neighbors[pos, :k], self.scores[pos, :k]
+        return [(int(i), float(s)) for i, s in zip(ids, sims) if i >= 0]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.quiz_ids.nbytes + self.neighbors.nbytes + self.scores.nbytes)
+
+
+# ------------------
+# 3. 주기적 재계산
+# ------------------
+class RelatedRecommender:
+    """
+    RelatedStore 를 백그라운드 스레드에서 만들고 교체합니다. (워커 프로세스당 하나)
+
+    - 첫 요청 때 계산을 시작하고, 끝날 때까지 related() 는 None 을 반환합니다.
+    - 이후 RELATED_REFRESH_INTERVAL 마다 풀이 기록의 최대 attempt_id 를 확인해
+      새 기록이 있을 때만 다시 계산합니다. 계산 중에도 이전 결과로 응답합니다.
+    - load_watermark() 는 MAX(attempt_id), load_pairs() 는 (user_id, quiz_id) 이터러블을 돌려줍니다.
+    """
+
+    def __init__(self, k: int = RELATED_TOP_K, refresh_interval: float = RELATED_REFRESH_INTERVAL):
+        self.k = k
+        self.refresh_interval = refresh_interval
+        self.store: Optional[RelatedStore] = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self._building = False
+        self._last_check = 0.0
+        self._stats = {"builds": 0, "skipped": 0, "failed": 0, "last_build_ms": 0.0, "last_attempts": 0}
+
+    def ensure_fresh(self, load_watermark, load_pairs):
+        """필요하면 백그라운드 재계산을 시작합니다. (요청을 막지 않음)"""
+        with self._lock:
+            if self._building:
+                return
+            # 아직 결과가 없으면(첫 계산 실패) 더 짧은 간격으로 다시 시도
+            interval = self.refresh_interval if self.store is not None else min(self.refresh_interval, 30.0)
+            if self._last_check and time.monotonic() - self._last_check < interval:
+                return
+            self._building = True
+            self._last_check = time.monotonic()
+        threading.Thread(target=self._build, args=(load_watermark, load_pairs),
+                         name="related-builder", daemon=True).start()
+
+    def _build(self, load_watermark, load_pairs):
+        try:
+            watermark = int(load_watermark() or 0)
+            current = self.store
+            if current is not None and current.watermark == watermark:
+                with self._lock:
+                    self._stats["skipped"] += 1
+                return
+            self.rebuild(load_pairs, watermark)
+        except Exception as e:
+            logger.error(f"관련 퀴즈 계산 실패: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+        finally:
+            with self._lock:
+                self._building = False
+
+    def rebuild(self, load_pairs, watermark: int = 0) -> RelatedStore:
+        """지금 스레드에서 바로 계산하고 교체합니다."""
+        start = time.perf_counter()
+        user_idx, quiz_ids, n_users = pairs_to_arrays(load_pairs())
+        store = compute_related(user_idx, quiz_ids, n_users, k=self.k)
+        store.watermark = watermark
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.store = store
+            self.version += 1
+            self._stats["builds"] += 1
+            self._stats["last_build_ms"] = round(elapsed_ms, 1)
+            self._stats["last_attempts"] = len(quiz_ids)
+        logger.info(f"관련 퀴즈 계산 완료: 풀이 {len(quiz_ids)}건, 퀴즈 {len(store.quiz_ids)}개 ({elapsed_ms:.0f}ms)")
+        return store
+
+    def related(self, quiz_id: int, k: int) -> Optional[List[Tuple[int, float]]]:
+        """(quiz_id, 유사도) 목록. 아직 한 번도 계산되지 않았으면 None."""
+        store = self.store
+        if store is None:
+            return None
+        return store.related(quiz_id, min(k, self.k))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            store = self.store
+            return {
+                "available": is_available(),
+                "ready": store is not None,
+                "building": self._building,
+                "quizzes": len(store.quiz_ids) if store is not None else 0,
+                "store_bytes": store.nbytes if store is not None else 0,
+                "watermark": store.watermark if store is not None else None,
+                **self._stats,
+            }
+
+
+# 싱글톤 (워커 프로세스당 하나)
+recommender = RelatedRecommender()
+
+def get_recommender() -> RelatedRecommender:
+    return recommender
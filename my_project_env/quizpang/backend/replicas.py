@@ -0,0 +1,277 @@
+# replicas.py (읽기 복제본 라우팅 — 호스트별 커넥션 풀, 장애/지연 복제본 자동 제외, read-your-writes)
+#
+# DB_REPLICAS="10.0.0.2,10.0.0.3:3307" 처럼 지정하면 DBManager 가 읽기 쿼리 일부를 복제본으로 보냅니다.
+# 복제본이 없거나 모두 제외된 상태면 primary 로 읽습니다.
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# 처음 제외할 때의 시간(초). 연속으로 실패하면 두 배씩 늘려 DB_REPLICA_EJECT_MAX 까지
+REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", 5))
+REPLICA_EJECT_MAX = float(os.getenv("DB_REPLICA_EJECT_MAX", 60))
+# 복제 지연이 이 값(초)을 넘거나 복제가 멈춘 복제본은 제외합니다.
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+# 복제 지연 확인 간격(초). 확인은 읽기 요청이 빌린 연결에서 한 번 더 쿼리하는 방식
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", 5))
+# 자기 쓰기 직후 이 시간(초) 동안은 해당 키(사용자/퀴즈)의 읽기를 primary 로 보냅니다.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
+# 최근 쓰기 표시를 최대 몇 개까지 기억할지 (넘으면 오래된 것부터 버림)
+READ_YOUR_WRITES_MAX_KEYS = 100_000
+# 워커 간 read-your-writes: 쓰기 응답에 마지막 쓰기 시각(UNIX ms)을 쿠키와 헤더로 내려주고,
+# 클라이언트가 다음 요청에 돌려보내면 어느 워커로 가든 READ_YOUR_WRITES_SECONDS 동안 primary 에서 읽습니다.
+# (CORS origin '*' 라 교차 출처 프론트는 쿠키 대신 응답 헤더 값을 같은 헤더로 돌려보내면 됨)
+LAST_WRITE_COOKIE = "qp_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+# 이번 요청을 보낸 클라이언트의 마지막 쓰기 시각(초, time.time 기준). init_app 의 훅이 요청마다 설정
+_client_last_write: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "client_last_write", default=None)
+
+ER_SPECIFIC_ACCESS_DENIED = 1227
+# 복제본 자체의 문제로 보는 오류 코드 (접속 불가, 연결 끊김, 서버 종료/과부하). 느린 쿼리/잠금 대기는 제외하지 않음
+_CONNECTION_ERRORS = frozenset([1040, 1053, 1927, 2002, 2003, 2006, 2013, 2055])
+
+
+class ReplicaUnavailable(Exception):
+    """복제본에서 읽지 못했을 때(연결 오류, 지연 초과). 읽기는 primary 에서 다시 시도합니다."""
+
+
+def is_connection_error(e: Exception) -> bool:
+    if isinstance(e, pymysql.err.InterfaceError):
+        return True
+    return isinstance(e, pymysql.err.OperationalError) and bool(e.args) and e.args[0] in _CONNECTION_ERRORS
+
+
+def parse_hosts(value: str, default_port: int) -> List[Tuple[str, int]]:
+    """"host1,host2:3307" → [("host1", default_port), ("host2", 3307)]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
+class Replica:
+    __slots__ = ('name', 'pool', 'failures', 'ejected_until', 'lag', 'next_lag_check',
+                 'lag_check_enabled', 'reads', 'ejections', 'last_error')
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.failures = 0              # 연속 실패 횟수 (제외 시간 계산용)
+        self.ejected_until = 0.0
+        self.lag: Optional[float] = None
+        self.next_lag_check = 0.0
+        self.lag_check_enabled = True
+        self.reads = 0
+        self.ejections = 0
+        self.last_error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """
+    읽기 대상을 고릅니다.
+
+    - 정상 복제본을 돌아가며(round-robin) 고르고, 없으면 None (primary 사용)
+    - 연결 오류나 복제 지연 초과가 나면 그 복제본을 일정 시간 제외합니다. 제외 시간이 지나면
+      다음 읽기가 다시 시도해 보고, 성공하면 연속 실패 횟수를 초기화합니다.
+    - mark_write(key) 후 READ_YOUR_WRITES_SECONDS 동안 같은 key 로 들어온 읽기는 primary 로 보냅니다.
+      (워커 프로세스 단위. 다른 워커로 간 요청은 클라이언트가 돌려보낸 마지막 쓰기 시각으로 판단, init_app 참고)
+    """
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        self._next = 0
+        self._recent_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._stats = {"replica_reads": 0, "primary_reads": 0, "read_your_writes": 0,
+                       "client_read_your_writes": 0, "fallbacks": 0}
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    # --- 선택 ---
+    def route(self, affinity: Optional[str] = None) -> Optional[Replica]:
+        """읽기를 보낼 복제본. None 이면 primary."""
+        now = time.monotonic()
+        with self._lock:
+            if affinity is not None:
+                until = self._recent_writes.get(affinity)
+                if until is not None and until > now:
+                    self._stats["read_your_writes"] += 1
+                    self._stats["primary_reads"] += 1
+                    return None
+            if client_wrote_recently():
+                self._stats["client_read_your_writes"] += 1
+                self._stats["primary_reads"] += 1
+                return None
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.ejected_until <= now:
+                    replica.reads += 1
+                    self._stats["replica_reads"] += 1
+                    return replica
+            self._stats["primary_reads"] += 1
+            return None
+
+    def report_success(self, replica: Replica):
+        if replica.failures:
+            with self._lock:
+                if replica.failures:
+                    logger.info(f"복제본 {replica.name} 복구됨")
+                replica.failures = 0
+
+    def report_failure(self, replica: Replica, error: Exception):
+        """복제본을 제외하고 이번 읽기를 primary 로 넘깁니다."""
+        with self._lock:
+            replica.failures += 1
+            backoff = min(REPLICA_EJECT_SECONDS * 2 ** (replica.failures - 1), REPLICA_EJECT_MAX)
+            replica.ejected_until = time.monotonic() + backoff
+            replica.ejections += 1
+            replica.last_error = str(error)
+            self._stats["fallbacks"] += 1
+        logger.warning(f"복제본 {replica.name} 을 {backoff:.0f}s 동안 제외합니다: {error}")
+
+    # --- 복제 지연 ---
+    def check_lag(self, replica: Replica, conn):
+        """확인 시점이 되었으면 빌린 연결로 복제 지연을 읽고, 기준을 넘으면 ReplicaUnavailable."""
+        now = time.monotonic()
+        if not replica.lag_check_enabled or now < replica.next_lag_check:
+            return
+        replica.next_lag_check = now + REPLICA_LAG_CHECK_INTERVAL
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SHOW SLAVE STATUS")
+                row = cursor.fetchone()
+        except pymysql.err.OperationalError as e:
+            if e.args and e.args[0] == ER_SPECIFIC_ACCESS_DENIED:
+                # REPLICATION CLIENT 권한이 없으면 지연 확인 없이 연결 오류로만 판단
+                replica.lag_check_enabled = False
+                logger.warning(f"복제본 {replica.name} 지연 확인 권한 없음, 지연 검사를 끕니다.")
+                return
+            raise
+        if row is None:
+            # 복제 설정이 없는 서버 (로컬 테스트용 두 번째 인스턴스 등)
+            replica.lag = 0.0
+            return
+        lag = row.get('Seconds_Behind_Master')
+        replica.lag = None if lag is None else float(lag)
+        if lag is None:
+            raise ReplicaUnavailable(f"replication stopped on {replica.name}")
+        if lag > REPLICA_MAX_LAG:
+            raise ReplicaUnavailable(f"{replica.name} is {lag}s behind (max {REPLICA_MAX_LAG:g}s)")
+
+    # --- read-your-writes ---
+    def mark_write(self, *keys: str):
+        if not self.replicas:
+            return
+        until = time.monotonic() + READ_YOUR_WRITES_SECONDS
+        with self._lock:
+            for key in keys:
+                self._recent_writes[key] = until
+                self._recent_writes.move_to_end(key)
+            # 앞쪽(가장 오래된 쓰기)부터 만료된 것과 한도를 넘는 것을 정리
+            now = time.monotonic()
+            while self._recent_writes:
+                key, expires = next(iter(self._recent_writes.items()))
+                if expires > now and len(self._recent_writes) <= READ_YOUR_WRITES_MAX_KEYS:
+                    break
+                self._recent_writes.popitem(last=False)
+
+    # --- 상태 ---
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                **self._stats,
+                "recent_write_keys": len(self._recent_writes),
+                "hosts": [{
+                    "name": r.name,
+                    "healthy": r.ejected_until <= now,
+                    "ejected_for_s": round(max(r.ejected_until - now, 0.0), 1),
+                    "lag_s": r.lag,
+                    "reads": r.reads,
+                    "ejections": r.ejections,
+                    "last_error": r.last_error,
+                    "pool": r.pool.stats(),
+                } for r in self.replicas],
+            }
+
+    def close(self):
+        for replica in self.replicas:
+            replica.pool.close()
+
+
+# ------------------
+# 워커 간 read-your-writes (마지막 쓰기 시각 쿠키/헤더)
+# ------------------
+def parse_last_write(value: Optional[str]) -> Optional[float]:
+    """쿠키/헤더 값(UNIX ms) → 초. 형식이 틀리거나 먼 미래 값(위조)은 무시합니다."""
+    if not value:
+        return None
+    try:
+        at = int(value) / 1000
+    except (TypeError, ValueError):
+        return None
+    if at > time.time() + 1.0:
+        return None
+    return at
+
+
+def client_wrote_recently() -> bool:
+    """이번 요청의 클라이언트가 READ_YOUR_WRITES_SECONDS 안에 쓰기를 했는지"""
+    at = _client_last_write.get()
+    return at is not None and time.time() - at < READ_YOUR_WRITES_SECONDS
+
+
+def set_client_last_write(at: Optional[float]) -> contextvars.Token:
+    return _client_last_write.set(at)
+
+
+def reset_client_last_write(token: contextvars.Token):
+    _client_last_write.reset(token)
+
+
+def init_app(app):
+    """
+    쓰기 요청(POST/PUT/PATCH/DELETE)이 성공하면 응답에 마지막 쓰기 시각을 쿠키와 X-Last-Write 헤더로 붙이고,
+    요청에 그 값이 있으면 이번 요청의 읽기에 적용합니다. 복제본이 없으면(DB_REPLICAS 미설정) 아무것도 하지 않습니다.
+    write-behind 로 저장이 조금 늦어지는 풀이 기록도 응답 시점부터 창이 시작되므로 함께 보호됩니다.
+    """
+    from flask import request, g
+
+    if not os.getenv("DB_REPLICAS"):
+        return
+
+    @app.before_request
+    def _load_last_write():
+        value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+        # gthread 워커는 스레드를 재사용하므로 값이 없어도 매번 설정하고 teardown 에서 되돌립니다.
+        g._last_write_token = set_client_last_write(parse_last_write(value))
+
+    @app.after_request
+    def _stamp_last_write(response):
+        if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+            value = str(int(time.time() * 1000))
+            response.headers[LAST_WRITE_HEADER] = value
+            response.set_cookie(LAST_WRITE_COOKIE, value, max_age=max(int(READ_YOUR_WRITES_SECONDS), 1),
+                                httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def _reset_last_write(exc=None):
+        token = g.pop("_last_write_token", None)
+        if token is not None:
+            reset_client_last_write(token)
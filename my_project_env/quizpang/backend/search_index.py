@@ -0,0 +1,263 @@
+# search_index.py (퀴즈 제목/카테고리/문제 본문 전문 검색용 메모리 역색인 + BM25)
+import os
+import re
+import sys
+import math
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 필드 가중치 (제목에서 일치하는 단어가 문제 본문보다 더 중요)
+FIELD_WEIGHTS = {
+    "title": float(os.getenv("SEARCH_WEIGHT_TITLE", 3.0)),
+    "category": float(os.getenv("SEARCH_WEIGHT_CATEGORY", 2.0)),
+    "questions": float(os.getenv("SEARCH_WEIGHT_QUESTIONS", 1.0)),
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 다른 워커에서 만든 퀴즈를 따라잡기 위해 DB 를 다시 확인하는 간격 (초)
+SEARCH_REFRESH_INTERVAL = float(os.getenv("SEARCH_REFRESH_INTERVAL", 30))
+
+
+# ------------------
+# 1. 토크나이저
+# ------------------
+_WORD = re.compile(r"[0-9a-z]+|[가-힣]+|[぀-ヿ一-鿿]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    검색용 토큰 목록. 영문/숫자는 단어 단위, 한글/한자/가나는 글자 2-gram 으로 자릅니다.
+    한국어는 조사/어미가 붙어 단어 형태가 계속 바뀌므로("광합성은", "광합성의")
+    형태소 분석기 없이도 부분 일치가 되도록 2-gram 을 씁니다. 한 글자 단어는 그대로 둡니다.
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _WORD.findall(unicodedata.normalize("NFKC", text).lower()):
+        if word.isascii() or len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _term_counts(fields: Dict[str, Iterable[str]]) -> Tuple[Dict[str, float], float]:
+    """필드별 토큰을 가중치를 곱한 (단어 → 빈도, 문서 길이) 로 합칩니다. (BM25F 방식)"""
+    counts: Dict[str, float] = {}
+    length = 0.0
+    for field, texts in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0.0) + weight
+                length += weight
+    return counts, length
+
+
+# ------------------
+# 2. 역색인
+# ------------------
+class _IndexData:
+    """역색인 본체 (단어 → {quiz_id: 가중 빈도}). rebuild 는 새 객체를 만든 뒤 한 번에 교체합니다."""
+
+    __slots__ = ('postings', 'doc_len', 'docs', 'total_len', 'synced_upto')
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.doc_len: Dict[int, float] = {}
+        self.docs: Dict[int, Tuple[str, str, str, int]] = {}
+        self.total_len = 0.0
+        self.synced_upto = 0     # DB 에서 읽어 온 가장 큰 quiz_id
+
+    def add(self, quiz_id: int, title: str, category: str, creator_id: str, question_texts: List[str]) -> bool:
+        if quiz_id in self.docs:
+            return False
+        counts, length = _term_counts({"title": [title], "category": [category], "questions": question_texts})
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[quiz_id] = tf
+        self.doc_len[quiz_id] = length
+        self.total_len += length
+        self.docs[quiz_id] = (title, category, creator_id, len(question_texts))
+        return True
+
+
+class SearchIndex:
+    """
+    퀴즈 단위 문서의 메모리 역색인.
+
+    - 처음 검색할 때 DB 에서 전체를 읽어 만들고(rebuild), 이후에는 add_quiz_and_questions 가
+      저장할 때마다 add_quiz 로 한 건씩 추가합니다.
+    - load_documents(after_quiz_id) 는 quiz_id 순으로 (quiz_id, title, category, creator_id, [문제 본문...])
+      을 돌려주는 함수입니다. (DBManager.iter_search_documents)
+    - 워커 프로세스마다 따로 가지므로 다른 워커에서 만든 퀴즈는 SEARCH_REFRESH_INTERVAL 마다
+      quiz_id 가 마지막으로 읽은 값보다 큰 것만 DB 에서 가져와 따라잡습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._data = _IndexData()
+        self.ready = False
+        self.version = 0
+        self._building = False
+        self._pending: List[Tuple] = []
+        self._last_refresh = 0.0
+        self._size_cache: Optional[Tuple[int, int]] = None
+        self._stats = {"searches": 0, "rebuilds": 0, "rebuild_ms": 0.0, "incremental_adds": 0,
+                       "refreshed_docs": 0, "search_time_total": 0.0}
+
+    # --- 문서 추가 ---
+    def add_quiz(self, quiz_id: int, title: str, category: str, creator_id: str, question_texts: List[str]):
+        """저장 직후 한 퀴즈를 색인에 추가합니다. 아직 색인이 없으면 첫 rebuild 가 DB 에서 읽으므로 무시합니다."""
+        with self._lock:
+            if self._building:
+                self._pending.append((quiz_id, title, category, creator_id, list(question_texts)))
+            elif self.ready and self._data.add(quiz_id, title, category, creator_id, question_texts):
+                self.version += 1
+                self._stats["incremental_adds"] += 1
+
+    def rebuild(self, load_documents) -> Dict[str, Any]:
+        """DB 의 모든 퀴즈로 색인을 새로 만듭니다. (빌드하는 동안 들어온 add_quiz 는 끝난 뒤 반영)"""
+        with self._build_lock:
+            self._rebuild_locked(load_documents)
+        return self.stats()
+
+    def _rebuild_locked(self, load_documents):
+        start = time.perf_counter()
+        fresh = _IndexData()
+        with self._lock:
+            self._building = True
+            self._pending = []
+        try:
+            for quiz_id, title, category, creator_id, texts in load_documents(0):
+                fresh.add(quiz_id, title, category, creator_id, texts)
+                fresh.synced_upto = max(fresh.synced_upto, quiz_id)
+        except Exception:
+            with self._lock:
+                self._building = False
+            raise
+        with self._lock:
+            for doc in self._pending:
+                fresh.add(*doc)
+            self._pending = []
+            self._building = False
+            self._data = fresh
+            self.version += 1
+            self.ready = True
+            self._last_refresh = time.monotonic()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._stats["rebuilds"] += 1
+            self._stats["rebuild_ms"] = round(elapsed_ms, 1)
+        logger.info(f"검색 색인 재구성 완료: 퀴즈 {len(fresh.docs)}개, 단어 {len(fresh.postings)}개 ({elapsed_ms:.0f}ms)")
+
+    def ensure_fresh(self, load_documents):
+        """색인이 없으면 만들고, 마지막 확인 후 SEARCH_REFRESH_INTERVAL 이 지났으면 새 퀴즈만 읽어 옵니다."""
+        if not self.ready:
+            with self._build_lock:
+                if not self.ready:
+                    self._rebuild_locked(load_documents)
+            return
+        if time.monotonic() - self._last_refresh < SEARCH_REFRESH_INTERVAL:
+            return
+        if not self._build_lock.acquire(blocking=False):
+            return   # 다른 요청이 이미 재구성/따라잡기 중
+        try:
+            self._last_refresh = time.monotonic()
+            added = 0
+            for quiz_id, title, category, creator_id, texts in load_documents(self._data.synced_upto):
+                with self._lock:
+                    if self._data.add(quiz_id, title, category, creator_id, texts):
+                        added += 1
+                        self.version += 1
+                    self._data.synced_upto = max(self._data.synced_upto, quiz_id)
+            if added:
+                with self._lock:
+                    self._stats["refreshed_docs"] += added
+        finally:
+            self._build_lock.release()
+
+    # --- 검색 ---
+    def search(self, query: str, limit: int, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """BM25 점수 순으로 (일치한 퀴즈 수, offset 부터 limit 개의 결과) 를 반환합니다."""
+        terms = set(tokenize(query))
+        start = time.perf_counter()
+        with self._lock:
+            data = self._data
+            n_docs = len(data.docs)
+            if not terms or not n_docs:
+                return 0, []
+            avg_len = data.total_len / n_docs
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = data.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for quiz_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * data.doc_len[quiz_id] / avg_len)
+                    scores[quiz_id] = scores.get(quiz_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            # 점수가 같으면 최신 퀴즈 먼저
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda kv: (kv[1], kv[0]))[offset:]
+            results = []
+            for quiz_id, score in top:
+                title, category, creator_id, questions_count = data.docs[quiz_id]
+                results.append({
+                    "quiz_id": quiz_id,
+                    "title": title,
+                    "category": category,
+                    "creator_id": creator_id,
+                    "questions_count": questions_count,
+                    "score": round(score, 4),
+                })
+            self._stats["searches"] += 1
+            self._stats["search_time_total"] += time.perf_counter() - start
+            return len(scores), results
+
+    # --- 통계 ---
+    def _approx_bytes_locked(self) -> int:
+        """색인 자료구조의 대략적인 메모리 사용량 (sys.getsizeof 합계, 색인이 바뀔 때만 다시 계산)."""
+        if self._size_cache and self._size_cache[0] == self.version:
+            return self._size_cache[1]
+        data = self._data
+        size = sys.getsizeof(data.postings) + sys.getsizeof(data.doc_len) + sys.getsizeof(data.docs)
+        size += len(data.doc_len) * sys.getsizeof(1.0)
+        for term, postings in data.postings.items():
+            # 값으로 들어 있는 float 객체까지 (quiz_id int 는 docs 와 공유되므로 제외)
+            size += sys.getsizeof(term) + sys.getsizeof(postings) + len(postings) * sys.getsizeof(1.0)
+        for doc in data.docs.values():
+            size += sys.getsizeof(doc) + sum(sys.getsizeof(v) for v in doc)
+        self._size_cache = (self.version, size)
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            searches = self._stats["searches"]
+            return {
+                "ready": self.ready,
+                "documents": len(self._data.docs),
+                "terms": len(self._data.postings),
+                "postings": sum(len(p) for p in self._data.postings.values()),
+                "synced_upto_quiz_id": self._data.synced_upto,
+                "approx_bytes": self._approx_bytes_locked(),
+                "searches": searches,
+                "search_latency_avg_ms": round(self._stats["search_time_total"] / searches * 1000, 2) if searches else 0.0,
+                "rebuilds": self._stats["rebuilds"],
+                "last_rebuild_ms": self._stats["rebuild_ms"],
+                "incremental_adds": self._stats["incremental_adds"],
+                "refreshed_docs": self._stats["refreshed_docs"],
+            }
+
+
+# 싱글톤 (워커 프로세스당 하나)
+search_index = SearchIndex()
+
+def get_search_index() -> SearchIndex:
+    return search_index
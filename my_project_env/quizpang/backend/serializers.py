@@ -0,0 +1,401 @@
+# serializers.py (DB 행 → 프론트엔드 응답 형식 변환, WSGI/ASGI 라우트 공용)
+import os
+import json
+import base64
+import struct
+from typing import Dict, Any, List, Tuple
+
+
+# ------------------
+# 1. 퀴즈 / 문제
+# ------------------
+def quiz_list_item(q) -> Dict[str, Any]:
+    # 필드 이름이 프론트엔드와 일치하는지 확인 (quiz_id, votes_avg 등)
+    # 퀴즈 평균 평점은 소수 첫째 자리까지. (Quiz.votes_avg 를 읽는 페이지 목록과 문항에서 계산하는 전체 목록이 같은 값)
+    return {
+        "quiz_id": q['quiz_id'],
+        "title": q['title'],
+        "category": q['category'],
+        "creator_id": q['creator_id'],
+        "votes_avg": round(float(q['votes_avg'] or 0), 1),
+        "votes_count": q['votes_count'],
+        "questions_count": q['questions_count'],
+    }
+
+
+def question_item(q, include_answers: bool = True) -> Dict[str, Any]:
+    # options는 DB에서 JSON으로 저장되므로, 프론트엔드 형식에 맞춰 역직렬화
+    options_data = q.get('options')
+    if isinstance(options_data, str):
+        try:
+            options_data = json.loads(options_data)
+        except ValueError:
+            options_data = [] # JSON 파싱 실패 시 빈 리스트
+    elif options_data is None:
+        options_data = []
+
+    item = {
+        "id": q['id'],
+        "type": q['type'],
+        "text": q['text'],
+        "options": options_data,
+        "correct_answer": q['correct_answer'],
+        "explanation": q.get('explanation', ''),
+        "votes_avg": q['votes_avg'],
+        "votes_count": q['votes_count'],
+    }
+    if not include_answers:
+        # 서버 채점(/submit) 을 쓰는 클라이언트에는 정답/해설을 보내지 않음
+        del item["correct_answer"], item["explanation"]
+    return item
+
+
+def quiz_payload(quiz, questions, include_answers: bool = True) -> Dict[str, Any]:
+    """GET /api/quiz/<id>/questions 응답 (QuizGamePage.tsx)"""
+    return {
+        "quiz": {
+            "quiz_id": quiz['quiz_id'],
+            "title": quiz['title'],
+            "category": quiz['category'],
+            "creator_id": quiz['creator_id'],
+        },
+        "questions": [question_item(q, include_answers) for q in questions]
+    }
+
+
+RATE_BATCH_MAX = 200
+
+
+def _id_int(value) -> int:
+    """JSON 정수 또는 "12" 같은 숫자 문자열만 받습니다. (true/false, 1.5 는 ValueError)"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_rating(data) -> Tuple[int, int]:
+    """POST /api/question/rate 본문 → (question_id, rating). "12" 같은 문자열 숫자도 받고, 그 밖에는 ValueError."""
+    try:
+        question_id = _id_int(data.get('questionId'))   # Frontend uses questionId
+        rating = _id_int(data.get('rating'))
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("Invalid question ID or rating (must be 1-5).")
+    if question_id <= 0 or not (1 <= rating <= 5):
+        raise ValueError("Invalid question ID or rating (must be 1-5).")
+    return question_id, rating
+
+
+def parse_rating_batch(data) -> List[Tuple[int, int]]:
+    """POST /api/question/rate/batch 본문 {"ratings": [...]} → [(question_id, rating)]. 항목마다 parse_rating 규칙"""
+    items = data.get('ratings') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("ratings must be a non-empty list.")
+    if len(items) > RATE_BATCH_MAX:
+        raise ValueError(f"Too many ratings (max {RATE_BATCH_MAX}).")
+    return [parse_rating(item) for item in items]
+
+
+# ------------------
+# 2. 풀이 기록 / 내 퀴즈
+# ------------------
+def attempt_item(a) -> Dict[str, Any]:
+    # 필드 이름을 Frontend 규격에 맞춰 변환 (attempt_id -> attemptId, total_questions -> totalQuestions 등)
+    return {
+        "attemptId": a['attempt_id'],
+        "userId": a['user_id'],
+        "quizId": a['quiz_id'],
+        "score": a['score'],
+        "totalQuestions": a['total_questions'],
+        "mode": a['mode'],
+        "date": a['date'],
+    }
+
+
+ATTEMPT_FIELDS = ('userId', 'quizId', 'score', 'totalQuestions', 'mode')
+
+
+def parse_attempt(data) -> Dict[str, Any]:
+    """
+    POST /api/attempt/save 본문 → add_quiz_attempt 형식 (quizId → quiz_id). 형식이 틀리면 ValueError.
+    write-behind 모드에서는 202 응답 뒤에 저장하므로, 저장 단계에서 거부될 값은 여기서 먼저 걸러냅니다.
+    """
+    if not isinstance(data, dict) or not all(key in data for key in ATTEMPT_FIELDS):
+        raise ValueError("Missing required fields for quiz attempt.")
+    user_id, mode = data['userId'], data['mode']
+    if not isinstance(user_id, str) or not 0 < len(user_id) <= 80:
+        raise ValueError("userId must be a non-empty string.")
+    if not isinstance(mode, str) or not 0 < len(mode) <= 20:
+        raise ValueError("mode must be a non-empty string (max 20 chars).")
+    try:
+        quiz_id, score, total = int(data['quizId']), int(data['score']), int(data['totalQuestions'])
+    except (TypeError, ValueError):
+        raise ValueError("quizId, score and totalQuestions must be integers.")
+    if quiz_id <= 0 or not 0 <= score <= total:
+        raise ValueError("Invalid quizId or score (0 <= score <= totalQuestions).")
+    return {'userId': user_id, 'quiz_id': quiz_id, 'score': score, 'totalQuestions': total, 'mode': mode}
+
+
+def created_quiz_item(c) -> Dict[str, Any]:
+    return {
+        "quizId": c['quiz_id'],
+        "title": c['title'],
+        "questionsCount": c['questions_count'],
+        "votesAvg": float(c['votes_avg'] or 0),
+        "votesCount": int(c['votes_count'] or 0),
+        "createdAt": c['created_at'].isoformat() if c['created_at'] else None,
+    }
+
+
+# /api/my/summary 의 최근 풀이 기록 개수 (?recent=, 기본값만 캐시)
+MY_SUMMARY_RECENT = int(os.getenv("MY_SUMMARY_RECENT", 50))
+MY_SUMMARY_MAX_RECENT = 500
+MY_SUMMARY_CREATED = int(os.getenv("MY_SUMMARY_CREATED", 100))
+
+
+def parse_summary_recent(args) -> int:
+    """?recent= 값을 1..MY_SUMMARY_MAX_RECENT 로 제한합니다. 정수가 아니면 ValueError."""
+    try:
+        recent = int(args.get('recent', MY_SUMMARY_RECENT))
+    except ValueError:
+        raise ValueError("recent must be an integer.")
+    return max(1, min(recent, MY_SUMMARY_MAX_RECENT))
+
+
+def my_summary_payload(summary) -> Dict[str, Any]:
+    """
+    DBManager.get_my_summary 결과 → HistoryPage 응답.
+    attempts/created 는 최근 N건만 담고, 전체 합계는 totals 로 서버에서 계산해 내려줍니다.
+    """
+    solve = summary["solve"] or {}
+    author = summary["author"] or {}
+    attempt_count = int(solve.get("attempts") or 0)
+    total_correct = int(solve.get("total_correct") or 0)
+    total_questions = int(solve.get("total_questions") or 0)
+    return {
+        "attempts": [attempt_item(a) for a in summary["attempts"]],
+        "created": [created_quiz_item(c) for c in summary["created"]],
+        "totals": {
+            "attempts": attempt_count,
+            "totalCorrect": total_correct,
+            "totalQuestions": total_questions,
+            "accuracy": round(total_correct / total_questions, 4) if total_questions else 0.0,
+            "createdCount": int(author.get("quiz_count") or 0),
+            "questionVotes": int(author.get("question_votes") or 0),
+            "authorPoints": float(author.get("author_points") or 0),
+        },
+        "hasMoreAttempts": attempt_count > len(summary["attempts"]),
+    }
+
+
+# ------------------
+# 3. 랭킹
+# ------------------
+def solver_rank_item(r) -> Dict[str, Any]:
+    return {
+        "userId": r["userId"],
+        "username": r["username"],
+        "attempts": r["attempts"],
+        "solverPoints": int(r["solverPoints"] or 0),
+        "totalQuestions": int(r["total_questions"] or 0),
+        "accuracy": float(r["accuracy"] or 0),
+    }
+
+
+def author_rank_item(r) -> Dict[str, Any]:
+    return {
+        "userId": r["userId"],
+        "username": r["username"],
+        "quizCount": int(r["quiz_count"] or 0),
+        "questionVotes": int(r["question_votes"] or 0),
+        "avgQuestionRating": float(r["avg_question_rating"] or 0),
+        "authorPoints": float(r["authorPoints"] or 0),
+    }
+
+
+# ------------------
+# 4. 퀴즈 목록 페이지네이션 커서
+# ------------------
+QUIZ_LIST_DEFAULT_LIMIT = 20
+QUIZ_LIST_MAX_LIMIT = 100
+QUIZ_LIST_SORTS = ('latest', 'rating')
+
+
+def _encode_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> str:
+    return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+
+
+def _as_float32(value) -> float:
+    """
+    Quiz.votes_avg 는 FLOAT(단정밀도) 컬럼이므로, 커서 비교 시 DB 에 저장된 값과 정확히 같도록
+    단정밀도로 반올림한 값을 사용합니다. (4.3 != 4.300000190734863 문제 방지)
+    """
+    return struct.unpack('f', struct.pack('f', float(value or 0)))[0]
+
+
+def encode_quiz_cursor(sort: str, row) -> str:
+    """마지막 행으로부터 다음 페이지 커서(불투명 문자열)를 만듭니다."""
+    if sort == 'rating':
+        raw = f"rating:{_as_float32(row['votes_avg'])!r}:{row['quiz_id']}"
+    else:
+        raw = f"latest:{row['quiz_id']}"
+    return _encode_cursor(raw)
+
+
+def decode_quiz_cursor(sort: str, cursor: str):
+    """커서를 (votes_avg, quiz_id) 또는 (quiz_id,) 튜플로 복원합니다. 잘못된 커서는 ValueError."""
+    try:
+        kind, *values = _decode_cursor(cursor).split(':')
+        if kind != sort:
+            raise ValueError
+        if sort == 'rating':
+            return float(values[0]), int(values[1])
+        return (int(values[0]),)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def parse_quiz_list_args(args):
+    """
+    /api/quiz/list 의 쿼리 파라미터를 (sort, limit, category, after) 로 검증/변환합니다.
+    잘못된 값이면 ValueError (메시지는 그대로 400 응답에 사용).
+    """
+    sort = (args.get('sort') or 'latest').lower()
+    if sort not in QUIZ_LIST_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(QUIZ_LIST_SORTS)}.")
+    try:
+        limit = int(args.get('limit', QUIZ_LIST_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    limit = max(1, min(limit, QUIZ_LIST_MAX_LIMIT))
+    category = (args.get('category') or '').strip() or None
+    cursor = args.get('cursor') or None
+    after = decode_quiz_cursor(sort, cursor) if cursor else None
+    return sort, limit, category, after
+
+
+def split_quiz_page(rows: List, sort: str, limit: int):
+    """limit + 1 행 조회 결과를 (이번 페이지 항목, 다음 페이지 커서 또는 None) 으로 나눕니다."""
+    next_cursor = encode_quiz_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    return [quiz_list_item(q) for q in rows[:limit]], next_cursor
+
+
+# ------------------
+# 5. 풀이 기록 페이지네이션 커서
+# ------------------
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 200
+
+
+def encode_history_cursor(row) -> str:
+    return _encode_cursor(f"history:{row['date']}:{row['attempt_id']}")
+
+
+def decode_history_cursor(cursor: str):
+    """커서를 (date, attempt_id) 로 복원합니다. 잘못된 커서는 ValueError."""
+    try:
+        kind, date, attempt_id = _decode_cursor(cursor).split(':')
+        if kind != 'history':
+            raise ValueError
+        return int(date), int(attempt_id)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def parse_history_args(args):
+    """
+    /api/history 의 쿼리 파라미터를 (limit, after, since) 로 검증/변환합니다.
+    since 는 마지막 동기화 시점의 date(ms) 이며, 그보다 새로운 기록만 돌려줍니다.
+    """
+    try:
+        limit = int(args.get('limit', HISTORY_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+    cursor = args.get('cursor') or None
+    after = decode_history_cursor(cursor) if cursor else None
+    since = args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValueError("since must be an integer timestamp (ms).")
+    return limit, after, since
+
+
+def split_history_page(rows: List, limit: int):
+    """limit + 1 행 조회 결과를 (이번 페이지 항목, 다음 페이지 커서 또는 None) 으로 나눕니다."""
+    next_cursor = encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [attempt_item(a) for a in rows[:limit]], next_cursor
+
+
+# ------------------
+# 6. 검색 (GET /api/search?q=)
+# ------------------
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_OFFSET = 1000      # 이보다 깊은 페이지는 검색어를 좁히도록 유도
+SEARCH_MAX_QUERY_LENGTH = 100
+
+
+def encode_search_cursor(offset: int) -> str:
+    return _encode_cursor(f"search:{offset}")
+
+
+def decode_search_cursor(cursor: str) -> int:
+    """커서를 결과 offset 으로 복원합니다. 잘못된 커서는 ValueError."""
+    try:
+        kind, offset = _decode_cursor(cursor).split(':')
+        if kind != 'search' or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def parse_search_args(args):
+    """/api/search 의 쿼리 파라미터를 (q, limit, offset) 으로 검증/변환합니다."""
+    query = (args.get('q') or '').strip()
+    if not query:
+        raise ValueError("q is required.")
+    if len(query) > SEARCH_MAX_QUERY_LENGTH:
+        raise ValueError(f"q is too long (max {SEARCH_MAX_QUERY_LENGTH} characters).")
+    try:
+        limit = int(args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    cursor = args.get('cursor') or None
+    offset = decode_search_cursor(cursor) if cursor else 0
+    if offset > SEARCH_MAX_OFFSET:
+        raise ValueError("Too deep; refine the search query.")
+    return query, limit, offset
+
+
+def search_next_cursor(total: int, limit: int, offset: int):
+    """다음 페이지가 있으면 커서, 없으면 None."""
+    next_offset = offset + limit
+    return encode_search_cursor(next_offset) if total > next_offset and next_offset <= SEARCH_MAX_OFFSET else None
+
+
+# ------------------
+# 7. 관련 퀴즈 (GET /api/quiz/<id>/related)
+# ------------------
+RELATED_DEFAULT_LIMIT = 10
+
+
+def related_quiz_item(q, similarity: float) -> Dict[str, Any]:
+    item = quiz_list_item(q)
+    item["similarity"] = round(similarity, 4)
+    return item
+
+
+def parse_related_limit(args, max_limit: int) -> int:
+    try:
+        limit = int(args.get('limit', RELATED_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    return max(1, min(limit, max_limit))
@@ -0,0 +1,110 @@
+# slowlog.py (느린 쿼리 로그 + EXPLAIN 수집)
+import re
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)(?:\s*,\s*\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+_COMMENT = re.compile(r"--[^\n]*")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    리터럴과 파라미터 자리를 '?' 로 바꾸고 공백을 정리해 같은 형태의 쿼리를 하나로 묶습니다.
+    (executemany 로 펼쳐진 다중 행 VALUES 목록도 '(?...)' 하나로 접습니다.)
+    """
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _VALUE_LISTS.sub("(?...)", sql)
+    sql = sql.replace("%s", "?")
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def redact_params(args) -> str:
+    """파라미터 값은 기록하지 않고 개수와 타입만 남깁니다. (이메일/비밀번호 해시 등 보호)"""
+    if args is None:
+        return "none"
+    if isinstance(args, dict):
+        return "{" + ", ".join(f"{k}: <{type(v).__name__}>" for k, v in args.items()) + "}"
+    if isinstance(args, (list, tuple)):
+        return "(" + ", ".join(f"<{type(v).__name__}>" for v in args) + ")"
+    return f"<{type(args).__name__}>"
+
+
+class SlowQueryLog:
+    """
+    threshold_ms 를 넘긴 문장을 정규화된 SQL, 가려진 파라미터, 소요 시간, 행 수와 함께 기록합니다.
+    SELECT 는 정규화된 문장마다 한 번만 EXPLAIN 결과를 수집합니다.
+    최근 max_entries 건은 링 버퍼에 남아 관리자 API 로 조회할 수 있습니다.
+    """
+
+    def __init__(self, threshold_ms: float = 200.0, max_entries: int = 200, max_plans: int = 500):
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=max_entries)
+        self._plans: "OrderedDict[str, Any]" = OrderedDict()
+        self._max_plans = max_plans
+        self._total = 0
+
+    def is_slow(self, duration: float) -> bool:
+        return self.threshold_ms is not None and self.threshold_ms >= 0 and duration * 1000 >= self.threshold_ms
+
+    def _needs_plan(self, normalized: str) -> bool:
+        with self._lock:
+            return normalized.lower().startswith("select") and normalized not in self._plans
+
+    def record(self, conn, sql: str, args, duration: float, rows: int):
+        """느린 문장 하나를 기록합니다. conn 은 EXPLAIN 을 실행할 커넥션입니다."""
+        normalized = normalize_sql(sql)
+        if conn is not None and self._needs_plan(normalized):
+            plan = self._explain(conn, sql, args)
+            with self._lock:
+                self._plans[normalized] = plan
+                while len(self._plans) > self._max_plans:
+                    self._plans.popitem(last=False)
+
+        entry = {
+            "sql": normalized,
+            "params": redact_params(args),
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows,
+            "at": int(time.time() * 1000),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self._total += 1
+        logger.warning(f"느린 쿼리 {entry['duration_ms']}ms (rows={rows}): {normalized} params={entry['params']}")
+
+    @staticmethod
+    def _explain(conn, sql: str, args) -> Optional[List[Dict[str, Any]]]:
+        """계측되지 않는 별도 커서로 EXPLAIN 을 실행합니다. (원래 커서의 결과를 건드리지 않음)"""
+        from pymysql.cursors import DictCursor
+        try:
+            with conn.cursor(DictCursor) as cursor:
+                cursor.execute("EXPLAIN " + sql, args)
+                return [dict(r) for r in cursor.fetchall()]
+        except Exception as e:
+            logger.info(f"EXPLAIN 수집 실패: {e}")
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """최근 느린 쿼리와 정규화된 문장별 EXPLAIN 결과를 반환합니다. (최신 항목이 앞)"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+            return {
+                "threshold_ms": self.threshold_ms,
+                "total": self._total,
+                "entries": [dict(e, plan=self._plans.get(e["sql"])) for e in entries],
+            }
+
+
+# DBManager 가 임계값을 설정하고, InstrumentedCursor 가 기록하는 프로세스 전역 인스턴스
+slow_query_log = SlowQueryLog()